@@ -6,6 +6,13 @@ import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
+
+load_dotenv()
+
+# Before anything heavy is imported, so the profile and timeline cover it
+from modules import import_profiler
+import_profiler.install_from_env()
+from modules.startup import StartupGraph
 import discord
 from discord.ext import commands as discord_commands
 from discord.ext import tasks as discord_tasks
@@ -19,10 +26,9 @@ import datetime
 import socket
 import asyncio
 import traceback
+import importlib
 
 
-load_dotenv()
-
 # Initialize centralized logging
 logger = get_logger('drawbridge.main')
 discord_event_logger = DiscordEventLogger()
@@ -45,6 +51,9 @@ socket_path = "/tmp/drawbridge.sock"
 healthstatus={
     'status': b"NOT OK"
 }
+initialized = False
+# Set once the web server import thread is done (or has failed)
+web_imported = asyncio.Event()
 
 async def healthcheck():
     if os.path.exists(socket_path):
@@ -89,8 +98,12 @@ def main():
             if str(web_dir) not in sys.path:
                 sys.path.insert(0, str(web_dir))
             
-            # Import the web server module
-            import simple_web_server
+            # Import the web server (Quart, the admin panel, ...) in a thread
+            # so the bot can log in meanwhile instead of waiting on it
+            try:
+                simple_web_server = await asyncio.to_thread(importlib.import_module, 'simple_web_server')
+            finally:
+                web_imported.set()
             web_app = getattr(simple_web_server, 'app', None)
             set_shared_database = getattr(simple_web_server, 'set_shared_database', None)
             
@@ -141,28 +154,37 @@ def main():
 
 @client.event
 async def on_ready():
+    global initialized
     logger.info(f'Logged in as {client.user.name}#{client.user.discriminator} ({client.user.id})')
     discord_event_logger.log_event('bot_ready', f'Bot logged in as {client.user.name}')
-    
-    # Initialize health monitoring
-    health_monitor = initialize_health_monitor(client, db)
-    health_monitor.start_monitoring()
-    logger.info('Health monitoring system initialized')
-    
-    await Drawbridge.initialize(client, db, cit, logger)
-    
-    # Initialize web IPC handler if available
-    try:
-        from modules.Drawbridge.web_ipc import WebIPCHandler
-        await client.add_cog(WebIPCHandler(client))
-        logger.info('Web IPC handler loaded successfully')
-    except ImportError as e:
-        logger.warning(f'Web IPC handler not available (missing dependencies): {e}')
-    except Exception as e:
-        logger.error(f'Failed to load Web IPC handler: {e}')
 
-    # Initialize admin panel with bot references
-    try:
+    # on_ready fires again after reconnects; cogs, views, monitors and the
+    # command sync must only be set up once per process.
+    if initialized:
+        logger.info('Reconnected, skipping initialization')
+        health_monitor = get_health_monitor()
+        if health_monitor:
+            health_monitor.update_heartbeat()
+        return
+    initialized = True
+
+    # Independent steps run concurrently; see modules/startup.py
+    graph = StartupGraph()
+
+    def start_health_monitor():
+        health_monitor = initialize_health_monitor(client, db)
+        health_monitor.start_monitoring()
+        logger.info('Health monitoring system initialized')
+
+    async def load_web_ipc():
+        try:
+            from modules.Drawbridge.web_ipc import WebIPCHandler
+            await client.add_cog(WebIPCHandler(client))
+            logger.info('Web IPC handler loaded successfully')
+        except ImportError as e:
+            logger.warning(f'Web IPC handler not available (missing dependencies): {e}')
+
+    def init_admin_panel():
         from web import admin_panel
         tournament_cog = client.get_cog('Tournament')
         sync_cog = client.get_cog('Sync')
@@ -174,40 +196,71 @@ async def on_ready():
             logger.warning(f'Sync cog not found. Available cogs: {available}')
         admin_panel.initialize(client, db, cit, tournament_cog, sync_cog)
         logger.info('Admin panel initialized with bot references')
-    except Exception as e:
-        logger.error(f'Failed to initialize admin panel: {e}')
 
-    botmisc = client.get_channel(int(os.getenv('ANNOUNCE_CHANNEL')))
-    public_url = os.getenv('PUBLIC_URL', '')
-    now = int(datetime.datetime.now().timestamp())
+    def register_views():
+        from web import admin_panel
+        admin_panel.register_persistent_views()
 
-    def read_commit_hash():
-        for src in ('.git_commit', '/app/.git_commit'):
-            try:
-                with open(src) as f:
-                    return f.read().strip() or None
-            except Exception:
-                continue
-        return None
-
-    commit_hash = read_commit_hash()
-    commit_display = commit_hash[:6] if commit_hash else 'unknown'
-    logger.info(f'Bot started (commit: {commit_display})')
-
-    parts = [f'# Bot has been started', f'- time: <t:{now}>']
-    if public_url:
-        parts.append(f'- admin panel: {public_url}/admin')
-    parts.append(f'- commit: `{commit_display}`')
-    await botmisc.send('\n'.join(parts))
-    
-    healthstatus['status'] = b"OK"
-    
-    # Update health metrics
-    health_monitor = get_health_monitor()
-    if health_monitor:
-        health_monitor.update_metric('bot_ready', True)
-        health_monitor.update_heartbeat()
-    
+    async def refresh_launchpad():
+        tournament_cog = client.get_cog('Tournament')
+        if tournament_cog is not None:
+            await tournament_cog.update_launchpad()
+
+    async def announce():
+        botmisc = client.get_channel(int(os.getenv('ANNOUNCE_CHANNEL')))
+        public_url = os.getenv('PUBLIC_URL', '')
+        now = int(datetime.datetime.now().timestamp())
+
+        def read_commit_hash():
+            for src in ('.git_commit', '/app/.git_commit'):
+                try:
+                    with open(src) as f:
+                        return f.read().strip() or None
+                except Exception:
+                    continue
+            return None
+
+        commit_hash = read_commit_hash()
+        commit_display = commit_hash[:6] if commit_hash else 'unknown'
+        logger.info(f'Bot started (commit: {commit_display})')
+
+        parts = [f'# Bot has been started', f'- time: <t:{now}>']
+        if public_url:
+            parts.append(f'- admin panel: {public_url}/admin')
+        parts.append(f'- commit: `{commit_display}`')
+        await botmisc.send('\n'.join(parts))
+
+    def mark_ready():
+        healthstatus['status'] = b"OK"
+        # Update health metrics
+        health_monitor = get_health_monitor()
+        if health_monitor:
+            health_monitor.update_metric('bot_ready', True)
+            health_monitor.update_heartbeat()
+        logger.info('Bot is ready to serve commands')
+
+    graph.step('health_monitor', start_health_monitor, optional=True)
+    graph.step('cogs', lambda: Drawbridge.load_cogs(client, db, cit, logger))
+    graph.step('command_sync', lambda: Drawbridge.sync_commands(client, db, logger), after=['cogs'])
+    graph.step('web_ipc', load_web_ipc, optional=True)
+    graph.step('admin_panel', init_admin_panel, after=['cogs'], optional=True)
+    graph.step('persistent_views', register_views, after=['admin_panel'], optional=True)
+    graph.step('launchpad', refresh_launchpad, after=['cogs'])
+    graph.step('announce', announce)
+    # Commands already registered with Discord work before the sync finishes,
+    # so readiness doesn't wait on it, the launchpad or the announcement. The
+    # optional steps only log their failures, as they did before.
+    graph.step('ready', mark_ready, after=['health_monitor', 'cogs', 'web_ipc', 'admin_panel', 'persistent_views'])
+    async def warm_up_scoreboard():
+        # This forks the render pool. Wait for the web server import thread so
+        # the fork doesn't race it. The default executor's threads are idle by
+        # then, but they still exist.
+        await web_imported.wait()
+        await client.get_cog('LogsTFEmbed').warm_up()
+
+    graph.step('scoreboard', warm_up_scoreboard, after=['ready'], optional=True)
+    await graph.run()
+    import_profiler.log_report()
     logger.info('Bot initialization completed successfully')
 
 
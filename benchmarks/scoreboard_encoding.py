@@ -0,0 +1,107 @@
+"""
+Benchmark scoreboard encoders: encode time against bytes uploaded.
+
+Draws each log in the fixture directory once, then times every encoder in
+modules.scoreboard.ENCODERS on it, plus the combined "auto" stage the bot
+uses (try all enabled encoders, keep the smallest).
+
+Usage (from the repository root):
+    python benchmarks/scoreboard_encoding.py [fixture_dir] [--repeat N]
+
+The bundled fixtures (synthetic_*.json) are synthetic: hand-made data in the
+logs.tf v3 shape, with placeholder names and mostly zeroed stats. They only
+exercise the benchmark and are no guide to real sizes, since a near-empty
+scoreboard compresses far better than a real one. Measure on real logs
+before drawing conclusions; any logs.tf API response saved as JSON in the
+fixture directory is picked up, e.g.
+    curl https://logs.tf/api/v1/log/<id> > benchmarks/fixtures/logstf/<id>.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.chdir(Path(__file__).resolve().parent.parent)
+
+from modules.scoreboard import ENCODERS, draw_scoreboard, encode_scoreboard, encoding_options_from_env, get_atlas  # noqa: E402
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / 'fixtures' / 'logstf'
+
+
+def time_call(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('fixtures', nargs='?', default=str(DEFAULT_FIXTURES))
+    parser.add_argument('--repeat', type=int, default=5, help='runs per encoder (median is reported)')
+    args = parser.parse_args()
+
+    files = sorted(Path(args.fixtures).glob('*.json'))
+    if not files:
+        print(f'No fixtures found in {args.fixtures}')
+        return 1
+
+    options = encoding_options_from_env()
+    get_atlas()
+
+    rows = []
+    totals = {}
+    for path in files:
+        with open(path) as f:
+            log_data = json.load(f)
+        img, draw_ms = time_call(lambda: draw_scoreboard(log_data), args.repeat)
+        rows.append((path.stem, 'draw', '', f'{draw_ms:.1f}'))
+
+        # Baseline is what the bot uploaded before the encoding stage
+        def baseline():
+            import io
+            buffer = io.BytesIO()
+            img.save(buffer, format='PNG')
+            return buffer.getvalue()
+
+        candidates = [('baseline png', baseline)]
+        candidates += [(name, lambda e=encoder: e(img, options)) for name, (encoder, _) in ENCODERS.items()]
+        candidates.append(('auto', lambda: encode_scoreboard(img, options)[0]))
+
+        for name, func in candidates:
+            try:
+                data, ms = time_call(func, args.repeat)
+            except Exception as e:
+                rows.append((path.stem, name, 'error', str(e)))
+                continue
+            rows.append((path.stem, name, str(len(data)), f'{ms:.1f}'))
+            size, spent = totals.get(name, (0, 0.0))
+            totals[name] = (size + len(data), spent + ms)
+
+    widths = [max(len(str(r[i])) for r in rows + [('fixture', 'encoder', 'bytes', 'ms')]) for i in range(4)]
+    line = '  '.join(f'{{:<{w}}}' for w in widths)
+    print(line.format('fixture', 'encoder', 'bytes', 'ms'))
+    for row in rows:
+        print(line.format(*row))
+
+    print()
+    print(f'Totals over {len(files)} fixtures (encoders: {", ".join(options["encodings"])})')
+    synthetic = sum(1 for path in files if path.name.startswith('synthetic_'))
+    if synthetic:
+        print(f'  ({synthetic} of them synthetic: sizes are not representative of real logs)')
+    baseline_size = totals.get('baseline png', (0, 0))[0] or 1
+    for name, (size, spent) in totals.items():
+        print(f'  {name:<13} {size:>9} bytes  {size / baseline_size:6.1%}  {spent:8.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
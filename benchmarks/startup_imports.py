@@ -0,0 +1,109 @@
+"""
+Benchmark the imports on the bot's path to ready.
+
+Each sample imports, in a fresh interpreter, the modules the bot needs before
+it can log in and load its cogs ("lazy", what app.py does now), and the same
+plus the modules that are now deferred ("eager", what startup used to
+import up front: the scoreboard renderer with Pillow, and the web server with
+Quart, the admin panel and its blueprints). The difference is the time taken
+off the bot's time-to-ready. A warm-up run is discarded so bytecode compilation
+isn't counted, and the median of the samples is reported.
+
+Usage (from the repository root):
+    python benchmarks/startup_imports.py [--repeat N] [--top N]
+
+``--top`` also lists the slowest modules of the eager set from
+``python -X importtime``. The same per-module report is available from a
+running bot with IMPORT_PROFILE=1 (see modules/import_profiler.py).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Imported before on_ready finishes loading the cogs
+CRITICAL = [
+    'discord',
+    'modules.citadel',
+    'modules.database',
+    'modules.Drawbridge',
+    'modules.health_monitor',
+    'modules.startup',
+    'modules.Drawbridge.commands.tournament',
+    'modules.Drawbridge.commands.sync',
+]
+# Imported off the event loop: the web server while the bot logs in, the
+# scoreboard renderer once it is ready
+DEFERRED = [
+    'modules.scoreboard',
+    'simple_web_server',
+]
+
+SNIPPET = '''
+import sys, time
+sys.path[:0] = [{root!r}, {web!r}]
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print(time.perf_counter() - started)
+'''
+
+
+def sample(modules, importtime=False):
+    code = SNIPPET.format(root=str(ROOT), web=str(ROOT / 'web'), modules=modules)
+    args = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    result = subprocess.run(args, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed')
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest(importtime_output, top):
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='samples per set (median is reported)')
+    parser.add_argument('--top', type=int, default=0, help='also list the N slowest modules of the eager set')
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    sets = {'lazy': CRITICAL, 'eager': CRITICAL + DEFERRED}
+    medians = {}
+    for name, modules in sets.items():
+        try:
+            sample(modules)  # warm-up
+            samples = [sample(modules)[0] * 1000 for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f'{name}: {e}')
+            return 1
+        medians[name] = statistics.median(samples)
+        print(f'{name:<6} {medians[name]:8.1f} ms median  '
+              f'(min {min(samples):.1f}, max {max(samples):.1f}, {args.repeat} runs)')
+    saved = medians['eager'] - medians['lazy']
+    print(f'Deferred imports take {saved:.1f} ms ({saved / medians["eager"]:.1%}) off the path to ready')
+
+    if args.top:
+        _, output = sample(sets['eager'], importtime=True)
+        print()
+        print('Slowest imports of the eager set (cumulative / self):')
+        for cumulative, self_time, module in slowest(output, args.top):
+            print(f'  {cumulative / 1000:8.1f} ms {self_time / 1000:8.1f} ms  {module}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,8 @@ from .functions import *
 from .logging import *
 from .logstf_embed import *
 # from .commands import *
+import hashlib
+import json
 import os
 import pkgutil
 
@@ -28,7 +30,42 @@ import discord
 from discord.ext import commands as discord_commands
 from discord.ext import tasks as discord_tasks
 
-async def initialize(client: discord_commands.Bot, db : Database, cit : Citadel, logger : Logger):
+def command_tree_hash(client: discord_commands.Bot, guild: discord.abc.Snowflake) -> str:
+    """Stable sha256 of the application command payloads registered for a guild."""
+    payloads = [cmd.to_dict(client.tree) for cmd in client.tree.get_commands(guild=guild)]
+    payloads.sort(key=lambda p: (p.get('type', 1), p['name']))
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def sync_commands(client: discord_commands.Bot, db: Database, logger: Logger, force: bool = False) -> bool:
+    """Sync the guild's command tree with Discord, unless it matches the last tree synced.
+
+    Command syncs have a tight rate limit, so the hash of the synced tree is
+    kept in ``command_sync`` and the sync is skipped while it is unchanged.
+    Set FORCE_COMMAND_SYNC=1 (or pass ``force``) to sync regardless, e.g.
+    after commands were edited by hand. Returns whether a sync happened.
+    """
+    guild = discord.Object(id=int(os.getenv('DISCORD_GUILD_ID')))
+    tree_hash = command_tree_hash(client, guild)
+    force = force or os.getenv('FORCE_COMMAND_SYNC', '0') == '1'
+    try:
+        stored = db.command_sync.get_hash(guild.id)
+    except Exception as e:
+        logger.warning(f'Could not read the last command sync hash, syncing: {e}')
+        stored = None
+    if stored == tree_hash and not force:
+        logger.info(f'Command tree unchanged ({tree_hash[:12]}), skipping sync')
+        return False
+    cmds = await client.tree.sync(guild=guild)
+    logger.info(f'Synced {len(cmds)} commands ({tree_hash[:12]}): {", ".join(c.name for c in cmds)}')
+    try:
+        db.command_sync.insert({'guild_id': guild.id, 'tree_hash': tree_hash})
+    except Exception as e:
+        logger.warning(f'Could not store the command sync hash: {e}')
+    return True
+
+
+async def load_cogs(client: discord_commands.Bot, db : Database, cit : Citadel, logger : Logger):
     commands_path = os.path.join(os.path.dirname(__file__), 'commands')
     await client.add_cog(Logging(client, db, cit)) # Manually add the logging module.
     await client.add_cog(LogsTFEmbed(client, db, cit)) # Manually add the logstf_embed module.
@@ -42,10 +79,11 @@ async def initialize(client: discord_commands.Bot, db : Database, cit : Citadel,
         if hasattr(module, 'initialize'):
             # l
             await module.initialize(client, db, cit, logger)
-    cmds = await client.tree.sync(guild=discord.Object(id=os.getenv('DISCORD_GUILD_ID')))
-    logger.info(f'COMMANDS: {cmds}')
-    for cmd in client.tree.walk_commands(guild=discord.Object(id=os.getenv('DISCORD_GUILD_ID'))):
-        logger.info(f'DEBUG: {cmd.name} - {type(cmd)}')
+
+
+async def initialize(client: discord_commands.Bot, db : Database, cit : Citadel, logger : Logger):
+    await load_cogs(client, db, cit, logger)
+    await sync_commands(client, db, logger)
 
 # class Drawbridge():
 #     def __init__(self, client: discord_commands.Bot, db : Database, cit : Citadel, logger : Logger):
@@ -0,0 +1,151 @@
+"""
+Guild-wide Citadel sync.
+
+``run_bulk_sync`` does for every member of the guild what the sync button
+does for one: it walks the members in id order, a batch at a time. The
+batch's Citadel accounts are looked up concurrently (and teams are fetched
+once however many captains share them), linked accounts are upserted into
+``synced_users`` in one statement, and the captain roles members are missing
+are worked out in memory and given through ``apply_role_deltas``. After each
+batch the journal's ``cursor`` step records the last member handled, so a
+resumed run carries on after it.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from modules.logging_config import get_logger
+from .citadel_lookups import CitadelLookups
+from .role_assignment import apply_role_deltas
+from .tournament_start import ProgressThrottle, PROGRESS_INTERVAL
+
+logger = get_logger('drawbridge.bulk_sync')
+
+BATCH_SIZE = int(os.getenv('BULK_SYNC_BATCH_SIZE', '50'))
+LOOKUP_CONCURRENCY = int(os.getenv('BULK_SYNC_CONCURRENCY', '8'))
+
+CURSOR = 'cursor'
+TOTALS = ('checked', 'linked', 'not_linked', 'lookup_failed', 'upserted', 'roles_assigned')
+
+
+def team_roles(guild: discord.Guild, db) -> Dict[int, List[discord.Role]]:
+    """Team roles that still exist, by Citadel team id (a team may play in several leagues)."""
+    roles: Dict[int, List[discord.Role]] = {}
+    for team in db.teams.get_all():
+        role = guild.get_role(team['role_id']) if team.get('role_id') else None
+        if role is not None and role not in roles.setdefault(team['team_id'], []):
+            roles[team['team_id']].append(role)
+    return roles
+
+
+async def plan_captain_deltas(linked, roles_by_team: Dict[int, List[discord.Role]],
+                              lookups: CitadelLookups) -> Dict[str, Any]:
+    """Captain roles each linked member is missing, in the shape ``apply_role_deltas`` takes.
+
+    ``linked`` is ``[(member, citadel user)]``. Only teams that have a role in
+    the guild are fetched.
+    """
+    plan: Dict[str, Any] = {'deltas': {}, 'fetch_failed': []}
+
+    async def check(member: discord.Member, user):
+        team_ids = [t['id'] for t in user.teams if t['id'] in roles_by_team]
+        teams = await asyncio.gather(*(lookups.team(team_id) for team_id in team_ids), return_exceptions=True)
+        have = {r.id for r in member.roles}
+        for team_id, team in zip(team_ids, teams):
+            if isinstance(team, Exception) or team is None:
+                plan['fetch_failed'].append(team_id)
+                continue
+            if not any(p['id'] == user.id and p.get('is_captain') for p in team.players):
+                continue
+            for role in roles_by_team[team_id]:
+                if role.id in have:
+                    continue
+                delta = plan['deltas'].setdefault(member.id, {'member': member, 'roles': [], 'labels': []})
+                delta['roles'].append(role)
+                delta['labels'].append(f'{user.name} → {role.name}')
+                have.add(role.id)
+
+    await asyncio.gather(*(check(member, user) for member, user in linked))
+    return plan
+
+
+def _upsert(db, rows: List[Dict[str, Any]], failed: List[tuple]) -> int:
+    try:
+        db.synced_users.upsert_many(rows)
+        return len(rows)
+    except Exception as e:
+        # One conflicting row fails the whole statement; find it row by row
+        logger.warning(f'Batch upsert of {len(rows)} synced users failed, retrying one at a time: {e}')
+    upserted = 0
+    for row in rows:
+        try:
+            db.synced_users.upsert_many([row])
+            upserted += 1
+        except Exception as e:
+            failed.append((f"<@{row['discord_id']}>", f'database: {e}'))
+    return upserted
+
+
+async def run_bulk_sync(guild: discord.Guild, db, cit,
+                        progress: Optional[Callable] = None,
+                        journal=None,
+                        batch_size: Optional[int] = None,
+                        concurrency: Optional[int] = None,
+                        progress_interval: Optional[float] = None) -> Dict[str, Any]:
+    """Sync every non-bot member of the guild with Citadel.
+
+    ``progress(done, total, last_member)`` may be sync or async and is
+    throttled. Returns the counts in ``TOTALS`` plus ``failed: [(member,
+    error)]``; counts include batches finished by earlier runs of a resumed
+    journal.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    members = sorted((m for m in guild.members if not m.bot), key=lambda m: m.id)
+    totals = {key: 0 for key in TOTALS}
+    failed: List[tuple] = []
+    cursor = journal.result(CURSOR) if journal is not None else None
+    if cursor:
+        members = [m for m in members if m.id > cursor['after']]
+        totals.update(cursor.get('totals', {}))
+        logger.info(f'Resuming bulk sync after member {cursor["after"]} ({len(members)} members left)')
+
+    roles_by_team = team_roles(guild, db)
+    lookups = CitadelLookups(cit, concurrency or LOOKUP_CONCURRENCY)
+    tracker = ProgressThrottle(progress, len(members), PROGRESS_INTERVAL if progress_interval is None else progress_interval)
+
+    for start in range(0, len(members), batch_size):
+        batch = members[start:start + batch_size]
+        users = await asyncio.gather(*(lookups.user_by_discord(m.id) for m in batch), return_exceptions=True)
+
+        rows: List[Dict[str, Any]] = []
+        linked = []
+        for member, user in zip(batch, users):
+            totals['checked'] += 1
+            if isinstance(user, Exception):
+                totals['lookup_failed'] += 1
+                failed.append((str(member), f'Citadel lookup: {user}'))
+            elif user is None:
+                totals['not_linked'] += 1
+            else:
+                totals['linked'] += 1
+                rows.append({'citadel_id': user.id, 'discord_id': member.id, 'steam_id': user.steam_64})
+                linked.append((member, user))
+        if rows:
+            totals['upserted'] += await asyncio.to_thread(_upsert, db, rows, failed)
+
+        plan = await plan_captain_deltas(linked, roles_by_team, lookups)
+        if plan['deltas']:
+            applied = await apply_role_deltas(plan, reason='Drawbridge bulk sync: Team captain role')
+            totals['roles_assigned'] += len(applied['assigned'])
+            failed += applied['failed']
+
+        if journal is not None:
+            journal.complete(CURSOR, {'after': batch[-1].id, 'totals': totals})
+        for member in batch:
+            await tracker.tick(str(member))
+
+    logger.info(f'Bulk sync finished: {totals}, Citadel lookups {lookups.stats()}')
+    return {**totals, 'failed': failed}
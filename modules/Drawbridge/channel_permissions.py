@@ -0,0 +1,170 @@
+"""
+Channel overwrite reconciliation for team and match channels.
+
+``plan_permission_fixes`` works out the overwrites every tracked channel
+should have and compares them with ``channel.overwrites``, returning only
+the channels that have drifted. ``apply_permission_fixes`` then writes each
+of those with a single ``channel.edit(overwrites=...)``. Overwrites for roles
+and members we don't manage are left as they are, the same as the old
+per-role ``set_permissions`` calls.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from modules.logging_config import get_logger
+from .checks import Checks
+from .discord_queue import discord_writes, BULK
+from .tournament_start import ProgressThrottle, PROGRESS_INTERVAL
+
+logger = get_logger('drawbridge.channel_permissions')
+checks = Checks()
+
+EDIT_CONCURRENCY = int(os.getenv('FIXPERMS_CONCURRENCY', '4'))
+
+
+def _allow() -> discord.PermissionOverwrite:
+    return discord.PermissionOverwrite(view_channel=True, send_messages=True)
+
+
+def _deny() -> discord.PermissionOverwrite:
+    return discord.PermissionOverwrite(view_channel=False)
+
+
+def _hidden() -> discord.PermissionOverwrite:
+    # What tournament start and match generation give @everyone
+    return discord.PermissionOverwrite(view_channel=False, send_messages=False)
+
+
+def _roles(guild: discord.Guild, role_ids) -> List[discord.Role]:
+    return [role for role in (guild.get_role(role_id) for role_id in role_ids) if role is not None]
+
+
+def team_overwrites(guild: discord.Guild, team: Dict[str, Any]) -> Dict[Any, discord.PermissionOverwrite]:
+    """Managed overwrites for a team channel."""
+    desired = {guild.default_role: _hidden()}
+    role = guild.get_role(team['role_id'])
+    if role is not None:
+        desired[role] = _allow()
+    for role in _roles(guild, checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', '!AC', 'DEVELOPER', 'BOT')):
+        desired[role] = _allow()
+    for role in _roles(guild, checks._get_role_ids('CASTER')):
+        desired[role] = _deny()
+    return desired
+
+
+def match_overwrites(guild: discord.Guild, match: Dict[str, Any],
+                     teams: Dict[tuple, Dict[str, Any]]) -> Dict[Any, discord.PermissionOverwrite]:
+    """Managed overwrites for a match channel. ``teams`` maps (team_id, league_id) to team rows."""
+    desired = {guild.default_role: _hidden()}
+    for team_id in (match['team_home'], match['team_away']):
+        team = teams.get((team_id, match['league_id']))
+        role = guild.get_role(team['role_id']) if team else None
+        if role is not None:
+            desired[role] = _allow()
+    for role in _roles(guild, checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', 'DEVELOPER', 'APPROVED', 'BOT')):
+        desired[role] = _allow()
+    for role in _roles(guild, checks._get_role_ids('UNAPPROVED')):
+        desired[role] = _deny()
+    return desired
+
+
+def _describe(overwrite: Optional[discord.PermissionOverwrite]) -> str:
+    if overwrite is None:
+        return 'none'
+    allow, deny = overwrite.pair()
+    parts = [f'+{name}' for name, value in allow if value] + [f'-{name}' for name, value in deny if value]
+    return ' '.join(parts) or 'neutral'
+
+
+def plan_permission_fixes(guild: discord.Guild, teams: List[Dict[str, Any]],
+                          matches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Diff every tracked team and match channel against the overwrites it should have.
+
+    Returns ``{'checked', 'missing', 'fixes': [{'channel', 'kind', 'overwrites',
+    'changes': [(target name, current, desired)]}]}``; ``overwrites`` is the
+    full map to write, ``changes`` is for reporting.
+    """
+    by_team = {(t['team_id'], t['league_id']): t for t in teams}
+    wanted = []
+    for team in teams:
+        if team.get('team_channel'):
+            wanted.append(('team', team['team_channel'], lambda team=team: team_overwrites(guild, team)))
+    for match in matches:
+        if match.get('channel_id'):
+            wanted.append(('match', match['channel_id'], lambda match=match: match_overwrites(guild, match, by_team)))
+
+    plan: Dict[str, Any] = {'checked': 0, 'missing': 0, 'fixes': []}
+    for kind, channel_id, desired_for in wanted:
+        channel = guild.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            plan['missing'] += 1
+            continue
+        plan['checked'] += 1
+        current = channel.overwrites
+        desired = desired_for()
+        changes = [
+            (getattr(target, 'name', str(target.id)), _describe(current.get(target)), _describe(overwrite))
+            for target, overwrite in desired.items()
+            if current.get(target) != overwrite
+        ]
+        if changes:
+            plan['fixes'].append({
+                'channel': channel,
+                'kind': kind,
+                'overwrites': {**current, **desired},
+                'changes': changes,
+            })
+    return plan
+
+
+def describe_fixes(plan: Dict[str, Any]) -> List[str]:
+    """One line per drifted channel and one per changed overwrite, for dry-run reports."""
+    lines = []
+    for fix in plan['fixes']:
+        lines.append(f"#{fix['channel'].name} ({fix['kind']})")
+        lines += [f'  {target}: {current} -> {desired}' for target, current, desired in fix['changes']]
+    return lines
+
+
+async def apply_permission_fixes(plan: Dict[str, Any], reason: str = 'Fixing channel permissions',
+                                 progress: Optional[Callable] = None,
+                                 concurrency: Optional[int] = None,
+                                 progress_interval: Optional[float] = None,
+                                 journal=None) -> Dict[str, Any]:
+    """Write the overwrites of every drifted channel, one edit per channel.
+
+    ``progress(done, total, last_channel_name)`` may be sync or async and is
+    throttled. Failures are collected rather than stopping the run. Returns
+    ``{'fixed', 'failed': [(channel name, error)]}``.
+    """
+    limit = asyncio.Semaphore(concurrency or EDIT_CONCURRENCY)
+    tracker = ProgressThrottle(progress, len(plan['fixes']),
+                               PROGRESS_INTERVAL if progress_interval is None else progress_interval)
+    fixed = 0
+    failed: List[tuple] = []
+    if journal is not None:
+        journal.plan(f"channel:{fix['channel'].id}" for fix in plan['fixes'])
+
+    async def fix_channel(fix):
+        nonlocal fixed
+        channel = fix['channel']
+        key = f'channel:{channel.id}'
+        try:
+            async with limit, discord_writes.slot('channel.edit', channel.id, BULK):
+                await channel.edit(overwrites=fix['overwrites'], reason=reason)
+            fixed += 1
+            if journal is not None:
+                journal.complete(key)
+        except Exception as e:
+            logger.error(f'Failed to fix permissions for {channel.name} ({channel.id}): {e}')
+            failed.append((channel.name, str(e)))
+            if journal is not None:
+                journal.fail(key, str(e))
+        await tracker.tick(channel.name)
+
+    await asyncio.gather(*(fix_channel(fix) for fix in plan['fixes']))
+    return {'fixed': fixed, 'failed': failed}
@@ -166,11 +166,16 @@ class Checks:
                 return True
         return discord_commands.check(predicate)
 
-    def has_been_warned(self, warned_for:str, warning_message:str):
+    def has_been_warned(self, warned_for:str, warning_message:str, unless:str=None):
         """
         Check if the user has been warned about the danger of a command.
+
+        ``unless`` names a boolean option (such as ``dry_run``) that makes the
+        command safe, so no warning is needed when it is set.
         """
         async def predicate(ctx: discord.Interaction):
+            if unless and getattr(ctx.namespace, unless, False):
+                return True
             warned = self.warned_users.get(ctx.user, warned_for)
             if warned is None or warned.time < time.time() - 60 * 5:
                 if warning_message:
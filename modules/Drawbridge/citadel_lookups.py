@@ -0,0 +1,65 @@
+"""
+Coalesced Citadel lookups.
+
+The Citadel client is blocking (``requests``), so lookups run in threads, a
+few at a time. ``CitadelLookups`` also remembers every lookup it has started:
+callers asking for the same user or team while a request is in flight wait
+on that request instead of sending their own, and later callers get the
+answer straight away until it is older than ``ttl`` seconds. Failed lookups
+are remembered like any other answer, so one bad team doesn't cost a request
+per captain.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.citadel_lookups')
+
+
+class CitadelLookups:
+    """Per-key coalescing cache in front of a ``Citadel`` client.
+
+    With ``ttl=None`` answers are kept for the lifetime of the object, which
+    suits one-off jobs such as the bulk sync.
+    """
+
+    def __init__(self, cit, concurrency: int = 8, ttl: Optional[float] = None):
+        self.cit = cit
+        self.ttl = ttl
+        self._limit = asyncio.Semaphore(concurrency)
+        self._entries: Dict[Hashable, Tuple[float, asyncio.Future]] = {}
+        self.requests = 0
+        self.hits = 0
+
+    async def _call(self, func: Callable, *args):
+        async with self._limit:
+            self.requests += 1
+            return await asyncio.to_thread(func, *args)
+
+    def _lookup(self, key: Hashable, func: Callable, *args) -> asyncio.Future:
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+            self.hits += 1
+            return entry[1]
+        task = asyncio.ensure_future(self._call(func, *args))
+        # Retrieve the exception so an unawaited failure isn't logged as lost
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._entries[key] = (time.monotonic(), task)
+        return task
+
+    async def user_by_discord(self, discord_id: int):
+        """The Citadel user linked to a Discord account, or None if there isn't one."""
+        # Shielded: one caller being cancelled mustn't cancel the shared request
+        return await asyncio.shield(self._lookup(('discord', discord_id), self.cit.getUserByDiscordID, discord_id))
+
+    async def team(self, team_id: int):
+        return await asyncio.shield(self._lookup(('team', team_id), self.cit.getTeam, team_id))
+
+    def forget(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'requests': self.requests, 'hits': self.hits, 'cached': len(self._entries)}
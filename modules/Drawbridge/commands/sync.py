@@ -1,9 +1,16 @@
 from ..checks import *
 from ..functions import *
 from ..logging import *
+from ..discord_queue import discord_writes
+from ..join_sync import JoinSyncQueue
+from ..log_coalescer import CoalescedLog
+from ..citadel_lookups import CitadelLookups
+import asyncio
 import logging
 import discord
 import os
+import requests
+import time
 from typing import Optional
 from modules import database
 from modules import citadel
@@ -19,6 +26,11 @@ __version__ = "1.0.0"
 checks = Checks()
 logger = get_logger('drawbridge.sync', 'sync.log')
 
+# How long a "no linked account" answer is reused for the sync button
+UNLINKED_CACHE_TTL = float(os.getenv('SYNC_UNLINKED_CACHE_TTL', '300'))
+# How long a team fetched for a captain check is reused
+TEAM_CACHE_TTL = float(os.getenv('SYNC_TEAM_CACHE_TTL', '300'))
+
 
 class SyncButtonView(discord.ui.View):
     """Persistent view for sync buttons"""
@@ -44,7 +56,7 @@ class SyncButtonView(discord.ui.View):
         """Handle sync button clicks"""
         logger.info(f"Sync button clicked by {interaction.user} (ID: {interaction.user.id})")
         await interaction.response.defer(ephemeral=True, thinking=True)
-        await self.cog._sync_user(interaction.user, interaction)
+        await self.cog._sync_user(interaction.user, interaction, use_unlinked_cache=True)
         
 
 
@@ -62,52 +74,104 @@ class Sync(discord_commands.Cog):
         # Add persistent view for sync buttons
         self.bot.add_view(SyncButtonView(self))
 
+        # Members are synced on join by a few workers rather than one task per join
+        self.join_queue = JoinSyncQueue(
+            self._sync_user,
+            retryable=lambda e: isinstance(e, (requests.RequestException, citadel.Citadel.APIException)),
+        )
+
+        # Team rosters for captain checks, shared by concurrent syncs
+        self.lookups = CitadelLookups(cit, ttl=TEAM_CACHE_TTL)
+
+        # Discord id -> when Citadel last said the account isn't linked
+        self._unlinked: dict[int, float] = {}
+        self.unlinked_log = CoalescedLog(self._channel_log, 'Sync attempts without a linked ozfortress account')
+
+    async def cog_load(self):
+        self.join_queue.start()
+
+    async def cog_unload(self):
+        await self.join_queue.stop()
+        await self.unlinked_log.close()
+
+    def _remember_unlinked(self, discord_id: int):
+        now = time.monotonic()
+        if len(self._unlinked) >= 1000:
+            self._unlinked = {k: t for k, t in self._unlinked.items() if now - t < UNLINKED_CACHE_TTL}
+        self._unlinked[discord_id] = now
+
+    def _known_unlinked(self, discord_id: int) -> bool:
+        checked = self._unlinked.get(discord_id)
+        if checked is None:
+            return False
+        if time.monotonic() - checked >= UNLINKED_CACHE_TTL:
+            del self._unlinked[discord_id]
+            return False
+        return True
+
     async def _channel_log(self, message: str):
         await self.log_channel.send(message)
         
     @discord_commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        try:
-            self._sync_user(member)
-        except Exception as e:
-            logger.error(f"Error syncing user on join: {e}", exc_info=True)
+        if member.bot:
+            return
+        self.join_queue.submit(member)
+
+    def _save_synced_user(self, user: citadel.Citadel.User) -> bool:
+        """Insert or update the synced user record; True if it was created."""
+        if self.db.synced_users.has_synced_discord(user.discord_id):
+            self.db.synced_users.update(user.discord_id, {
+                'citadel_id': user.id,
+                'steam_id': user.steam_64
+            })
+            return False
+        self.db.synced_users.insert({
+            'citadel_id': user.id,
+            'discord_id': user.discord_id,
+            'steam_id': user.steam_64
+        })
+        return True
             
 
-    async def _sync_user(self, target: discord.User, interaction: Optional[discord.Interaction] = None):
+    async def _sync_user(self, target: discord.User, interaction: Optional[discord.Interaction] = None,
+                         use_unlinked_cache: bool = False):
+        """Sync one user. With ``use_unlinked_cache`` (the sync button), a recent
+        "not linked" answer from Citadel is reused instead of asking again."""
         src = interaction.user if interaction else None
         about_self = (src.id == target.id) if src else False
         forced_log = f" (Forced by <@{src.id}>)" if not about_self else ""
         automated = " (Automated on join)" if src is None else ""
-        user: Optional[citadel.Citadel.User] = self.cit.getUserByDiscordID(target.id)
+        cached = use_unlinked_cache and self._known_unlinked(target.id)
+        user: Optional[citadel.Citadel.User] = None
+        if not cached:
+            user = await asyncio.to_thread(self.cit.getUserByDiscordID, target.id)
+            if user is None:
+                self._remember_unlinked(target.id)
+            else:
+                self._unlinked.pop(target.id, None)
         name = target.name + "'s" if not about_self else "Your"
         
         if user is None:
             extra_intruction = " Be sure to link it with this Discord account at [ozfortress.com](https://ozfortress.com) in `Settings → Connections`." if about_self else ""
+            if cached:
+                extra_intruction += " If you have just linked it, use `/sync` or try again in a few minutes."
             if interaction:
                 await interaction.followup.send(content=f"{name} Discord account is not linked to the ozfortress website.{extra_intruction}", ephemeral=True)
-            await self._channel_log(f"<@{target.id}> tried to link their Discord but did not have a linked ozfortress account.{forced_log}{automated}")
+            self.unlinked_log.add(
+                target.id,
+                f"<@{target.id}> tried to link their Discord but did not have a linked ozfortress account.{forced_log}{automated}",
+                f"<@{target.id}>{forced_log}{automated}",
+            )
         else:
             citadel_acc_link = f"[{user.name}](https://ozfortress.com/users/{user.id})"
             
             # Update or insert synced user record
-            if self.db.synced_users.has_synced_discord(user.discord_id):
-                # Update existing synced user
-                user_data = {
-                    'citadel_id': user.id,
-                    'steam_id': user.steam_64
-                }
-                self.db.synced_users.update(user.discord_id, user_data)
+            if not await asyncio.to_thread(self._save_synced_user, user):
                 logger.info(f"Updated synced user record for {user.name} (Discord ID: {user.discord_id})")
                 status_message = f"{name} ozfortress account has been updated to {citadel_acc_link}"
                 log_message = f"<@{target.id}> updated their ozfortress account to {citadel_acc_link}.{forced_log}{automated}"
             else:
-                # Insert new synced user
-                user_data = {
-                    'citadel_id': user.id,
-                    'discord_id': user.discord_id,
-                    'steam_id': user.steam_64
-                }
-                self.db.synced_users.insert(user_data)
                 logger.info(f"Created new synced user record for {user.name} (Discord ID: {user.discord_id})")
                 status_message = f"{name} Discord account has been linked to {citadel_acc_link}"
                 log_message = f"<@{target.id}> linked their ozfortress account to {citadel_acc_link}.{forced_log}{automated}"
@@ -126,9 +190,12 @@ class Sync(discord_commands.Cog):
         """
         Assign team captain roles to a user based on their team captaincy.
         Returns a list of role names that were assigned.
+
+        The user's teams are looked up in one query, only teams with a role
+        are fetched from Citadel (concurrently, and cached for a few minutes),
+        and every missing role is added in a single edit.
         """
         assigned_roles = []
-        # logger.debug(citadel_user)
         try:
             guild = self.bot.get_guild(int(os.getenv('DISCORD_GUILD_ID')))
             member = guild.get_member(discord_user.id) if guild else None
@@ -137,34 +204,33 @@ class Sync(discord_commands.Cog):
                 logger.warning(f"User {citadel_user.name} (Discord ID: {discord_user.id}) is not in the server")
                 return assigned_roles
             
-            # Get the user's teams from Citadel (this includes captaincy info)
-            user_teams = citadel_user.teams
-            
-            for team_data in user_teams:
-                team_id = team_data['id']  # Extract team ID from dictionary
-                full_team_data = self.cit.getTeam(team_id)
-                users = full_team_data.players if full_team_data else []
-                
-                # Check if user is captain of this team
-                is_captain = False
-                for u in users:
-                    if u['id'] == citadel_user.id and u.get('is_captain', False):
-                        is_captain = True
-                        break
-                
-                if is_captain:
-                    logger.info(f"User {citadel_user.name} is captain of team ID: {team_id}")   
-                    team_db = self.db.teams.get_by_team_id(team_id)
-                    if team_db:
-                        role_id = team_db.get('role_id')
-                        if role_id:
-                            role = guild.get_role(role_id)
-                            if role and role not in member.roles:
-                                await member.add_roles(role, reason="Drawbridge sync: Team captain role")
-                                assigned_roles.append(f"Team: {role.name}")
-                                logger.info(f"Assigned team role {role.name} to {citadel_user.name}")
-                
-                
+            # Roles of the user's teams that exist here, by team (one row per league)
+            team_ids = list({team['id'] for team in citadel_user.teams})
+            roles_by_team: dict[int, list[discord.Role]] = {}
+            for team_db in await asyncio.to_thread(self.db.teams.get_by_team_ids, team_ids):
+                role = guild.get_role(team_db['role_id']) if team_db.get('role_id') else None
+                if role:
+                    roles_by_team.setdefault(team_db['team_id'], []).append(role)
+            if not roles_by_team:
+                return assigned_roles
+
+            teams = await asyncio.gather(*(self.lookups.team(team_id) for team_id in roles_by_team), return_exceptions=True)
+            missing = []
+            for team_id, team in zip(roles_by_team, teams):
+                if isinstance(team, Exception) or team is None:
+                    logger.error(f"Failed to fetch team {team_id} for {citadel_user.name}: {team}")
+                    self.lookups.forget(('team', team_id))
+                    continue
+                if not any(p['id'] == citadel_user.id and p.get('is_captain', False) for p in team.players):
+                    continue
+                logger.info(f"User {citadel_user.name} is captain of team ID: {team_id}")
+                missing += [role for role in roles_by_team[team_id] if role not in member.roles and role not in missing]
+
+            if missing:
+                await discord_writes.run(lambda: member.add_roles(*missing, reason="Drawbridge sync: Team captain role"),
+                                         'member.roles', guild.id)
+                assigned_roles = [f"Team: {role.name}" for role in missing]
+                logger.info(f"Assigned team roles {', '.join(role.name for role in missing)} to {citadel_user.name}")
                 
         except Exception as e:
             logger.error(f"Error in role assignment for {citadel_user.name}: {e}")
@@ -2,6 +2,7 @@ from ..checks import *
 from ..functions import *
 from ..logging import *
 import discord
+import io
 import os
 import re
 import json
@@ -13,11 +14,21 @@ from modules.logging_config import get_logger, log_command_execution
 from typing import Optional
 from discord import app_commands
 from discord.ext import commands as discord_commands
-from discord.ext import tasks as discord_tasks
 import asyncio
 import functools
+import hashlib
 from web.template_helper import get_template, set_db as template_set_db
-from web.match_schedule_discord import RescheduleView, compute_deadline_utc, next_occurrence, log_schedule_event, post_schedule_message
+from ..launchpad import LaunchpadRefresher, load_launchpad_data, build_launchpad, render_launchpad
+from ..tournament_start import plan_tournament_start, execute_start_plan, seed_league
+from ..tournament_end import plan_tournament_end, execute_end_plan
+from ..matchgen import select_round_matches, fetch_matches, prepare_matchgen, generate_matches, resolve_role_overrides
+from ..deadlines import DeadlineScheduler
+from ..role_assignment import plan_captain_roles, apply_role_deltas
+from ..demo_check import DemoCheckSampler, DemoCheckError, announce_demo_check
+from ..discord_queue import discord_writes, BULK
+from ..channel_permissions import plan_permission_fixes, apply_permission_fixes, describe_fixes
+from ..operations import OperationJournal, OperationConflict, mark_interrupted, dismiss_league
+from web.match_schedule_discord import RescheduleView, next_occurrence, log_schedule_event
 
 __title__ = 'Tournament Commands'
 __description__ = 'Commands for managing tournaments.'
@@ -130,6 +141,9 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         self.logging = Logging(self.bot, self.db, self.cit)
         self.perms_last_fixed = 0.0
         self.guild = self.bot.get_guild(int(os.getenv('DISCORD_GUILD_ID','')))
+        self.launchpad_refresher = LaunchpadRefresher(self._rebuild_launchpad)
+        self.demo_checks = DemoCheckSampler(self.db, self.cit)
+        self.deadlines = DeadlineScheduler(self.check_schedule_deadlines)
         
     @app_commands.command(
         name='launchpad'
@@ -146,115 +160,142 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
     async def launchpad(self, interaction : discord.Interaction, share : bool=False):
         """Generate a launchpad message for all active tournaments"""
         await interaction.response.send_message('Generating launchpad...', ephemeral=not share)
-        await self.update_launchpad()
+        await self.update_launchpad(wait=True)
         await interaction.edit_original_response(content='Launchpad generated and sent to the launchpad channel.')
 
-    def better_lambda(self, div):
-        priority_order = ['Premier', 'High', 'Intermediate', 'Main', 'Open']
-
+    async def _render_launchpad(self) -> list[str]:
+        """Build the launchpad text, split into chunks that fit in a message."""
         try:
-            return priority_order.index(div['division_name'])
-        except ValueError:
-            # If not in priority list, sort alphanumerically by division_name
-            return len(priority_order) + hash(str(div['division_name']))
-        except Exception:
-            return div.get('division_id', 9999)
-
-    async def update_launchpad(self):
-        # purge all messages in the launchpad channel
-        # get the launchpad channel
+            data = await load_launchpad_data(self.db, self.cit)
+        except Exception as e:
+            self.logger.error(f'Failed to load launchpad data: {e}')
+            raise
+        return render_launchpad(build_launchpad(**data))
+
+    async def _publish_launchpad(self, channel: discord.TextChannel, chunks: list[str], retry: bool = True):
+        """Bring the launchpad channel in line with chunks, touching as little as possible.
+
+        The message id and content hash of every chunk is kept in the DB, so a
+        rebuild only edits chunks whose content changed and sends or deletes
+        the difference in count. If nothing changed Discord isn't touched.
+        """
+        hashes = [hashlib.sha256(c.encode('utf-8')).hexdigest() for c in chunks]
+        stored = self.db.launchpad_messages.get_by_channel(channel.id)
+        if [row['content_hash'] for row in stored] == hashes:
+            self.logger.debug('Launchpad unchanged, skipping update')
+            return
+
         def is_me(m):
             return m.author == self.bot.user
+
+        if not stored:
+            # Nothing tracked yet (first run, or messages from before tracking):
+            # clear out whatever the bot left in the channel and start fresh.
+            await channel.purge(limit=100, check=is_me)
+
+        try:
+            for position, (chunk, digest) in enumerate(zip(chunks, hashes)):
+                if position < len(stored):
+                    row = stored[position]
+                    if row['content_hash'] == digest:
+                        continue
+                    async with discord_writes.slot('message.edit', channel.id, BULK):
+                        await channel.get_partial_message(row['message_id']).edit(content=chunk)
+                    message_id = row['message_id']
+                else:
+                    async with discord_writes.slot('message.send', channel.id, BULK):
+                        message_id = (await channel.send(content=chunk)).id
+                self.db.launchpad_messages.insert({
+                    'channel_id': channel.id,
+                    'position': position,
+                    'message_id': message_id,
+                    'content_hash': digest,
+                })
+        except discord.NotFound:
+            # Someone deleted a launchpad message; editing around the gap would
+            # leave the chunks out of order, so rebuild the channel once.
+            self.db.launchpad_messages.delete_by_channel(channel.id)
+            if not retry:
+                raise
+            self.logger.warning('Launchpad message missing, re-sending the launchpad')
+            await self._publish_launchpad(channel, chunks, retry=False)
+            return
+
+        for row in stored[len(chunks):]:
+            try:
+                async with discord_writes.slot('message.delete', channel.id, BULK):
+                    await channel.get_partial_message(row['message_id']).delete()
+            except discord.NotFound:
+                pass
+        if len(stored) > len(chunks):
+            self.db.launchpad_messages.delete_from_position(channel.id, len(chunks))
+
+    async def _rebuild_launchpad(self):
         if self.guild is None:
             return
         channel = self.guild.get_channel(int(os.getenv('LAUNCH_PAD_CHANNEL','')))
         if type(channel) != discord.TextChannel:
             return
-        async with channel.typing():
-            await channel.purge(limit=100, check=is_me)
-            teams = self.db.teams.get_all()
-            matches = self.db.matches.get_unarchived()
-            try:
-                all_scheds = self.db.match_schedules.get_all()
-                confirmed_sched = {s['match_id']: s for s in all_scheds if s.get('status') == 'confirmed'}
-                overdue = self.db.match_schedules.get_overdue(datetime.datetime.utcnow())
-            except Exception as e:
-                self.logger.error(f'Failed to load match schedules for launchpad: {e}')
-                confirmed_sched = {}
-                overdue = []
-            leagueids = []
-            leagues=[]
-            divids=[]
-            divs=[]
-            for team in teams:
-                if team['league_id'] not in leagueids:
-                    leagueids.append(team['league_id'])
-                    leagues.append(self.cit.getLeague(team['league_id']))
-                if team['division'] not in divids:
-                    divids.append(team['division'])
-                    divs.append(self.db.divisions.get_by_id(team['division']))
-            if len(leagueids) == 0:
-                await channel.send(content='There are no active tournaments running.')
-                return
+        chunks = await self._render_launchpad()
+        await self._publish_launchpad(channel, chunks)
+
+    async def update_launchpad(self, wait: bool = False):
+        """Mark the launchpad as needing a rebuild.
+
+        Rebuilds are coalesced and rate limited by the refresher, so this
+        returns straight away unless wait is set, in which case it returns
+        once the launchpad reflects everything up to this call.
+        """
+        if wait:
+            await self.launchpad_refresher.refresh()
+        else:
+            self.launchpad_refresher.mark_dirty()
+
+    def cog_unload(self):
+        self.launchpad_refresher.close()
+        self.deadlines.close()
+        if self.db.match_schedules.deadline_listener == self.deadlines.set:
+            self.db.match_schedules.deadline_listener = None
 
-            rawlaunchpadmessage = ''
-            # sort divs like this - Premier, High, Intermediate, Main, Open
-            #priority_order = ['Premier', 'High', 'Intermediate', 'Main', 'Open']
-
-            divs = sorted(divs, key=self.better_lambda)
-            for leagues in leagues:
-                rawlaunchpadmessage += f'# {leagues.name}\n'
-                for div in divs:
-                    if div['league_id'] == leagues.id: ## Does the league_id field match the league we're looking at?
-                        rawlaunchpadmessage += f'## {div["division_name"]}\n'
-                        rawlaunchpadmessage += f'### Teams\n'
-                        for team in teams:
-                            if (team['league_id'] == leagues.id) and (team['division'] == div['id']):
-                                rawlaunchpadmessage += f'- {team["team_name"]} -> <#{team["team_channel"]}>\n'
-                        rawlaunchpadmessage += f'### Matches\n'
-                        for match in matches:
-                            # self.logger.debug(f'Match league id {match["league_id"]} == {leagues.id} and match div id {match["division"]} == {div["id"]}')
-                            if (int(match['league_id']) == int(leagues.id)) and (int(match['division']) == int(div['id'])):
-                                # c = c+1
-                                if match['channel_id'] == 0:
-                                    rawlaunchpadmessage += f'- [{match["match_id"]}](<https://ozfortress.com/matches/{match["match_id"]}>) -> Bye\n'
-                                else:
-                                    line = f'- [{match["match_id"]}](<https://ozfortress.com/matches/{match["match_id"]}>) -> <#{match["channel_id"]}>'
-                                    sched = confirmed_sched.get(match['match_id'])
-                                    if sched and sched.get('scheduled_at'):
-                                        unix = int(sched['scheduled_at'].replace(tzinfo=datetime.timezone.utc).timestamp())
-                                        line += f' — 🗓️ <t:{unix}:F>'
-                                    rawlaunchpadmessage += line + '\n'
-                        if len(matches) == 0:
-                            rawlaunchpadmessage += f'- No matches found\n'
-                        rawlaunchpadmessage += '\n'
-            if overdue:
-                rawlaunchpadmessage += '\n# ⚠️ Unscheduled / Past Deadline\n'
-                rawlaunchpadmessage += 'These matches have no agreed time and are past their scheduling deadline. Admins, please intervene.\n'
-                for o in overdue:
-                    cid = o.get('channel_id')
-                    loc = f'<#{cid}>' if cid else 'No channel'
-                    rawlaunchpadmessage += f'- [{o["match_id"]}](<https://ozfortress.com/matches/{o["match_id"]}>) -> {loc}\n'
-            launchpadmessages = []
-            # split on the first \n under 2000 chars
-            while len(rawlaunchpadmessage) > 2000:
-                index = rawlaunchpadmessage[:2000].rfind('\n')
-                launchpadmessages.append(rawlaunchpadmessage[:index])
-                rawlaunchpadmessage = rawlaunchpadmessage[index:]
-            launchpadmessages.append(rawlaunchpadmessage)
-            for message in launchpadmessages:
-                await channel.send(content=message)
-
-    @discord_tasks.loop(hours=1)
-    async def check_schedule_deadlines(self):
-        """Post a one-time warning in any match channel whose scheduling deadline
-        has passed without an agreed time, then refresh the launchpad."""
+    def start_deadline_timer(self):
+        """Load pending deadlines and start firing them; missed ones fire straight away."""
+        self.db.match_schedules.deadline_listener = self.deadlines.set
         try:
-            overdue = self.db.match_schedules.get_overdue(datetime.datetime.utcnow())
+            self.deadlines.load(self.db.match_schedules.get_pending_deadlines())
+        except Exception as e:
+            self.logger.error(f'Failed to load scheduling deadlines: {e}')
+        self.deadlines.start()
+
+    async def _open_journal(self, interaction: discord.Interaction, kind: str,
+                            league_id: Optional[int], params: dict) -> Optional[OperationJournal]:
+        """Open (or resume) the journal for a bulk operation, telling the user which.
+
+        Returns None, after saying why, if the same operation is already running
+        or an unfinished one was started with different params.
+        """
+        try:
+            journal = OperationJournal.open(self.db, kind, league_id, params=params, started_by=str(interaction.user))
+        except OperationConflict as e:
+            await interaction.edit_original_response(content=str(e))
+            return None
+        if journal.resumed:
+            await interaction.edit_original_response(
+                content=f'Resuming {kind} operation #{journal.id} ({journal.done_count()} steps already done)...')
+        return journal
+
+    async def check_schedule_deadlines(self, match_ids: list[int]) -> list[int]:
+        """Post a one-time warning in the match channels whose scheduling deadline
+        has just passed without an agreed time, then refresh the launchpad.
+
+        Returns the matches that could not be handled, for the deadline
+        scheduler to retry."""
+        try:
+            overdue = self.db.match_schedules.get_overdue(datetime.datetime.utcnow(), match_ids)
         except Exception as e:
             self.logger.error(f'Deadline check failed to query schedules: {e}')
-            return
+            return match_ids
         changed = False
+        failed = []
         for o in overdue:
             if o.get('deadline_flagged'):
                 continue
@@ -273,72 +314,35 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
                                     'step in to set a time per the default match day/time.',
                         color=discord.Color.red(),
                     )
-                    await channel.send(content=mentions or None, embed=embed,
-                                       allowed_mentions=discord.AllowedMentions(roles=True))
+                    async with discord_writes.slot('message.send', channel.id, BULK):
+                        await channel.send(content=mentions or None, embed=embed,
+                                           allowed_mentions=discord.AllowedMentions(roles=True))
                 except Exception as e:
+                    # Left unflagged so the warning is tried again
                     self.logger.error(f'Failed to post deadline warning for match {o["match_id"]}: {e}')
+                    failed.append(o['match_id'])
+                    continue
             try:
                 self.db.match_schedules.set_flagged(o['match_id'])
                 changed = True
             except Exception as e:
                 self.logger.error(f'Failed to flag match {o["match_id"]}: {e}')
+                failed.append(o['match_id'])
         if changed:
             await self.update_launchpad()
-
-    @check_schedule_deadlines.before_loop
-    async def before_check_schedule_deadlines(self):
-        await self.bot.wait_until_ready()
+        return failed
 
     async def _assign_roles(self, league_id: int):
-        # This needs a fair few requests to Citadel, unfortunately
-        # AFAIK there’s no way to get whether a user is a captain from
-        # the roster (which we already query)
-        # So for each team we then have to query team
-        not_in_server: list[str] = []
-        not_linked: list[str] = []
-        for div in self.db.divisions.get_by_league(league_id):
-            div_role_id = div['role_id']
-            div_role = self.guild.get_role(div_role_id)
-            for team in self.db.teams.get_by_league(league_id):
-                team_id = team['team_id']
-                team_role_id = team['role_id']
-                team_role = self.guild.get_role(team_role_id)
-                team = self.cit.getTeam(team_id)
-                for user in team.players:
-                    if user['is_captain']:
-                        # Check what their discord id is
-                        if user['discord_id']:
-                            discord_user = self.bot.get_user(user['discord_id'])
-                            member: Optional[discord.Member] = self.guild.get_member(user['discord_id'])
-                            if member is not None:
-                                if div_role is not None:
-                                    await member.add_roles(div_role, reason="Drawbridge role assignment")
-                                if team_role is not None:
-                                    await member.add_roles(team_role, reason="Drawbridge role assignment")
-                            else:
-                                if not user['name'] in not_in_server:
-                                    not_in_server.append(user['name'])
-                        else:
-                            if not user['name'] in not_linked:
-                                not_linked.append(user['name'])
-                    else:
-                        continue
-                        # if self.db.synced_users.has_synced_citadel(user['id']):
-                        #     synced_user = self.db.synced_users.get_by_citadel_id(user['id'])
-                        #     if synced_user:
-                        #         discord_id = synced_user['discord_id']
-                        #     discord_user = self.bot.get_user(discord_id)
-                        #     member: Optional[discord.Member] = self.guild.get_member(discord_id)
-                        #     if member is not None:
-                        #         await member.add_roles(div_role, reason="Drawbridge role assignment")
-                        #         await member.add_roles(team_role, reason="Drawbridge role assignment")
-                        #     elif not user['name'] in not_in_server:
-                        #         not_in_server.append(user['name'])
-                        # elif not user['name'] in not_linked:
-                        #     not_linked.append(user['name'])
-            not_linked_str = f"## Account Not Linked\n{', '.join(not_linked)}\n" if len(not_linked) > 0 else ""
-        not_in_server_str = f"## Not In Server\n{', '.join(not_in_server)}\n" if len(not_in_server) > 0 else ""
-        return f"# Role Assignment Errors\n{not_linked_str}\n{not_in_server_str}"
+        # Citadel only says who captains a team on the team itself, so every
+        # team is fetched once (concurrently) and captains get their team and
+        # division roles in one edit each.
+        plan = await plan_captain_roles(self.guild, self.db, self.cit, league_id)
+        result = await apply_role_deltas(plan)
+        not_linked_str = f"## Account Not Linked\n{', '.join(plan['not_linked'])}\n" if len(plan['not_linked']) > 0 else ""
+        not_in_server_str = f"## Not In Server\n{', '.join(plan['not_in_server'])}\n" if len(plan['not_in_server']) > 0 else ""
+        fetch_failed_str = f"## Team Lookup Failed\n{', '.join(plan['fetch_failed'])}\n" if len(plan['fetch_failed']) > 0 else ""
+        edit_failed_str = f"## Role Edit Failed\n{', '.join(name for name, _ in result['failed'])}\n" if len(result['failed']) > 0 else ""
+        return f"# Role Assignment Errors\n{not_linked_str}\n{not_in_server_str}{fetch_failed_str}{edit_failed_str}"
 
 
     @app_commands.command(
@@ -363,123 +367,50 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         """
 
         await interaction.response.send_message('Generating teams...', ephemeral=not share)
-        league = self.cit.getLeague(league_id)
-        rosters = league.rosters
-        divs = []
-
-        # Seed league info into the database
+        journal = await self._open_journal(interaction, 'start', league_id,
+                                           {'league_shortcode': league_shortcode, 'role_overrides': role_overrides})
+        if journal is None:
+            return
         try:
-            existing = self.db.leagues.get_by_id(league_id)
-            if existing:
-                self.db.leagues.update(league_id, {'league_name': league.name, 'league_shortcode': league_shortcode})
-            else:
-                self.db.leagues.insert({
-                    'league_id': league_id,
-                    'league_name': league.name,
-                    'league_shortcode': league_shortcode,
-                })
-        except Exception as e:
-            self.logger.warning(f"Failed to seed league {league_id}: {e}")
-
-        template_set_db(self.db)
-        rawteammessage = get_template('teams.json')
-
-        for roster in rosters:
-            if roster['division'] not in divs:
-                divs.append(roster['division'])
-            # trim team name to 20 char
-            roster['role_name'] = f'{roster['name'][:20]} ({league_shortcode})'
-            # role = await ctx.guild.create_role(name=role_name)
-            # db.insert_team(roster)
-
-        await interaction.edit_original_response(content=f'Generating Division Categories, Team Channels, and Roles.\nLeague: {league.name}\nDivisions: {len(divs)}\nTeams: {len(rosters)}\n\nIf we seem frozen, wait 5 minutes we might be rate limited.')
-        r=0 #counters
-        d=0 #counters
-        for div in divs:
-            d+=1
-            overrides = {
-                interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False)
-            }
-
-            all_access = checks._get_role_ids('HEAD', 'ADMIN', '!AC', 'TRIAL', 'DEVELOPER', 'APPROVED', '!UNAPPROVED', 'BOT')
-            for role in all_access:
-                overrides[interaction.guild.get_role(role)] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-            additional_overrides = self.get_role_ids_from_overrides(role_overrides)
-            for override in additional_overrides:
-                overrides[override] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-
-            channelcategory = await interaction.guild.create_category(f'{div} - {league_shortcode}', overwrites=overrides)
-
-            role = await interaction.guild.create_role(name=f'{div} - {league_shortcode}')
-            dbdiv = {
-                'league_id': league_id,
-                'division_name': div,
-                'role_id': role.id,
-                'category_id': channelcategory.id
-            }
-            i = 0
-            divid = self.db.divisions.insert(dbdiv)
-            for roster in rosters:
-                if roster['division'] == div:
-                    r+=1
-                    if (len(roster['name']) > 50):
-                        roster_name = f'{roster['name'][:47]}...'
-                        role = await interaction.guild.create_role(name=f'{roster_name} ({league_shortcode})', mentionable=True)
-                    else:
-                        roster_name = roster['name']
-
-                    role = await interaction.guild.create_role(name=f'{roster_name} ({league_shortcode})', mentionable=True)
-                    overwrites = {
-                        interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False, send_messages=False),
-                        role: discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                    }
-
-                    all_access = checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', 'DEVELOPER', 'BOT')
-                    for permrole in all_access:
-                        overwrites[interaction.guild.get_role(permrole)] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                    for override in additional_overrides:
-                        overwrites[override] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                    channel_name = f'🛡️{roster_name} ({league_shortcode})'
-                    if len(channel_name) > 45:
-                        channel_name = f'🛡️{roster_name[:20]} ({league_shortcode})'
-                        self.logger.warning(f'Channel name for {roster_name} is too long, trimming to {channel_name}')
-                    teamchannel = await interaction.guild.create_text_channel(channel_name, category=channelcategory, overwrites=overwrites)
-                    team_id = roster['team_id']
-                    subsitutions = {
-                        '{TEAM_MENTION}': f'<@&{role.id}>',
-                        '{TEAM_NAME}': roster_name,
-                        '{TEAM_ID}': team_id,
-                        '{DIVISION}': div,
-                        '{LEAGUE_NAME}': league.name,
-                        '{LEAGUE_SHORTCODE}': league_shortcode,
-                        '{CHANNEL_ID}': str(teamchannel.id),
-                        '{CHANNEL_LINK}': f'<#{teamchannel.id}>',
-                    }
-                    temprawteammessage = str(rawteammessage)
-                    teammessage = json.loads(self.functions.substitute_strings_in_embed(temprawteammessage, subsitutions))
-                    teammessage['embed'] = discord.Embed(**teammessage['embeds'][0])
-                    del teammessage['embeds']
-                    await teamchannel.send(**teammessage)
-                    await interaction.edit_original_response(content=f'Generating Division Categories, Team Channels, and Roles.\nLeague: {league.name}\nDivisions: {d}/{len(divs)}\nTeams: {r}/{len(rosters)}\n\nLast Generated: {roster_name} ({league_shortcode})\n\nIf we seem frozen, wait 5 minutes we might be rate limited.')
-                    dbteam = {
-                        'roster_id': roster['id'],
-                        'team_id': team_id,
-                        'league_id': league_id,
-                        'role_id': role.id,
-                        'team_channel': teamchannel.id,
-                        'division': divid,
-                        'team_name': roster_name
-                    }
-                    self.db.teams.insert(dbteam)
+            league = await asyncio.to_thread(self.cit.getLeague, league_id)
+
+            # Seed league info into the database
+            seed_league(self.db, league_id, league.name, league_shortcode)
+
+            template_set_db(self.db)
+            plan = plan_tournament_start(
+                interaction.guild, league_id, league, league_shortcode,
+                self.get_role_ids_from_overrides(role_overrides), get_template('teams.json'),
+            )
+            total_divs = len(plan['divisions'])
+            total_teams = sum(len(div['teams']) for div in plan['divisions'])
+
+            await interaction.edit_original_response(content=f'Generating Division Categories, Team Channels, and Roles.\nLeague: {league.name}\nDivisions: {total_divs}\nTeams: {total_teams}\n\nIf we seem frozen, wait 5 minutes we might be rate limited.')
+
+            async def progress(done, total, last):
+                await interaction.edit_original_response(content=f'Generating Division Categories, Team Channels, and Roles.\nLeague: {league.name}\nDivisions: {total_divs}/{total_divs}\nTeams: {done}/{total}\n\nLast Generated: {last} ({league_shortcode})\n\nIf we seem frozen, wait 5 minutes we might be rate limited.')
+
+            result = await execute_start_plan(plan, interaction.guild, self.db, self.functions,
+                                              progress=progress, journal=journal)
+        except BaseException as e:
+            journal.abort(str(e) or type(e).__name__)
+            raise
+        failed_str = ''
+        if result['failed']:
+            journal.abort(f'{len(result["failed"])} team(s) failed')
+            failed_str = f'## Failed Teams (rerun to resume operation #{journal.id})\n' + '\n'.join(f'- {name}: {error}' for name, error in result['failed'])
+        else:
+            journal.finish()
         finished_response = '\n'.join([
-            'Generated.'
+            'Generated.',
             f'League: {league.name}',
-            f'Divisions: {d}/{len(divs)}',
-            f'{r}/{len(rosters)}',
+            f'Divisions: {result["divisions"]}/{total_divs}',
+            f'{result["teams"]}/{total_teams}',
+            failed_str,
             await self._assign_roles(league_id),
             'All done :3'
         ])
-        await interaction.edit_original_response(content=finished_response)
+        await interaction.edit_original_response(content=finished_response[:2000])
         await self.update_launchpad()
 
     @app_commands.command(
@@ -530,37 +461,12 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         """
         await interaction.response.defer(ephemeral=True, thinking=True)
 
-        assigned: list[str] = []
-        not_in_server: list[str] = []
-        not_linked: list[str] = []
-        missing_role: list[str] = []
-
-        for team in self.db.teams.get_by_league(league_id):
-            team_id = team['team_id']
-            team_role_id = team['role_id']
-            team_role = self.guild.get_role(team_role_id)
-            cit_team = self.cit.getTeam(team_id)
-            if not cit_team:
-                continue
-            for user in cit_team.players:
-                if not user.get('is_captain'):
-                    continue
-                if not user.get('discord_id'):
-                    if user['name'] not in not_linked:
-                        not_linked.append(user['name'])
-                    continue
-                member: Optional[discord.Member] = self.guild.get_member(user['discord_id'])
-                if member is None:
-                    if user['name'] not in not_in_server:
-                        not_in_server.append(user['name'])
-                    continue
-                if team_role is None:
-                    if user['name'] not in missing_role:
-                        missing_role.append(f"{user['name']} (team {team_id})")
-                    continue
-                if team_role not in member.roles:
-                    await member.add_roles(team_role, reason="Drawbridge: assign_captain_roles")
-                    assigned.append(f"{user['name']} → {team_role.name}")
+        plan = await plan_captain_roles(self.guild, self.db, self.cit, league_id, include_division=False)
+        result = await apply_role_deltas(plan, reason="Drawbridge: assign_captain_roles")
+        assigned = result['assigned']
+        not_in_server = plan['not_in_server']
+        not_linked = plan['not_linked']
+        missing_role = plan['missing_role']
 
         lines = [f"## Captain Role Assignment — League {league_id}"]
         if assigned:
@@ -573,6 +479,8 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
             lines.append(f"### No Discord linked\n" + ", ".join(not_linked))
         if missing_role:
             lines.append(f"### Team role not found\n" + ", ".join(missing_role))
+        if result['failed']:
+            lines.append(f"### Role edit failed\n" + ", ".join(name for name, _ in result['failed']))
         await interaction.followup.send("\n".join(lines), ephemeral=True)
 
     @app_commands.command(
@@ -598,78 +506,44 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         """
 
         await interaction.response.send_message('Ending tournament...', ephemeral=not share)
+        journal = await self._open_journal(interaction, 'end', league_id, {})
+        if journal is None:
+            return
 
-        divs = self.db.divisions.get_by_league(league_id)
-        guild = interaction.guild
-        teams = self.db.teams.get_by_league(league_id)
-        # Get match channels by querying matches for the league
-        league_matches = self.db.matches.get_by_league(league_id)
-        match_channels = [{'channel_id': match['channel_id']} for match in league_matches if match['channel_id']]
-
-        last_five = []
-        def insert_to_lastfive(string: str):
-            # add to the end, remove the first if there are more than 5
-            last_five.append(string)
-            if len(last_five) > 5:
-                last_five.pop(0)
-        self.logger.debug(f'Teams: {teams}')
-        self.logger.debug(f'Match Channels: {match_channels}')
-        self.logger.debug(f'Divisions: {divs}')
-        status = "Deleting channels... (1/3)"
-        await interaction.edit_original_response(content=f'{status}')
-
-        for channel in guild.channels:
-            for team in teams:
-                if channel.id == team['team_channel']:
-                    insert_to_lastfive(channel.name)
-                    await channel.delete(
-                        reason='Tournament ended'
-                    )
-                    await interaction.edit_original_response(content=f'{status}\n```\n{format(last_five)}\n```')
-                    break
-            for match_channel in match_channels:
-                if channel.id == match_channel['channel_id']:
-                    insert_to_lastfive(channel.name)
-                    await channel.delete(
-                        reason='Tournament ended'
-                    )
-                    await interaction.edit_original_response(content=f'{status}\n```\n{format(last_five)}\n```')
-
-        last_five = []
-        status = f'All Channels Deleted!\nDeleting categories... (2/3)'
-        await interaction.edit_original_response(content=f'{status}')
-
-        for div in divs:
-            for category in guild.categories:
-                if category.id == div['category_id']:
-                    insert_to_lastfive(category.name)
-                    await category.delete()
-                    await interaction.edit_original_response(content=f'{status}\n```\n{format(last_five)}\n```')
-                    break
-        last_five = []
-        status = f'All Channels Deleted!\nAll Categories Deleted!\nDeleting roles... (3/3)'
-        await interaction.edit_original_response(content=f'{status}\n```')
-
-        for role in guild.roles:
-            for team in teams:
-                if role.id == team['role_id']:
-                    insert_to_lastfive(role.name)
-                    await role.delete()
-                    await interaction.edit_original_response(content=f'{status}\n```\n{format(last_five)}\n```')
-                    break
-        for div in divs:
-            for role in guild.roles:
-                if role.id == div['role_id']:
-                    insert_to_lastfive(role.name)
-                    await role.delete()
-                    await interaction.edit_original_response(content=f'{status}\n```\n{format(last_five)}\n```')
-                    break
-
-        self.db.match_schedules.delete_by_league(league_id)
-        self.db.matches.delete_by_league(league_id)
-        self.db.teams.delete_by_league(league_id)
-        self.db.divisions.delete_by_league(league_id)
-        self.db.leagues.delete(league_id)
+        labels = {
+            'channels': 'Deleting channels... (1/3)',
+            'categories': 'All Channels Deleted!\nDeleting categories... (2/3)',
+            'roles': 'All Channels Deleted!\nAll Categories Deleted!\nDeleting roles... (3/3)',
+        }
+
+        async def progress(stage, done, total, last):
+            await interaction.edit_original_response(content=f'{labels[stage]}\n```\n{done}/{total} - {last}\n```')
+
+        try:
+            plan = plan_tournament_end(interaction.guild, self.db, league_id)
+            self.logger.debug(f'Ending league {league_id}: {len(plan["channels"])} channels, '
+                              f'{len(plan["categories"])} categories, {len(plan["roles"])} roles, '
+                              f'{plan["missing"]} already gone')
+            result = await execute_end_plan(plan, progress=progress, journal=journal)
+        except BaseException as e:
+            journal.abort(str(e) or type(e).__name__)
+            raise
+
+        if result['failed']:
+            # Keep the DB rows so a rerun knows what is left to delete
+            journal.abort(f'{len(result["failed"])} delete(s) failed')
+            message = (f'Some channels, categories or roles could not be deleted. Rerun the command to resume operation #{journal.id}.\n'
+                       '## Failed to delete\n' + '\n'.join(f'- {name}: {error}' for name, error in result['failed']))
+            await interaction.edit_original_response(content=message[:2000])
+            return
+
+        if not self.db.cleanup_league(league_id):
+            journal.abort('database cleanup failed')
+            await interaction.edit_original_response(content='Channels, categories and roles were removed, but cleaning up the database failed. Check the logs.')
+            return
+        journal.complete('db:cleanup')
+        dismiss_league(self.db, league_id, keep=journal.id)
+        journal.finish()
 
         await interaction.edit_original_response(content='Tournament ended. All channels, categories and roles have been archived.')
         await self.update_launchpad()
@@ -696,141 +570,12 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         """
         if self.db.matches.get_by_id(match.id) is not None:
             return False # It's already in the Database, must already be generated.
-        if match.away_team is None:
-            team_home = self.db.teams.get_by_team_and_league(match.home_team['team_id'], match.league_id)
-            role_home = self.guild.get_role(team_home['role_id'])
-            team_channel = self.bot.get_channel(team_home['channel_id'])
-            await team_channel.send(f'Matches for round {match.round_number} were just generated. {role_home.mention} have a bye this round, and thus will be awarded a win.')
-            self.db.insert_match({
-                'match_id': match.id,
-                'division': team_home['division_id'],
-                'team_home': team_home['team_id'],
-                'team_away': 0,
-                'channel_id': 0, # 0 for bye,
-                'league_id': match.league_id
-            })
-            self.db.archive_match(match.id)
-            return True
-        else:
-            # Team roles
-            team_home = self.db.teams.get_by_team_id(match.home_team['team_id'])
-            team_away = self.db.teams.get_by_team_id(match.away_team['team_id'])
-
-            if not team_home or not team_away:
-                self.logger.error(f'Could not find team data for match {match.id}. Home: {team_home}, Away: {team_away}')
-                return False
-
-            # Category ID for the division
-            divs = self.db.get_divs_by_league(match.league_id)
-            if len(divs) == 0:
-                raise Exception('No divisions found for the league for this match')
-            category_id = 0
-            for d in divs:
-                if d['division_name'] == match.home_team['division']:
-                    category_id = d['category_id']
-                    break
-            if category_id == 0:
-                raise Exception('Division not found for the match')
-            role_home_obj = self.guild.get_role(team_home['role_id'])
-            role_away_obj = self.guild.get_role(team_away['role_id'])
-            if role_home_obj is None:
-                self.logger.error(f'Could not find Discord role for home team {team_home["team_name"]} (role_id={team_home["role_id"]})')
-                return False
-            if role_away_obj is None:
-                self.logger.error(f'Could not find Discord role for away team {team_away["team_name"]} (role_id={team_away["role_id"]})')
-                return False
-            overrides = {
-                self.guild.default_role: discord.PermissionOverwrite(view_channel=False, send_messages=False),
-                role_home_obj: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-                role_away_obj: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-            }
-            all_access = checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', 'DEVELOPER', 'APPROVED', '!UNAPPROVED', 'BOT', 'STAFF')
-            for role_id in all_access:
-                role_obj = self.guild.get_role(role_id)
-                if role_obj is not None:
-                    overrides[role_obj] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                else:
-                    self.logger.warning(f'Could not find Discord role for role_id={role_id} in all_access list, skipping')
-            for role in self.get_role_ids_from_overrides(role_overrides):
-                if role is not None:
-                    overrides[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-            cat = self.bot.get_guild(int(os.getenv('DISCORD_GUILD_ID'))).get_channel(category_id)
-            if cat == None:
-                raise Exception(f'Category not found for division {match.home_team["division"]}')
-            if match.round_name == '':
-                match.round_name = f'Round {match.round_number}'
-            channel_name = f'🗡️-{match.id}-{team_home['team_name']}-vs-{team_away['team_name']}-{match.round_name}'
-            trimmed = False
-            if len(channel_name) > 100:
-                trimmed_home_team = team_home['team_name'][:10]
-                trimmed_away_team = team_away['team_name'][:10]
-                channel_name = f'🗡️{match.id}-{trimmed_home_team}-vs-{trimmed_away_team}-{match.round_name}'
-                self.logger.warning(f'Channel name too long when generating match {match.round_number} {team_home['team_name']} vs {team_away['team_name']}, trimming to {channel_name}')
-            match_channel = await self.guild.create_text_channel(channel_name, category=cat, overwrites=overrides)
-
-            # Persist the match and its schedule row up-front. The scheduling prompt (with
-            # the propose button) is only posted when scheduling is enabled for the league;
-            # the weekly deadline is set in the same case (cups stay deadline-free).
-            self.db.insert_match({
-                'match_id': match.id,
-                'division': team_home['division'],
-                'team_home': team_home['team_id'],
-                'team_away': team_away['team_id'],
-                'channel_id': match_channel.id,
-                'league_id': match.league_id
-            })
-            settings = self.db.tournament_schedule_settings.get_by_league(match.league_id)
-            scheduling_enabled = bool(settings and settings.get('scheduling_enabled'))
-            deadline = compute_deadline_utc(settings) if scheduling_enabled else None
-            try:
-                self.db.match_schedules.insert({
-                    'match_id': match.id,
-                    'league_id': match.league_id,
-                    'deadline_at': deadline,
-                })
-            except Exception as e:
-                self.logger.error(f'Failed to create match schedule row: {e}')
-
-            rawmatchmessage = get_template('match.json')
-            matchmessage = json.loads(self.functions.substitute_strings_in_embed(rawmatchmessage, {
-                '{TEAM_HOME}': f'<@&{team_home['role_id']}>', # team role as a mention
-                '{TEAM_AWAY}': f'<@&{team_away['role_id']}>', # team role as a mention
-                '{ROUND_NAME}': match.round_name,
-                '{MATCH_ID}': match.id,
-                '{CHANNEL_ID}': str(match_channel.id),
-                '{CHANNEL_LINK}': f'<#{match_channel.id}>'
-            }))
-            matchmessage['embed'] = discord.Embed(**matchmessage['embeds'][0])
-            del matchmessage['embeds']
-            notice_msg = await match_channel.send(**matchmessage)
-            try:
-                await notice_msg.pin()
-            except Exception:
-                pass
+        context = prepare_matchgen(self.guild, self.db, match.league_id, role_overrides)
+        result = await generate_matches(context, [match], self.guild, self.bot, self.db, self.functions)
+        if result['failed']:
+            raise Exception(result['failed'][0][1])
+        return result['generated'] > 0
 
-            # Scheduling prompt (propose button + deadline) — only when enabled for this
-            # league. The same helper is used when the admin flips the toggle later, so the
-            # message can be cleanly removed if scheduling is turned off.
-            if scheduling_enabled:
-                await post_schedule_message(self.bot, self.db, {
-                    'match_id': match.id,
-                    'channel_id': match_channel.id,
-                    'league_id': match.league_id,
-                }, settings)
-
-            # Lets also say something in their team channel
-            try:
-                team_home_channel = self.bot.get_channel(team_home['team_channel']) # team_channel
-                team_away_channel = self.bot.get_channel(team_away['team_channel']) # team_channel
-                await team_home_channel.send(f'Match for round {match.round_number} has been generated. Please head to {match_channel.mention} to organise your match.')
-                await team_away_channel.send(f'Match for round {match.round_number} has been generated. Please head to {match_channel.mention} to organise your match.')
-                if trimmed:
-                    await team_home_channel.send(f'Heads up: Due to a discord limitation, we had to trim your match name down to {channel_name}. We apologise for any inconvenience.')
-                    await team_away_channel.send(f'Heads up: Due to a discord limitation, we had to trim your match name down to {channel_name}. We apologise for any inconvenience.')
-            except Exception as e:
-                self.logger.error(f'Error sending message to team channels: {e}')
-            return True
-    
     async def _delete_match(self, match_id: int):
         """Delete a match and all associated channels. NOTE: This should not be used typically — the match should be archived instead.
         """
@@ -894,34 +639,49 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
             Roles that should have access to generated match/team channels. These are comma-separated.
         """
         await interaction.response.send_message('Finding matches...', ephemeral=True)
+        journal = await self._open_journal(interaction, 'matchgenround', league_id,
+                                           {'round_number': round_number, 'role_overrides': role_overrides})
+        if journal is None:
+            return
         try:
-            # get the league
-            league = self.cit.getLeague(league_id)
-            matches = league.matches
-            filtered_matches = []
-            for match in matches:
-                match2 = citadel.Citadel.PartialMatch(match)
-                if match2.status == 'confirmed':
-                    continue
-                if round_number is not None and match2.round_number != round_number:
-                    continue
-                if self.db.matches.get_by_id(match2.id) is not None:
-                    continue
-                filtered_matches.append(match)
-            if len(filtered_matches) == 0:
+            league = await asyncio.to_thread(self.cit.getLeague, league_id)
+            match_ids = select_round_matches(self.db, league_id, league, round_number)
+            if len(match_ids) == 0:
+                journal.finish()
                 await interaction.edit_original_response(content='No matches found - all are byes, already generated, or completed matches.')
                 return
-            c=0
-            for match in filtered_matches:
-                match2 = citadel.Citadel.PartialMatch(match)
-                c=c+1
-                await interaction.edit_original_response(content=f'Generating {c}/{len(filtered_matches)} matches...')
-                fullmatch = self.cit.getMatch(match2.id)
-                await self._generate_match(fullmatch, role_overrides)
-            await interaction.edit_original_response(content='Matches generated.')
-        except Exception as e:
+            await interaction.edit_original_response(content=f'Fetching {len(match_ids)} matches...')
+            fetched = await fetch_matches(self.cit, match_ids)
+            matches = []
+            failed = []
+            for match_id, match in fetched.items():
+                if isinstance(match, Exception):
+                    failed.append((match_id, f'fetch failed: {match}'))
+                else:
+                    matches.append(match)
+            context = prepare_matchgen(self.guild, self.db, league_id, role_overrides)
+
+            async def progress(done, total, last):
+                await interaction.edit_original_response(content=f'Generating {done}/{total} matches...')
+
+            result = await generate_matches(context, matches, self.guild, self.bot, self.db, self.functions,
+                                            progress=progress, journal=journal)
+            failed += result['failed']
+            summary = f"Generated {result['generated']}/{len(match_ids)} matches."
+            if result['skipped']:
+                summary += '\nSkipped: ' + ', '.join(f'{match_id} ({reason})' for match_id, reason in result['skipped'][:10])
+            if failed:
+                journal.abort(f'{len(failed)} match(es) failed')
+                summary += f'\nFailed (rerun the command to resume operation #{journal.id}): ' + ', '.join(f'{match_id} ({error})' for match_id, error in failed[:10])
+            else:
+                journal.finish()
+            await interaction.edit_original_response(content=summary[:2000])
+        except BaseException as e:
+            journal.abort(str(e))
+            if not isinstance(e, Exception):
+                raise
             self.logger.error(f'Error generating matches: {e}', exc_info=True)
-            await interaction.edit_original_response(content=f'An error occurred while generating matches.\n ```\n{e}\n```')
+            await interaction.edit_original_response(content=f'An error occurred while generating matches. Rerun the command to resume operation #{journal.id}.\n ```\n{e}\n```')
 
     @app_commands.command(
         name='matchgen'
@@ -998,14 +758,15 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
             self.db.archive_match(match_id)
             await self.update_launchpad()
             return
-        await match_channel.send('Match has ended. This channel will now be archived.')
+        await discord_writes.run(lambda: match_channel.send('Match has ended. This channel will now be archived.'),
+                                 'message.send', match_channel.id)
         # Make the channel read only
         overwrites = match_channel.overwrites
         for role,perm in overwrites.items():
             if role.id != interaction.guild.default_role.id:
                 overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=False)
 
-        await match_channel.edit(overwrites=overwrites)
+        await discord_writes.run(lambda: match_channel.edit(overwrites=overwrites), 'channel.edit', match_channel.id)
 
         # Update the database
         self.db.archive_match(match_id)
@@ -1106,7 +867,7 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         'ADMIN',
         'TRIAL',
     )
-    async def randomdemocheck(self, interaction : discord.Interaction, league_id : int, round_no : int = 0, spes_user: int = 0):
+    async def randomdemocheck(self, interaction : discord.Interaction, league_id : int, round_no : int = 0, spes_user: int = 0, count: int = 1):
         """Conduct a random demo check.
 
         Parameters
@@ -1119,92 +880,45 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
 
         spes_user:
             target a specific player
+
+        count:
+            how many checks to announce (up to 25), spread across divisions
         """
         await interaction.response.send_message('Democheck is in progress ...', ephemeral=True)
         try:
-            league = self.cit.getLeague(league_id)
-
-            player_chosen = None #player we're going to democheck
-            match_chosen = None #The match they played on
-            db_team = None #The database entry for the roster they're on
-
-            init_size = 0
+            league = await asyncio.to_thread(self.cit.getLeague, league_id)
             if league is None:
                 await interaction.edit_original_response(content='League not found. Aborting.')
                 return
-            if self.db.get_divs_by_league(league_id) is None:
+            if not self.db.get_divs_by_league(league_id):
                 await interaction.edit_original_response(content='League not being monitored. Aborting.')
                 return
-            if spes_user == 0:
-                # to make life easier we need to remove the description field of all matches
-
-                # This method is a lot slower that my previous attempt but idgaf -ama
-                matches = [self.cit.getMatch(mt['id']) for mt in league.matches]
-                filtered_matches = []
-                for m in matches:
-                    if round_no > 0 and round_no != m.round_number:
-                        continue
-                    if m.forfeit_by != 'no_forfeit' or m.away_team is None:
-                        continue
-                    filtered_matches.append(m)
-
-                if len(filtered_matches) == 0:
-                    await interaction.edit_original_response(content=f'No matches were found for round {round_no}. Aborting.')
-                    return
-
-                random.shuffle(filtered_matches)
-                part_match = filtered_matches[random.randint(0, len(filtered_matches)-1)] #partial match
-                match_chosen = self.cit.getMatch(part_match['id'])
-                self.logger.debug(f'Chosen match: {match_chosen}')
-
-                if(random.randint(0, 1) == 0):
-                    chosen_team = match_chosen.home_team
-                else:
-                    chosen_team = match_chosen.away_team
-
-                pot_players = chosen_team['players']
-                pl_id = pot_players[random.randint(0, len(pot_players)-1)]
-                player_chosen = self.cit.getUser(pl_id['id'])
-                db_team = self.db.teams.get_by_team_id(chosen_team['team_id'])
-                if db_team is None:
-                    await interaction.edit_original_response(content=f'DB_Team was not assigned. Chosen team id:{chosen_team["id"]}. DB call returned: {self.db.teams.get_by_team_id(chosen_team["id"])} Aborting.')
-                    return
+            if spes_user != 0:
+                picks = [await self.demo_checks.pick_for_player(league_id, spes_user)]
+            elif count > 1:
+                picks = await self.demo_checks.pick_many(league_id, league, min(count, 25), round_no)
             else:
-                player_chosen = self.cit.getUser(spes_user)
-                if player_chosen is None:
-                    await interaction.edit_original_response(content=f'Player could not be found with ID:{spes_user}. Aborting.')
-                    return
-                for roster in player_chosen.rosters:
-                    db_team = self.db.teams.get_by_team_id(roster['team_id'])
-                    if db_team is not None and db_team['league_id'] == league_id:
-                        pl_roster = self.cit.getRoster(roster['id'])
-                        break
-                if db_team is None:
-                    await interaction.edit_original_response(content=f'Player {player_chosen.name} couldn\'t be found on a roster for league ID: {league_id} Aborting.')
-                    return
-                matches = pl_roster.matches
-                part_match = matches[random.randint(0, len(matches)-1)]
-                match_chosen = self.cit.getMatch(part_match['id'])
-            round = match_chosen.round_number
-            messageraw = get_template('democheck.json')
-            tempmsg = str(messageraw)
-
-            demochkmsg = json.loads(self.functions.substitute_strings_in_embed(tempmsg, {
-                '{CHANNEL_ID}'  : f'<@&{db_team['role_id']}>', #These two may cause bugs depending on the data base
-                '{TEAM_NAME}'   : f'{db_team['team_name']}',
-                '{ROUND_NO}'    : f'{round}',
-                '{TARGET_NAME}' : f'{player_chosen.name}',
-                '{TARGET_ID}'   : f'{player_chosen.id}',
-                '{MATCH_ID}'    : f'{match_chosen.id}'
-            }))
-            team_channel = self.bot.get_channel(db_team['team_channel'])
-            if team_channel is None:
-                await interaction.edit_original_response(content=f'Channel for team {db_team['team_name']} couldn\'t be found. Aborting.')
+                picks = [await self.demo_checks.pick(league_id, league, round_no)]
+            announced = []
+            try:
+                for picked in picks:
+                    self.logger.debug(f'Chosen match: {picked["match"].id}, player: {picked["player"]}')
+                    await announce_demo_check(self.bot, self.functions, picked)
+                    announced.append(f'{picked["player"]["name"]} ({picked["team"]["team_name"]}, match {picked["match"].id})')
+            except DemoCheckError as e:
+                if not announced:
+                    raise
+                # The earlier picks were already posted, so report those too
+                await interaction.edit_original_response(
+                    content=f'{len(announced)} of {len(picks)} random demo checks announced:\n'
+                    + '\n'.join(f'- {a}' for a in announced) + f'\n{e} Stopped there.')
                 return
-            demochkmsg['embed'] = discord.Embed(**demochkmsg['embeds'][0])
-            del demochkmsg['embeds']
-            await team_channel.send(**demochkmsg)
-            await interaction.edit_original_response(content=f'Random demo check announced. Player chosen is: {player_chosen['name']}')
+            if len(announced) == 1:
+                await interaction.edit_original_response(content=f'Random demo check announced. Player chosen is: {announced[0]}')
+            else:
+                await interaction.edit_original_response(content=f'{len(announced)} random demo checks announced:\n' + '\n'.join(f'- {a}' for a in announced))
+        except DemoCheckError as e:
+            await interaction.edit_original_response(content=f'{e} Aborting.')
         except Exception as e:
             self.logger.error(f'Error conducting demo check: {e}', exc_info=True)
             try:
@@ -1253,16 +967,7 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
         return 'fuck'
 
     def get_role_ids_from_overrides(self, role_overrides: Optional[str]) -> list[discord.Role]:
-        if role_overrides is not None:
-            guild = self.bot.get_guild(int(os.getenv('DISCORD_GUILD_ID')))
-            roles = []
-            for role in role_overrides.split(','):
-                role_obj = discord.utils.get(guild.roles, name=role.strip())
-                if role_obj is not None:
-                    roles.append(role_obj)
-            return roles
-        else:
-            return []
+        return resolve_role_overrides(self.bot.get_guild(int(os.getenv('DISCORD_GUILD_ID'))), role_overrides)
     # @app_commands.command(
     #         name='randomdemocheck',
     #         description='Announces a truly random demo check, given a League ID. Automatically picks a team in the league, and a match to check'
@@ -1411,81 +1116,76 @@ class Tournament(discord_commands.GroupCog, group_name='tournament', group_descr
     )
     @checks.has_been_warned(
         warned_for='fixperms',
-        warning_message='This is a very expensive command to run. Only use this if you have 15-30 minutes to spare!'
+        warning_message='This rewrites the permissions of every team and match channel that has drifted. Run it with dry_run first to see what would change.',
+        unless='dry_run'
     )
-    async def fixperms(self, interaction : discord.Interaction):
-        """Fix permissions for all channels and roles for a league"""
-        # get all channels
-        if (datetime.datetime.now().timestamp() - self.perms_last_fixed) < 900.0:
+    async def fixperms(self, interaction : discord.Interaction, dry_run : bool=False):
+        """Fix permissions for all team and match channels
+
+        Parameters
+        -----------
+        dry_run: bool
+            Only report which channels would change
+        """
+        if not dry_run and (datetime.datetime.now().timestamp() - self.perms_last_fixed) < 900.0:
             await interaction.response.send_message('Permissions were fixed less than 15 minutes ago. Please wait before running this command again.', ephemeral=True)
             return
+        await interaction.response.send_message('Checking permissions...', ephemeral=True)
+        plan = plan_permission_fixes(interaction.guild, self.db.get_all_teams(), self.db.get_all_matches())
+        summary = f"{len(plan['fixes'])} of {plan['checked']} channels have drifted"
+        if plan['missing']:
+            summary += f" ({plan['missing']} tracked channels no longer exist)"
+
+        if dry_run:
+            report = describe_fixes(plan)
+            if not report:
+                await interaction.edit_original_response(content=f'{summary}. Nothing to fix.')
+            elif len('\n'.join(report)) < 1800:
+                await interaction.edit_original_response(content=f'{summary}:\n```\n' + '\n'.join(report) + '\n```')
+            else:
+                await interaction.edit_original_response(
+                    content=f'{summary}. The full report is attached.',
+                    attachments=[discord.File(io.BytesIO('\n'.join(report).encode()), filename='fixperms.txt')],
+                )
+            return
+
         self.perms_last_fixed = datetime.datetime.now().timestamp()
-        guild = interaction.guild
-        teams = self.db.get_all_teams()
-        matches = self.db.get_all_matches()
+        if not plan['fixes']:
+            await interaction.edit_original_response(content=f'{summary}. Nothing to fix.')
+            return
+        journal = await self._open_journal(interaction, 'fixperms', None, {})
+        if journal is None:
+            return
         message_has_timed_out = False
-        await interaction.response.send_message('Fixing permissions...', ephemeral=True)
-        for channel in guild.channels:
-            if isinstance(channel, discord.TextChannel):
-                # check if its a team channel
-                try:
-                    if message_has_timed_out == False:
-                        await interaction.edit_original_response(content=f'Fixing permissions for {channel.name}...')
-                    else:
-                        break
-                except discord.errors.HTTPException as e:
-                    # if 401 Unauthorized
-                    if e.code == 401:
-                        message_has_timed_out = True
-                        await interaction.channel.send(content=f'Hey <@{interaction.user.id}>, Discord is giving us errors for editing the earlier interaction. We\'ll continue quietly in the background.')
-                        break
-
-                if channel.id in [team[5] for team in teams]:
-                    team = [team for team in teams if team[5] == channel.id][0]
-                    role = guild.get_role(team[3])
-                    all_access = checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', '!AC', 'DEVELOPER', 'BOT')
-                    no_access = checks._get_role_ids('CASTER')
-                    await channel.set_permissions(role, read_messages=True, send_messages=True)
-                    # wait one second
-                    await asyncio.sleep(1)
-                    # add admins
-                    await channel.set_permissions(guild.default_role, read_messages=False)
-                    await asyncio.sleep(1)
-                    for role in all_access:
-                        await channel.set_permissions(guild.get_role(role), read_messages=True, send_messages=True)
-                        await asyncio.sleep(1)
-                    for role in no_access:
-                        await channel.set_permissions(guild.get_role(role), read_messages=False)
-                        await asyncio.sleep(1)
-                # check if its a match channel
-                if channel.id in [match['channel_id'] for match in matches if match['channel_id']]:
-                    match = [match for match in matches if match.get('channel_id') == channel.id][0]
-                    all_access = checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', 'DEVELOPER', 'APPROVED', 'BOT')
-                    no_access = checks._get_role_ids('UNAPPROVED')
-                    await channel.set_permissions(guild.default_role, read_messages=False)
-                    await asyncio.sleep(1)
-                    team_home = self.db.teams.get_by_team_id(match['team_home'])
-                    team_away = self.db.teams.get_by_team_id(match['team_away'])
-                    if team_home:
-                        await channel.set_permissions(guild.get_role(team_home['role_id']), read_messages=True, send_messages=True)
-                        await asyncio.sleep(1)
-                    if team_away:
-                        await channel.set_permissions(guild.get_role(team_away['role_id']), read_messages=True, send_messages=True)
-                        await asyncio.sleep(1)
-                    for role in all_access:
-                        await channel.set_permissions(guild.get_role(role), read_messages=True, send_messages=True)
-                        await asyncio.sleep(1)
-                    for role in no_access:
-                        await channel.set_permissions(guild.get_role(role), read_messages=False)
-                        await asyncio.sleep(1)
+
+        async def progress(done, total, last):
+            nonlocal message_has_timed_out
+            if message_has_timed_out:
+                return
+            try:
+                await interaction.edit_original_response(content=f'Fixed {done}/{total} channels ({last})...')
+            except discord.errors.HTTPException as e:
+                # if 401 Unauthorized
+                if e.code == 401:
+                    message_has_timed_out = True
+                    await interaction.channel.send(content=f'Hey <@{interaction.user.id}>, Discord is giving us errors for editing the earlier interaction. We\'ll continue quietly in the background.')
+
+        try:
+            result = await apply_permission_fixes(plan, reason=f'fixperms by {interaction.user}', progress=progress, journal=journal)
+        except BaseException as e:
+            journal.abort(str(e) or type(e).__name__)
+            raise
+        content = f"Permissions fixed on {result['fixed']} of {len(plan['fixes'])} drifted channels."
+        if result['failed']:
+            journal.abort(f"{len(result['failed'])} channel(s) failed")
+            content += '\n' + '\n'.join(f'- {name}: {error}' for name, error in result['failed'][:20])
+        else:
+            journal.finish()
         try:
-            await interaction.edit_original_response(content='Permissions fixed.')
+            await interaction.edit_original_response(content=content[:2000])
         except discord.errors.HTTPException as e:
             if e.code == 401:
-                await interaction.channel.send(content='Permissions fixed.')
-
-
-
+                await interaction.channel.send(content=content[:2000])
 
     # @tournament.error
     # async def tournament_error(self, ctx : discord.Interaction, error):
@@ -1535,12 +1235,12 @@ class ScheduleAlias(discord_commands.Cog):
 
 
 async def initialize(bot: discord_commands.Bot, db, cit, logger):
+    mark_interrupted(db)
     tournament = Tournament(bot, db, cit, logger)
     await bot.add_cog(tournament, guilds=[bot.get_guild(int(os.getenv('DISCORD_GUILD_ID')))])
     await bot.add_cog(ScheduleAlias(bot, tournament), guilds=[bot.get_guild(int(os.getenv('DISCORD_GUILD_ID')))])
-    if not tournament.check_schedule_deadlines.is_running():
-        tournament.check_schedule_deadlines.start()
-    await tournament.update_launchpad() # on startup
+    tournament.start_deadline_timer()
+    # The startup launchpad refresh runs as its own startup step (see app.py)
     # list = await bot.tree.sync(guild=discord.Object(id=os.getenv('DISCORD_GUILD_ID')))
     # logger.info(f'Loaded Tournament Commands: {list}')
 
@@ -0,0 +1,151 @@
+"""
+In-process timer for match scheduling deadlines.
+
+``DeadlineScheduler`` keeps a heap of pending ``match_schedules.deadline_at``
+values and sleeps until the earliest one, so a deadline warning goes out when
+the deadline passes rather than at the next hourly poll. It is loaded once
+from the DB (deadlines missed while the bot was down are due straight away)
+and then follows the schedule repository's ``deadline_listener`` as deadlines
+are set, moved, confirmed or flagged.
+"""
+
+import asyncio
+import datetime
+import heapq
+import os
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.deadlines')
+
+# A deadline whose warning couldn't be handled is tried again this many
+# seconds later, up to RETRY_ATTEMPTS times
+RETRY_DELAY = float(os.getenv('DEADLINE_RETRY_DELAY', '60'))
+RETRY_ATTEMPTS = int(os.getenv('DEADLINE_RETRY_ATTEMPTS', '5'))
+
+
+class DeadlineScheduler:
+    """Calls ``on_due(match_ids)`` as soon as the deadlines of those matches pass.
+
+    ``on_due`` returns the ids it could not handle (or raises, which counts
+    as none handled); those are re-armed ``retry_delay`` seconds out rather
+    than dropped, unless their deadline was set again in the meantime.
+
+    Deadlines are naive UTC datetimes, as stored in the DB. Entries that were
+    moved or cleared stay in the heap and are skipped when they surface.
+    ``set`` may be called from any thread.
+    """
+
+    def __init__(self, on_due: Callable[[List[int]], Awaitable[Optional[Iterable[int]]]],
+                 retry_delay: Optional[float] = None, retry_attempts: Optional[int] = None):
+        self.on_due = on_due
+        self.retry_delay = RETRY_DELAY if retry_delay is None else retry_delay
+        self.retry_attempts = RETRY_ATTEMPTS if retry_attempts is None else retry_attempts
+        self._heap: List[Tuple[datetime.datetime, int]] = []
+        self._deadlines: Dict[int, datetime.datetime] = {}
+        self._attempts: Dict[int, int] = {}
+        # Matches whose deadline was set while the handler ran
+        self._touched: Set[int] = set()
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def load(self, rows: Iterable[Dict]):
+        """Replace the pending deadlines with ``match_id``/``deadline_at`` rows."""
+        self._deadlines = {r['match_id']: r['deadline_at'] for r in rows if r.get('deadline_at')}
+        self._heap = [(deadline, match_id) for match_id, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        self._wake.set()
+
+    def set(self, match_id: int, deadline: Optional[datetime.datetime]):
+        """Track, move or (with ``None``) forget a match's deadline."""
+        if self._loop is not None:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not self._loop:
+                self._loop.call_soon_threadsafe(self._set, match_id, deadline)
+                return
+        self._set(match_id, deadline)
+
+    def _set(self, match_id: int, deadline: Optional[datetime.datetime]):
+        self._touched.add(match_id)
+        self._attempts.pop(match_id, None)
+        if deadline is None:
+            self._deadlines.pop(match_id, None)
+            return
+        if self._deadlines.get(match_id) == deadline:
+            return
+        self._deadlines[match_id] = deadline
+        heapq.heappush(self._heap, (deadline, match_id))
+        if self._heap[0] == (deadline, match_id):
+            # New earliest deadline: re-arm the timer
+            self._wake.set()
+
+    def next_deadline(self) -> Optional[datetime.datetime]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: datetime.datetime) -> List[int]:
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, match_id = heapq.heappop(self._heap)
+            del self._deadlines[match_id]
+            due.append(match_id)
+
+    def _retry(self, match_ids: List[int]):
+        retry_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=self.retry_delay)
+        retried = []
+        for match_id in match_ids:
+            attempts = self._attempts.get(match_id, 0) + 1
+            if attempts > self.retry_attempts:
+                self._attempts.pop(match_id, None)
+                logger.error(f'Giving up on the deadline of match {match_id} after {attempts - 1} retries')
+                continue
+            self._set(match_id, retry_at)
+            self._attempts[match_id] = attempts
+            retried.append(match_id)
+        if retried:
+            logger.warning(f'Retrying the deadlines of matches {retried} in {self.retry_delay:g}s')
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._run())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            due = self._pop_due(datetime.datetime.utcnow())
+            if due:
+                self._touched = set()
+                try:
+                    failed = list(await self.on_due(due) or [])
+                except Exception as e:
+                    logger.error(f'Deadline handler failed for matches {due}: {e}', exc_info=True)
+                    failed = due
+                self._retry([match_id for match_id in failed if match_id not in self._touched])
+                continue
+            nxt = self.next_deadline()
+            timeout = None if nxt is None else max((nxt - datetime.datetime.utcnow()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
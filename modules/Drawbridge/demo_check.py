@@ -0,0 +1,188 @@
+"""
+Random demo check sampling.
+
+Candidates are filtered on the partial matches already in ``league.matches``
+(round and forfeit status), a match is sampled, and only then is its full
+record fetched, so a pick costs one or two Citadel calls however big the
+league is. Rosters used for player-targeted checks are cached for
+DEMO_CHECK_ROSTER_TTL seconds (default 1800). ``pick_many`` picks several
+checks in one pass, spread across divisions.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from modules.logging_config import get_logger
+from web.template_helper import get_template
+from .discord_queue import discord_writes
+
+logger = get_logger('drawbridge.demo_check')
+
+# Byes can't be told apart on partial data, so a pick may need a retry
+SAMPLE_ATTEMPTS = 5
+
+
+class DemoCheckError(Exception):
+    """A demo check could not be picked or announced; the message is user-facing."""
+
+
+def candidate_matches(league, round_no: int = 0) -> List[Dict[str, Any]]:
+    """Partial matches that were actually played, optionally limited to one round."""
+    return [
+        m for m in league.matches
+        if m['forfeit_by'] == 'no_forfeit' and (round_no == 0 or m['round_number'] == round_no)
+    ]
+
+
+class DemoCheckSampler:
+    """Picks demo check targets for a league with as few Citadel calls as possible."""
+
+    def __init__(self, db, cit, roster_ttl: Optional[int] = None):
+        self.db = db
+        self.cit = cit
+        self.roster_ttl = roster_ttl if roster_ttl is not None else int(os.getenv('DEMO_CHECK_ROSTER_TTL', '1800'))
+        self._rosters: Dict[int, tuple] = {}
+
+    async def _get_roster(self, roster_id: int):
+        cached = self._rosters.get(roster_id)
+        if cached and time.monotonic() - cached[0] < self.roster_ttl:
+            return cached[1]
+        roster = await asyncio.to_thread(self.cit.getRoster, roster_id)
+        self._rosters[roster_id] = (time.monotonic(), roster)
+        return roster
+
+    async def _player(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        # Roster players usually carry their name; only look the user up if not
+        if entry.get('name'):
+            return {'id': entry['id'], 'name': entry['name']}
+        user = await asyncio.to_thread(self.cit.getUser, entry['id'])
+        return {'id': user.id, 'name': user.name}
+
+    def _teams(self, league_id: int) -> Dict[int, Dict[str, Any]]:
+        return {t['team_id']: t for t in self.db.teams.get_by_league(league_id)}
+
+    async def _pick_from(self, match, teams: Dict[int, Dict[str, Any]], exclude: set = frozenset()) -> Optional[Dict[str, Any]]:
+        """Pick a side and player of a full match, or None if it can't be checked."""
+        if match.away_team is None:
+            return None
+        sides = [side for side in (match.home_team, match.away_team)
+                 if side.get('players') and side['team_id'] in teams and side['team_id'] not in exclude]
+        if not sides:
+            return None
+        side = random.choice(sides)
+        return {
+            'match': match,
+            'team': teams[side['team_id']],
+            'division': side.get('division'),
+            'player': await self._player(random.choice(side['players'])),
+        }
+
+    async def pick(self, league_id: int, league, round_no: int = 0) -> Dict[str, Any]:
+        """A random player from a random played match. Returns ``{'match', 'team', 'division', 'player'}``."""
+        candidates = candidate_matches(league, round_no)
+        if not candidates:
+            raise DemoCheckError(f'No matches were found for round {round_no}.')
+        teams = self._teams(league_id)
+        for partial in random.sample(candidates, min(SAMPLE_ATTEMPTS, len(candidates))):
+            match = await asyncio.to_thread(self.cit.getMatch, partial['id'])
+            picked = await self._pick_from(match, teams)
+            if picked is not None:
+                return picked
+            logger.debug(f'Match {partial["id"]} cannot be demo checked, resampling')
+        raise DemoCheckError('Could not find a checkable match (sampled only byes or teams missing from the database).')
+
+    async def pick_for_player(self, league_id: int, user_id: int) -> Dict[str, Any]:
+        """A random match played by one player in this league."""
+        user = await asyncio.to_thread(self.cit.getUser, user_id)
+        if user is None:
+            raise DemoCheckError(f'Player could not be found with ID:{user_id}.')
+        teams = self._teams(league_id)
+        roster_ref = next((r for r in user.rosters if r['team_id'] in teams), None)
+        if roster_ref is None:
+            raise DemoCheckError(f"Player {user.name} couldn't be found on a roster for league ID: {league_id}.")
+        roster = await self._get_roster(roster_ref['id'])
+        played = [m for m in roster.matches if m['forfeit_by'] == 'no_forfeit'] or list(roster.matches)
+        if not played:
+            raise DemoCheckError(f'No matches found for {user.name}.')
+        match = await asyncio.to_thread(self.cit.getMatch, random.choice(played)['id'])
+        return {
+            'match': match,
+            'team': teams[roster_ref['team_id']],
+            'division': roster_ref.get('division'),
+            'player': {'id': user.id, 'name': user.name},
+        }
+
+    async def pick_many(self, league_id: int, league, count: int, round_no: int = 0) -> List[Dict[str, Any]]:
+        """Up to ``count`` checks on different teams, spread as evenly as possible across divisions."""
+        candidates = candidate_matches(league, round_no)
+        if not candidates:
+            raise DemoCheckError(f'No matches were found for round {round_no}.')
+        random.shuffle(candidates)
+        teams = self._teams(league_id)
+        divisions = {t['division'] for t in teams.values()} or {None}
+        quota = math.ceil(count / len(divisions))
+
+        picks: List[Dict[str, Any]] = []
+        overflow: List[Dict[str, Any]] = []
+        per_division: Dict[Any, int] = {}
+        used_teams: set = set()
+        # Fetch in small concurrent batches until enough picks are found
+        batch = max(count, 4)
+        for start in range(0, len(candidates), batch):
+            chunk = candidates[start:start + batch]
+            matches = await asyncio.gather(
+                *(asyncio.to_thread(self.cit.getMatch, m['id']) for m in chunk), return_exceptions=True)
+            for match in matches:
+                if isinstance(match, Exception):
+                    logger.warning(f'Failed to fetch match for demo check: {match}')
+                    continue
+                picked = await self._pick_from(match, teams, used_teams)
+                if picked is None:
+                    continue
+                used_teams.add(picked['team']['team_id'])
+                division = picked['team']['division']
+                if per_division.get(division, 0) < quota:
+                    per_division[division] = per_division.get(division, 0) + 1
+                    picks.append(picked)
+                else:
+                    overflow.append(picked)
+                if len(picks) >= count:
+                    return picks
+        # Not enough divisions had matches to fill their share
+        picks += overflow[:count - len(picks)]
+        if not picks:
+            raise DemoCheckError('Could not find a checkable match (only byes or teams missing from the database).')
+        return picks
+
+
+def demo_check_message(functions, picked: Dict[str, Any]) -> Dict[str, Any]:
+    """Message kwargs for the democheck.json template."""
+    team = picked['team']
+    message = json.loads(functions.substitute_strings_in_embed(str(get_template('democheck.json')), {
+        '{CHANNEL_ID}': f'<@&{team["role_id"]}>',
+        '{TEAM_NAME}': f'{team["team_name"]}',
+        '{ROUND_NO}': f'{picked["match"].round_number}',
+        '{TARGET_NAME}': f'{picked["player"]["name"]}',
+        '{TARGET_ID}': f'{picked["player"]["id"]}',
+        '{MATCH_ID}': f'{picked["match"].id}',
+    }))
+    message['embed'] = discord.Embed(**message['embeds'][0])
+    del message['embeds']
+    return message
+
+
+async def announce_demo_check(bot, functions, picked: Dict[str, Any]):
+    """Post a demo check in the picked team's channel."""
+    channel = bot.get_channel(picked['team']['team_channel'])
+    if channel is None:
+        raise DemoCheckError(f"Channel for team {picked['team']['team_name']} couldn't be found.")
+    message = demo_check_message(functions, picked)
+    async with discord_writes.slot('message.send', channel.id):
+        await channel.send(**message)
@@ -0,0 +1,171 @@
+"""
+Shared admission control for Discord writes.
+
+discord.py already follows the rate limit headers of every request, but it
+does so by parking requests inside the HTTP client: a bulk job that fires a
+few hundred role edits holds the same bucket an admin's one-off message
+needs, and nothing stops two bulk jobs from piling onto the same route.
+
+``discord_writes`` sits in front of that. Writes are grouped by route and
+major parameter (a guild for creates and member edits, a channel for
+messages and channel edits), each group admits a limited number of calls at
+once, and waiting interactive calls always go ahead of waiting bulk ones.
+The per-group limit adapts: it grows while calls come back quickly, halves
+when a call comes back slow (it was held for a rate limit) and a 429 closes
+the group for ``retry_after`` seconds. Different groups never wait on each
+other. A group with nothing in flight, waiting or blocked is dropped, so
+the channels a bot has ever written to don't pile up, but its learned limit
+is remembered (for the ``LEARNED_LIMITS`` most recently idle groups) and the
+group picks up from there the next time it is written to.
+"""
+
+import asyncio
+import collections
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.discord_queue')
+
+INTERACTIVE = 0
+BULK = 1
+
+INITIAL_LIMIT = float(os.getenv('DISCORD_QUEUE_INITIAL_LIMIT', '2'))
+MAX_LIMIT = float(os.getenv('DISCORD_QUEUE_MAX_LIMIT', '8'))
+# A write slower than this was almost certainly held for a rate limit
+SLOW_CALL = float(os.getenv('DISCORD_QUEUE_SLOW_CALL', '1.5'))
+# Idle groups whose learned limit is remembered
+LEARNED_LIMITS = int(os.getenv('DISCORD_QUEUE_LEARNED_LIMITS', '1024'))
+
+
+class _Bucket:
+    """Admission state for one route + major parameter."""
+
+    def __init__(self, limit: float, on_idle: Callable[[], None]):
+        self.limit = limit
+        self.on_idle = on_idle
+        self.active = 0
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def dispatch(self):
+        now = time.monotonic()
+        if now < self.blocked_until:
+            if self.timer is None:
+                loop = asyncio.get_running_loop()
+                self.timer = loop.call_later(self.blocked_until - now, self._unblock)
+            return
+        while self.waiters and self.active < max(1, int(self.limit)):
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue  # Cancelled while waiting
+            self.active += 1
+            future.set_result(None)
+        if self.active == 0 and not self.waiters:
+            self.on_idle()
+
+    def _unblock(self):
+        self.timer = None
+        self.dispatch()
+
+
+class DiscordWriteQueue:
+    """Per-bucket, priority-ordered admission for Discord writes."""
+
+    def __init__(self, initial_limit: float = INITIAL_LIMIT, max_limit: float = MAX_LIMIT,
+                 slow_call: float = SLOW_CALL, learned_limits: int = LEARNED_LIMITS):
+        self.initial_limit = initial_limit
+        self.max_limit = max_limit
+        self.slow_call = slow_call
+        self.learned_limits = learned_limits
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        # Limits of dropped buckets, least recently idle first
+        self._limits: 'collections.OrderedDict[Hashable, float]' = collections.OrderedDict()
+        self._seq = itertools.count()
+
+    def _bucket(self, route: str, major: Any) -> _Bucket:
+        key = (route, major)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            limit = self._limits.pop(key, self.initial_limit)
+            bucket = self._buckets[key] = _Bucket(limit, lambda: self._evict(key, bucket))
+        return bucket
+
+    def _evict(self, key: Hashable, bucket: _Bucket):
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+            bucket.timer = None
+        if self._buckets.get(key) is not bucket:
+            return
+        del self._buckets[key]
+        # Only the waiter and timer state goes; the limit it learned is kept
+        self._limits[key] = bucket.limit
+        self._limits.move_to_end(key)
+        while len(self._limits) > self.learned_limits:
+            self._limits.popitem(last=False)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current limit, in-flight and waiting calls per bucket, for diagnostics."""
+        return {
+            f'{route}:{major}': {'limit': round(b.limit, 2), 'active': b.active, 'waiting': len(b.waiters)}
+            for (route, major), b in self._buckets.items()
+        }
+
+    @asynccontextmanager
+    async def slot(self, route: str, major: Any = None, priority: int = INTERACTIVE):
+        """Hold one write slot for ``route``/``major`` while the body runs."""
+        bucket = self._bucket(route, major)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(bucket.waiters, (priority, next(self._seq), future))
+        bucket.dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled: give the slot back
+                bucket.active -= 1
+            # Either way, drop the stale entry now if the bucket is otherwise idle
+            bucket.dispatch()
+            raise
+        started = time.monotonic()
+        slow = False
+        try:
+            yield
+        except discord.HTTPException as e:
+            if e.status == 429:
+                retry_after = float(getattr(e, 'retry_after', 1.0) or 1.0)
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+                slow = True
+            raise
+        finally:
+            if slow or time.monotonic() - started > self.slow_call:
+                bucket.limit = max(1.0, bucket.limit / 2)
+            else:
+                bucket.limit = min(self.max_limit, bucket.limit + 1 / bucket.limit)
+            bucket.active -= 1
+            bucket.dispatch()
+
+    async def run(self, factory: Callable[[], Awaitable], route: str, major: Any = None,
+                  priority: int = INTERACTIVE, retries: int = 3):
+        """Run ``factory()`` in a slot, retrying after 429s that reach us."""
+        for attempt in range(retries):
+            try:
+                async with self.slot(route, major, priority):
+                    return await factory()
+            except discord.HTTPException as e:
+                if e.status != 429 or attempt == retries - 1:
+                    raise
+                logger.warning(f'Discord 429 on {route}:{major} (attempt {attempt + 1}), requeueing')
+        raise RuntimeError('unreachable')
+
+
+# The one queue every cog and the admin panel share
+discord_writes = DiscordWriteQueue()
@@ -0,0 +1,145 @@
+"""
+Queued sync of members as they join.
+
+``on_member_join`` only has to queue the member: a fixed pool of workers
+works through the queue, so a raid or a season launch bringing hundreds of
+joins at once costs at most ``workers`` Citadel requests in flight instead of
+one per join. A member already waiting (or being synced) isn't queued a
+second time. Failures the predicate calls retryable (Citadel being down or
+erroring) are retried with exponential backoff; anything else is logged and
+dropped. ``stats()`` reports the queue depth and how long members waited and
+took to sync.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import discord
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.join_sync')
+
+WORKERS = int(os.getenv('JOIN_SYNC_WORKERS', '2'))
+RETRIES = int(os.getenv('JOIN_SYNC_RETRIES', '3'))
+BACKOFF = float(os.getenv('JOIN_SYNC_BACKOFF', '2'))
+# Samples kept for the latency figures in stats()
+_SAMPLES = 200
+
+
+def _summary(samples: Deque[float]) -> Dict[str, Any]:
+    if not samples:
+        return {'avg': None, 'p95': None, 'max': None}
+    ordered = sorted(samples)
+    return {
+        'avg': round(sum(ordered) / len(ordered), 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+class JoinSyncQueue:
+    """Deduplicated queue of members to sync, worked by a fixed pool of tasks.
+
+    ``handler(member)`` does the sync; ``retryable(exception)`` decides whether
+    a failed sync is tried again.
+    """
+
+    def __init__(self, handler: Callable[[discord.Member], Awaitable[Any]],
+                 retryable: Callable[[BaseException], bool] = lambda e: False,
+                 workers: Optional[int] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None):
+        self.handler = handler
+        self.retryable = retryable
+        self.workers = workers or WORKERS
+        self.retries = RETRIES if retries is None else retries
+        self.backoff = BACKOFF if backoff is None else backoff
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # member id -> (member, time queued) for members waiting in the queue
+        self._pending: Dict[int, tuple] = {}
+        self._active: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._waits: Deque[float] = deque(maxlen=_SAMPLES)
+        self._durations: Deque[float] = deque(maxlen=_SAMPLES)
+        self.counters = {'queued': 0, 'deduplicated': 0, 'synced': 0, 'retried': 0, 'failed': 0}
+        self.max_depth = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.ensure_future(self._worker(n)) for n in range(self.workers)]
+        logger.info(f'Join sync started with {self.workers} worker(s)')
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pending:
+            logger.warning(f'Join sync stopped with {len(self._pending)} member(s) still queued')
+
+    def submit(self, member: discord.Member) -> bool:
+        """Queue a member; False if they are already queued or being synced."""
+        if member.id in self._pending or member.id in self._active:
+            if member.id in self._pending:
+                # Keep the newest member object, it has the freshest state
+                self._pending[member.id] = (member, self._pending[member.id][1])
+            self.counters['deduplicated'] += 1
+            return False
+        self._pending[member.id] = (member, time.monotonic())
+        self._queue.put_nowait(member.id)
+        self.counters['queued'] += 1
+        self.max_depth = max(self.max_depth, len(self._pending))
+        return True
+
+    async def _worker(self, number: int):
+        while True:
+            member_id = await self._queue.get()
+            member, queued_at = self._pending.pop(member_id)
+            self._active.add(member_id)
+            started = time.monotonic()
+            self._waits.append(started - queued_at)
+            try:
+                await self._sync(member)
+            finally:
+                self._active.discard(member_id)
+                self._durations.append(time.monotonic() - started)
+                self._queue.task_done()
+
+    async def _sync(self, member: discord.Member):
+        for attempt in range(self.retries + 1):
+            try:
+                await self.handler(member)
+                self.counters['synced'] += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt < self.retries and self.retryable(e):
+                    delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                    self.counters['retried'] += 1
+                    logger.warning(f'Join sync of {member} ({member.id}) failed, retrying in {delay:.1f}s: {e}')
+                    await asyncio.sleep(delay)
+                    continue
+                self.counters['failed'] += 1
+                logger.error(f'Join sync of {member} ({member.id}) failed: {e}', exc_info=True)
+                return
+
+    async def join(self):
+        """Wait until every queued member has been handled."""
+        await self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'depth': len(self._pending),
+            'active': len(self._active),
+            'max_depth': self.max_depth,
+            'workers': len(self._tasks),
+            **self.counters,
+            'wait': _summary(self._waits),
+            'duration': _summary(self._durations),
+        }
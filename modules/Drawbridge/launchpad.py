@@ -0,0 +1,262 @@
+"""
+Launchpad model builder.
+
+Builds the launchpad text from plain DB rows. Loading is a handful of grouped
+queries (``load_launchpad_data``); everything after that is pure and linear in
+the number of rows, so ``build_launchpad`` and ``render_launchpad`` can be
+exercised with hand-made dicts and no Discord or database connection.
+
+``LaunchpadRefresher`` debounces rebuilds: callers mark the launchpad dirty
+and a single worker rebuilds it at most once per window.
+"""
+
+import asyncio
+import datetime
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.launchpad')
+
+MESSAGE_LIMIT = 2000
+DIVISION_PRIORITY = ['Premier', 'High', 'Intermediate', 'Main', 'Open']
+NO_TOURNAMENTS = 'There are no active tournaments running.'
+
+
+def division_sort_key(division: Dict[str, Any]) -> Tuple[int, str, int]:
+    """Premier, High, Intermediate, Main, Open, then anything else by name."""
+    name = str(division.get('division_name') or '')
+    try:
+        rank = DIVISION_PRIORITY.index(name)
+    except ValueError:
+        rank = len(DIVISION_PRIORITY)
+    return (rank, name.lower(), division.get('id') or 0)
+
+
+def _match_url(match_id) -> str:
+    return f'<https://ozfortress.com/matches/{match_id}>'
+
+
+async def load_launchpad_data(db, cit=None) -> Dict[str, Any]:
+    """Fetch everything the launchpad needs in a few grouped queries.
+
+    League names come from the leagues table; Citadel is only asked (off the
+    event loop) for leagues that have teams but no stored name.
+    """
+    teams = db.teams.get_all()
+    leagues = {l['league_id']: l for l in db.leagues.get_all()}
+    divisions = db.divisions.get_all()
+    matches = db.matches.get_unarchived()
+    try:
+        schedules = db.match_schedules.get_confirmed()
+        overdue = db.match_schedules.get_overdue(datetime.datetime.utcnow())
+    except Exception as e:
+        logger.error(f'Failed to load match schedules for launchpad: {e}')
+        schedules, overdue = [], []
+
+    if cit is not None:
+        missing = {t['league_id'] for t in teams} - {lid for lid, l in leagues.items() if l.get('league_name')}
+        if missing:
+            fetched = await asyncio.gather(
+                *(asyncio.to_thread(cit.getLeague, lid) for lid in missing),
+                return_exceptions=True,
+            )
+            for lid, league in zip(missing, fetched):
+                if not isinstance(league, Exception):
+                    leagues[lid] = {'league_id': lid, 'league_name': league.name}
+
+    return {
+        'leagues': list(leagues.values()),
+        'divisions': divisions,
+        'teams': teams,
+        'matches': matches,
+        'schedules': schedules,
+        'overdue': overdue,
+    }
+
+
+def build_launchpad(leagues: Iterable[Dict], divisions: Iterable[Dict], teams: Iterable[Dict],
+                    matches: Iterable[Dict], schedules: Iterable[Dict] = (),
+                    overdue: Iterable[Dict] = ()) -> Dict[str, Any]:
+    """Group rows into the launchpad model.
+
+    Returns ``{'leagues': [{'id', 'name', 'divisions': [{'id', 'name',
+    'teams', 'matches'}]}], 'overdue': [...]}``. Only leagues and divisions
+    with teams are shown, as before.
+    """
+    teams_by_div: Dict[Tuple[int, int], List[Dict]] = {}
+    for team in teams:
+        teams_by_div.setdefault((int(team['league_id']), int(team['division'])), []).append(team)
+
+    matches_by_div: Dict[Tuple[int, int], List[Dict]] = {}
+    for match in matches:
+        matches_by_div.setdefault((int(match['league_id']), int(match['division'])), []).append(match)
+
+    scheduled_at = {s['match_id']: s['scheduled_at'] for s in schedules if s.get('scheduled_at')}
+    league_names = {int(l['league_id']): l.get('league_name') for l in leagues}
+    division_rows = {int(d['id']): d for d in divisions}
+
+    divs_by_league: Dict[int, List[Dict]] = {}
+    for league_id, division_id in teams_by_div:
+        division = division_rows.get(division_id) or {'id': division_id, 'division_name': f'Division {division_id}'}
+        divs_by_league.setdefault(league_id, []).append(division)
+
+    model_leagues = []
+    # Leagues in the order their first team appears, as the old launchpad did
+    for league_id in divs_by_league:
+        model_divs = []
+        for division in sorted(divs_by_league[league_id], key=division_sort_key):
+            key = (league_id, int(division['id']))
+            model_divs.append({
+                'id': division['id'],
+                'name': division['division_name'],
+                'teams': teams_by_div.get(key, []),
+                'matches': [
+                    {**m, 'scheduled_at': scheduled_at.get(m['match_id'])}
+                    for m in matches_by_div.get(key, [])
+                ],
+            })
+        model_leagues.append({
+            'id': league_id,
+            'name': league_names.get(league_id) or f'League {league_id}',
+            'divisions': model_divs,
+        })
+
+    return {'leagues': model_leagues, 'overdue': list(overdue)}
+
+
+def _render_lines(model: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    for league in model['leagues']:
+        lines.append(f'# {league["name"]}')
+        for div in league['divisions']:
+            lines.append(f'## {div["name"]}')
+            lines.append('### Teams')
+            lines.extend(f'- {t["team_name"]} -> <#{t["team_channel"]}>' for t in div['teams'])
+            lines.append('### Matches')
+            for match in div['matches']:
+                if match['channel_id'] == 0:
+                    lines.append(f'- [{match["match_id"]}]({_match_url(match["match_id"])}) -> Bye')
+                    continue
+                line = f'- [{match["match_id"]}]({_match_url(match["match_id"])}) -> <#{match["channel_id"]}>'
+                if match.get('scheduled_at'):
+                    unix = int(match['scheduled_at'].replace(tzinfo=datetime.timezone.utc).timestamp())
+                    line += f' — 🗓️ <t:{unix}:F>'
+                lines.append(line)
+            if not div['matches']:
+                lines.append('- No matches found')
+            lines.append('')
+    if model['overdue']:
+        lines.append('')
+        lines.append('# ⚠️ Unscheduled / Past Deadline')
+        lines.append('These matches have no agreed time and are past their scheduling deadline. Admins, please intervene.')
+        for o in model['overdue']:
+            cid = o.get('channel_id')
+            loc = f'<#{cid}>' if cid else 'No channel'
+            lines.append(f'- [{o["match_id"]}]({_match_url(o["match_id"])}) -> {loc}')
+    return lines
+
+
+def chunk_lines(lines: List[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Pack lines into as few messages as possible without splitting a line.
+
+    Blank lines at the start or end of a message are dropped, so no chunk is
+    empty or whitespace only (Discord rejects those).
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        while current and not current[-1].strip():
+            current.pop()
+        if current:
+            chunks.append('\n'.join(current))
+
+    for line in lines:
+        # A single line longer than a message gets cut; nothing else can be done with it
+        line = line[:limit]
+        added = len(line) + (1 if current else 0)
+        if current and size + added > limit:
+            flush()
+            current, size = [], 0
+            added = len(line)
+        if not current and not line.strip():
+            continue
+        current.append(line)
+        size += added
+    flush()
+    return chunks
+
+
+def render_launchpad(model: Dict[str, Any]) -> List[str]:
+    """Render the model into message-sized chunks."""
+    if not model['leagues']:
+        return [NO_TOURNAMENTS]
+    return chunk_lines(_render_lines(model))
+
+
+class LaunchpadRefresher:
+    """Coalesce launchpad rebuild requests.
+
+    ``mark_dirty`` is cheap and never blocks; every request made while a
+    rebuild is waiting or running is folded into the next one. Rebuilds never
+    overlap and start at most once per LAUNCHPAD_REFRESH_WINDOW seconds
+    (default 10). The first request after a quiet period runs straight away.
+    """
+
+    def __init__(self, rebuild: Callable[[], Awaitable[None]], window: Optional[float] = None):
+        self._rebuild = rebuild
+        self.window = window if window is not None else float(os.getenv('LAUNCHPAD_REFRESH_WINDOW', '10'))
+        self._dirty = False
+        self._waiters: List[asyncio.Future] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_run = float('-inf')
+
+    def mark_dirty(self):
+        """Schedule a rebuild without waiting for it."""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def refresh(self):
+        """Schedule a rebuild and wait until one that started after this call is done.
+
+        Re-raises the rebuild's exception, if any.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.mark_dirty()
+        await future
+
+    async def _run(self):
+        while self._dirty:
+            delay = self._last_run + self.window - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Anything marked dirty from here on needs another pass
+            self._dirty = False
+            waiters, self._waiters = self._waiters, []
+            self._last_run = time.monotonic()
+            try:
+                await self._rebuild()
+            except Exception as e:
+                logger.error(f'Launchpad rebuild failed: {e}')
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    def close(self):
+        """Cancel any pending rebuild."""
+        if self._task is not None:
+            self._task.cancel()
+        for waiter in self._waiters:
+            waiter.cancel()
+        self._waiters = []
+        self._dirty = False
@@ -0,0 +1,77 @@
+"""
+Coalesced channel logging.
+
+Some log lines come in bursts that say the same thing: someone clicking the
+sync button over and over without a linked account, or a wave of unlinked
+members joining. ``CoalescedLog`` holds those lines for ``window`` seconds,
+keyed by what they are about, and then posts one message: the original line
+if only one came in, otherwise a summary with a count per key.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.log_coalescer')
+
+WINDOW = float(os.getenv('SYNC_LOG_COALESCE_WINDOW', '60'))
+# Keeps a summary inside Discord's 2000 character limit
+MAX_LINES = 25
+
+
+class CoalescedLog:
+    """Buffers keyed log lines and posts them through ``send`` once per window."""
+
+    def __init__(self, send: Callable[[str], Awaitable[Any]], title: str,
+                 window: Optional[float] = None):
+        self.send = send
+        self.title = title
+        self.window = WINDOW if window is None else window
+        # key -> {'message': first line, 'label': summary label, 'count': n}
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, key: Hashable, message: str, label: Optional[str] = None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = {'message': message, 'label': label or str(key), 'count': 1}
+        else:
+            entry['count'] += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        await self.flush()
+
+    def render(self) -> Optional[str]:
+        entries = list(self._entries.values())
+        if not entries:
+            return None
+        if len(entries) == 1 and entries[0]['count'] == 1:
+            return entries[0]['message']
+        total = sum(e['count'] for e in entries)
+        lines = [f"{self.title} ({total} in the last {self.window:g}s):"]
+        for e in entries[:MAX_LINES]:
+            lines.append(f"- {e['label']}" + (f" ×{e['count']}" if e['count'] > 1 else ''))
+        if len(entries) > MAX_LINES:
+            lines.append(f'- and {len(entries) - MAX_LINES} more')
+        return '\n'.join(lines)
+
+    async def flush(self):
+        """Post whatever has been buffered now."""
+        message = self.render()
+        self._entries = {}
+        if message is None:
+            return
+        try:
+            await self.send(message)
+        except Exception as e:
+            logger.error(f'Failed to post coalesced log: {e}')
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
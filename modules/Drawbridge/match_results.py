@@ -0,0 +1,171 @@
+"""
+Match result detection from logs.tf logs.
+
+Works out which side (RED/BLU) each team played on by matching the log's
+players against the two teams' Citadel rosters, then records the map result
+against the match. Used by the logs.tf cog when a log is posted in a match
+channel and by the admin panel to (re)detect a result from a log id.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from modules.citadel import Citadel
+from modules.database import Database
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.match_results')
+
+SIDES = ('Red', 'Blue')
+
+
+def _normalise_steam_id3(steam_id3) -> Optional[str]:
+    """Citadel gives ``U:1:123``; logs.tf keys players as ``[U:1:123]``."""
+    if not steam_id3:
+        return None
+    return f"[{str(steam_id3).strip('[]')}]"
+
+
+class MatchResultDetector:
+    """Detect and record map results for matches.
+
+    Rosters are fetched once per team (concurrently, off the event loop) and
+    cached for MATCH_RESULT_ROSTER_TTL seconds (default 1800). Per match the
+    two rosters are folded into a single steamid -> 'home'/'away' index, so a
+    log is classified in one pass over its players.
+
+    Each identified player votes for the side their team was on. Ringers and
+    unlinked accounts are simply not in the index, and a merc playing for the
+    other team is outvoted, so the result holds as long as most identified
+    players are on their own team's side.
+    """
+
+    def __init__(self, db: Database, cit: Citadel, roster_ttl: Optional[int] = None):
+        self.db = db
+        self.cit = cit
+        self.roster_ttl = roster_ttl if roster_ttl is not None else int(os.getenv('MATCH_RESULT_ROSTER_TTL', '1800'))
+        # team_id -> (fetched_at, team name, frozenset of steam ids)
+        self._teams: Dict[int, Tuple[float, str, frozenset]] = {}
+        # match_id -> (fetched_at, {steamid: 'home'|'away'}, home name, away name)
+        self._matches: Dict[int, Tuple[float, Dict[str, str], str, str]] = {}
+
+    def invalidate(self, team_id: Optional[int] = None):
+        """Forget cached rosters (all of them, or those involving one team)."""
+        if team_id is None:
+            self._teams.clear()
+            self._matches.clear()
+            return
+        self._teams.pop(team_id, None)
+        # Match indexes are cheap to rebuild from the team cache
+        self._matches.clear()
+
+    async def _get_team(self, team_id: int) -> Tuple[str, frozenset]:
+        cached = self._teams.get(team_id)
+        if cached and time.monotonic() - cached[0] < self.roster_ttl:
+            return cached[1], cached[2]
+        team = await asyncio.to_thread(self.cit.getTeam, team_id)
+        steam_ids = frozenset(
+            sid for sid in (_normalise_steam_id3(p.get('steam_id3')) for p in team['players']) if sid
+        )
+        self._teams[team_id] = (time.monotonic(), team['name'], steam_ids)
+        return team['name'], steam_ids
+
+    async def get_side_index(self, match: Dict) -> Tuple[Dict[str, str], str, str]:
+        """Return ``(steamid -> 'home'|'away', home name, away name)`` for a match."""
+        cached = self._matches.get(match['match_id'])
+        if cached and time.monotonic() - cached[0] < self.roster_ttl:
+            return cached[1], cached[2], cached[3]
+
+        (home_name, home_ids), (away_name, away_ids) = await asyncio.gather(
+            self._get_team(match['team_home']),
+            self._get_team(match['team_away']),
+        )
+        index = {sid: 'home' for sid in home_ids}
+        for sid in away_ids:
+            # Someone rostered on both teams tells us nothing
+            if index.pop(sid, None) is None:
+                index[sid] = 'away'
+        self._matches[match['match_id']] = (time.monotonic(), index, home_name, away_name)
+        return index, home_name, away_name
+
+    @staticmethod
+    def classify(log_data: Dict, index: Dict[str, str]) -> Optional[Dict]:
+        """Work out which side the home team played on.
+
+        ``log_data`` is a logs.tf response (or ``summarise_log`` output).
+        Returns None if no rostered player is in the log or the vote is tied.
+        """
+        # Positive votes mean home was RED, negative mean home was BLU
+        vote = 0
+        identified = 0
+        players = log_data.get('players') or {}
+        for steamid, player in players.items():
+            side = index.get(steamid)
+            if side is None or player.get('team') not in SIDES:
+                continue
+            identified += 1
+            on_red = player['team'] == 'Red'
+            vote += 1 if on_red == (side == 'home') else -1
+
+        if vote == 0:
+            return None
+
+        home_side = 'Red' if vote > 0 else 'Blue'
+        away_side = 'Blue' if home_side == 'Red' else 'Red'
+        return {
+            'home_side': home_side,
+            'home_score': log_data['teams'][home_side]['score'],
+            'away_score': log_data['teams'][away_side]['score'],
+            'map_name': (log_data.get('info') or {}).get('map'),
+            'identified_players': identified,
+            'unidentified_players': len(players) - identified,
+        }
+
+    async def detect(self, match: Dict, log_id: int, log_data: Dict, record: bool = True) -> Optional[Dict]:
+        """Detect a match's result from a log and (by default) record it.
+
+        Returns the result with team names and ``new`` (False if this log was
+        already recorded), or None if it could not be determined.
+        """
+        if not match.get('team_home') or not match.get('team_away'):
+            return None
+        try:
+            index, home_name, away_name = await self.get_side_index(match)
+        except Exception as e:
+            logger.warning(f"Could not fetch rosters for match {match['match_id']}: {e}")
+            return None
+
+        result = self.classify(log_data, index)
+        if result is None:
+            logger.warning(f"Could not determine match result for logs.tf/{log_id} (match {match['match_id']})")
+            return None
+
+        result.update({
+            'match_id': match['match_id'],
+            'league_id': match['league_id'],
+            'log_id': log_id,
+            'home_name': home_name,
+            'away_name': away_name,
+            'new': True,
+        })
+        if record:
+            try:
+                result['new'] = self.db.match_results.get_by_log_id(log_id) is None
+                self.db.match_results.insert(result)
+            except Exception as e:
+                logger.error(f"Failed to record result of logs.tf/{log_id} for match {match['match_id']}: {e}")
+        return result
+
+    @staticmethod
+    def describe(result: Dict) -> str:
+        """Human readable one-liner, winner first."""
+        home, away = result['home_name'], result['away_name']
+        home_score, away_score = result['home_score'], result['away_score']
+        map_name = result.get('map_name')
+        if home_score > away_score:
+            return f"**{home}** defeated **{away}** on **{map_name}** ({home_score} - {away_score})"
+        if away_score > home_score:
+            return f"**{away}** defeated **{home}** on **{map_name}** ({away_score} - {home_score})"
+        return f"**{home}** tied with **{away}** on **{map_name}** ({home_score} - {away_score})"
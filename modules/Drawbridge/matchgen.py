@@ -0,0 +1,300 @@
+"""
+Round match generation.
+
+``select_round_matches`` picks the matches of a round that still need a
+channel, ``fetch_matches`` pulls their full Citadel records concurrently and
+``prepare_matchgen`` resolves the per-league pieces (division categories,
+team rows, channel overwrites, schedule settings) once. ``generate_matches``
+then creates channels with bounded concurrency, posts the notices, writes the
+match and schedule rows in one batch and finally posts the scheduling
+prompts. ``/tournament matchgenround``, ``matchgen`` and the admin panel all
+go through it.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import discord
+
+from modules import citadel
+from modules.logging_config import get_logger
+from web.match_schedule_discord import compute_deadline_utc, post_schedule_message
+from web.template_helper import get_template
+from .checks import Checks
+from .discord_queue import discord_writes, BULK
+from .tournament_start import ProgressThrottle, MESSAGE_CONCURRENCY, PROGRESS_INTERVAL, _journaled, _visible
+
+logger = get_logger('drawbridge.matchgen')
+checks = Checks()
+
+CHANNEL_CONCURRENCY = int(os.getenv('MATCHGEN_CONCURRENCY', '4'))
+FETCH_CONCURRENCY = int(os.getenv('MATCHGEN_FETCH_CONCURRENCY', '8'))
+
+
+def select_round_matches(db, league_id: int, league, round_number: Optional[int] = None) -> List[int]:
+    """Ids of the league's unconfirmed matches (optionally one round) that have no row yet."""
+    generated = {m['match_id'] for m in db.matches.get_by_league(league_id)}
+    ids = []
+    for match in league.matches:
+        partial = citadel.Citadel.PartialMatch(match)
+        if partial.status == 'confirmed':
+            continue
+        if round_number is not None and partial.round_number != round_number:
+            continue
+        # Already generated, by an earlier run or an interrupted one
+        if partial.id in generated:
+            continue
+        ids.append(partial.id)
+    return ids
+
+
+async def fetch_matches(cit, match_ids: Iterable[int], concurrency: Optional[int] = None) -> Dict[int, Any]:
+    """Fetch full matches concurrently. Maps each id to its match, or the exception raised."""
+    limit = asyncio.Semaphore(concurrency or FETCH_CONCURRENCY)
+
+    async def fetch(match_id):
+        async with limit:
+            try:
+                return await asyncio.to_thread(cit.getMatch, match_id)
+            except Exception as e:
+                return e
+
+    match_ids = list(match_ids)
+    results = await asyncio.gather(*(fetch(match_id) for match_id in match_ids))
+    return dict(zip(match_ids, results))
+
+
+def resolve_role_overrides(guild: discord.Guild, role_overrides: Optional[str]) -> List[discord.Role]:
+    """Roles named in a comma-separated override string; unknown names are ignored."""
+    if not role_overrides:
+        return []
+    by_name = {}
+    for role in guild.roles:
+        by_name.setdefault(role.name, role)
+    names = (name.strip() for name in role_overrides.split(','))
+    return [by_name[name] for name in names if name in by_name]
+
+
+def prepare_matchgen(guild: discord.Guild, db, league_id: int, role_overrides: Optional[str] = None) -> Dict[str, Any]:
+    """Everything match generation needs for a league, looked up once.
+
+    Returns ``{'league_id', 'categories': {division name: category},
+    'teams': {team_id: team row}, 'overwrites', 'settings',
+    'scheduling_enabled', 'deadline', 'template'}``.
+    """
+    categories = {}
+    for division in db.divisions.get_by_league(league_id):
+        category = guild.get_channel(division['category_id']) if division.get('category_id') else None
+        if category is not None:
+            categories[division['division_name']] = category
+
+    overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False, send_messages=False)}
+    for role_id in checks._get_role_ids('HEAD', 'ADMIN', 'TRIAL', 'DEVELOPER', 'APPROVED', '!UNAPPROVED', 'BOT', 'STAFF'):
+        role = guild.get_role(role_id)
+        if role is not None:
+            overwrites[role] = _visible()
+        else:
+            logger.warning(f'Could not find Discord role for role_id={role_id} in all_access list, skipping')
+    for role in resolve_role_overrides(guild, role_overrides):
+        overwrites[role] = _visible()
+
+    settings = db.tournament_schedule_settings.get_by_league(league_id)
+    scheduling_enabled = bool(settings and settings.get('scheduling_enabled'))
+    return {
+        'league_id': league_id,
+        'categories': categories,
+        'teams': {t['team_id']: t for t in db.teams.get_by_league(league_id)},
+        'overwrites': overwrites,
+        'settings': settings,
+        'scheduling_enabled': scheduling_enabled,
+        # Cups stay deadline-free
+        'deadline': compute_deadline_utc(settings) if scheduling_enabled else None,
+        'template': get_template('match.json'),
+    }
+
+
+def match_channel_name(match, home_name: str, away_name: str) -> tuple:
+    """``(channel name, trimmed)`` for a match, shortened to fit Discord's 100 characters."""
+    channel_name = f'🗡️-{match.id}-{home_name}-vs-{away_name}-{match.round_name}'
+    if len(channel_name) <= 100:
+        return channel_name, False
+    return f'🗡️{match.id}-{home_name[:10]}-vs-{away_name[:10]}-{match.round_name}', True
+
+
+def match_steps(match_ids: Iterable[int]) -> List[str]:
+    """Journal step keys for a set of matches."""
+    return [f'match:{match_id}:{part}' for match_id in match_ids for part in ('channel', 'messages', 'row')]
+
+
+async def generate_matches(context: Dict[str, Any], matches: List[Any], guild: discord.Guild, bot, db, functions,
+                           progress: Optional[Callable] = None,
+                           concurrency: Optional[int] = None,
+                           message_concurrency: Optional[int] = None,
+                           progress_interval: Optional[float] = None,
+                           journal=None) -> Dict[str, Any]:
+    """Generate channels for full Citadel matches.
+
+    Channels are created ``concurrency`` at a time; notices and team channel
+    messages go out ``message_concurrency`` at a time. Match and schedule rows
+    are written in one batch once every channel exists, then the scheduling
+    prompts are posted (they need the schedule rows). A match that fails is
+    reported and skipped rather than aborting the round; one that can't be
+    generated (a team without a row or role) is reported as skipped.
+
+    With a journal each match's channel, messages and row are recorded, and a
+    resumed run reuses channels an earlier run created.
+
+    ``progress(done, total, last)`` may be sync or async and is throttled.
+    Returns ``{'generated', 'skipped': [(match id, reason)], 'failed':
+    [(match id, error)]}``.
+    """
+    league_id = context['league_id']
+    channel_writes = asyncio.Semaphore(concurrency or CHANNEL_CONCURRENCY)
+    message_writes = asyncio.Semaphore(message_concurrency or MESSAGE_CONCURRENCY)
+    tracker = ProgressThrottle(progress, len(matches), PROGRESS_INTERVAL if progress_interval is None else progress_interval)
+    if journal is not None:
+        journal.plan(match_steps(m.id for m in matches))
+
+    rows: List[Dict[str, Any]] = []
+    skipped: List[tuple] = []
+    failed: List[tuple] = []
+
+    def step_done(match, part):
+        return journal is not None and journal.is_done(f'match:{match.id}:{part}')
+
+    async def send(channel, *args, **kwargs):
+        async with message_writes, discord_writes.slot('message.send', channel.id, BULK):
+            return await channel.send(*args, **kwargs)
+
+    async def generate_bye(match):
+        team = context['teams'].get(match.home_team['team_id'])
+        if team is None:
+            skipped.append((match.id, 'no team row for the bye team'))
+            return
+        if not step_done(match, 'messages'):
+            team_channel = bot.get_channel(team['team_channel'])
+            if team_channel is not None:
+                await send(team_channel, f'Matches for round {match.round_number} were just generated. <@&{team["role_id"]}> have a bye this round, and thus will be awarded a win.')
+            if journal is not None:
+                journal.complete(f'match:{match.id}:messages')
+        rows.append({
+            'match_id': match.id,
+            'division': team['division'],
+            'team_home': team['team_id'],
+            'team_away': 0,
+            'channel_id': 0,  # 0 for bye
+            'league_id': league_id,
+            'archived': 1,
+        })
+
+    async def generate(match):
+        home = context['teams'].get(match.home_team['team_id'])
+        away = context['teams'].get(match.away_team['team_id'])
+        if not home or not away:
+            logger.error(f'Could not find team data for match {match.id}. Home: {home}, Away: {away}')
+            skipped.append((match.id, 'team data not found'))
+            return
+        role_home = guild.get_role(home['role_id'])
+        role_away = guild.get_role(away['role_id'])
+        for team, role in ((home, role_home), (away, role_away)):
+            if role is None:
+                logger.error(f'Could not find Discord role for team {team["team_name"]} (role_id={team["role_id"]})')
+                skipped.append((match.id, f'role missing for {team["team_name"]}'))
+                return
+        category = context['categories'].get(match.home_team['division'])
+        if category is None:
+            raise Exception(f'Category not found for division {match.home_team["division"]}')
+
+        if match.round_name == '':
+            match.round_name = f'Round {match.round_number}'
+        channel_name, trimmed = match_channel_name(match, home['team_name'], away['team_name'])
+        if trimmed:
+            logger.warning(f'Channel name too long when generating match {match.round_number} {home["team_name"]} vs {away["team_name"]}, trimming to {channel_name}')
+        overwrites = dict(context['overwrites'])
+        overwrites[role_home] = _visible()
+        overwrites[role_away] = _visible()
+
+        async def create():
+            async with channel_writes, discord_writes.slot('channel.create', guild.id, BULK):
+                return await guild.create_text_channel(channel_name, category=category, overwrites=overwrites)
+        channel = await _journaled(journal, f'match:{match.id}:channel', guild.get_channel, create)
+
+        if not step_done(match, 'messages'):
+            message = json.loads(functions.substitute_strings_in_embed(context['template'], {
+                '{TEAM_HOME}': f'<@&{home["role_id"]}>',
+                '{TEAM_AWAY}': f'<@&{away["role_id"]}>',
+                '{ROUND_NAME}': match.round_name,
+                '{MATCH_ID}': match.id,
+                '{CHANNEL_ID}': str(channel.id),
+                '{CHANNEL_LINK}': f'<#{channel.id}>',
+            }))
+            message['embed'] = discord.Embed(**message['embeds'][0])
+            del message['embeds']
+            notice = await send(channel, **message)
+            try:
+                async with discord_writes.slot('message.pin', channel.id, BULK):
+                    await notice.pin()
+            except Exception:
+                pass
+
+            # Lets also say something in their team channels
+            for team in (home, away):
+                try:
+                    team_channel = bot.get_channel(team['team_channel'])
+                    await send(team_channel, f'Match for round {match.round_number} has been generated. Please head to {channel.mention} to organise your match.')
+                    if trimmed:
+                        await send(team_channel, f'Heads up: Due to a discord limitation, we had to trim your match name down to {channel_name}. We apologise for any inconvenience.')
+                except Exception as e:
+                    logger.error(f'Error sending message to team channel of {team["team_name"]}: {e}')
+            if journal is not None:
+                journal.complete(f'match:{match.id}:messages')
+
+        rows.append({
+            'match_id': match.id,
+            'division': home['division'],
+            'team_home': home['team_id'],
+            'team_away': away['team_id'],
+            'channel_id': channel.id,
+            'league_id': league_id,
+        })
+
+    async def run(match):
+        try:
+            if match.away_team is None:
+                await generate_bye(match)
+            else:
+                await generate(match)
+        except Exception as e:
+            logger.error(f'Failed to generate match {match.id}: {e}')
+            failed.append((match.id, str(e)))
+            if journal is not None:
+                journal.fail(f'match:{match.id}:channel', str(e))
+        await tracker.tick(str(match.id))
+
+    await asyncio.gather(*(run(match) for match in matches))
+
+    if rows:
+        db.matches.insert_many(rows)
+        try:
+            db.match_schedules.insert_many([{
+                'match_id': row['match_id'],
+                'league_id': league_id,
+                'deadline_at': context['deadline'],
+            } for row in rows if row['channel_id']])
+        except Exception as e:
+            logger.error(f'Failed to create match schedule rows: {e}')
+        if journal is not None:
+            for row in rows:
+                journal.complete(f"match:{row['match_id']}:row")
+
+    # The scheduling prompt (propose button + deadline) only goes out when
+    # scheduling is enabled for the league, and needs the schedule rows.
+    if context['scheduling_enabled']:
+        async def prompt(row):
+            async with message_writes:
+                await post_schedule_message(bot, db, row, context['settings'])
+        await asyncio.gather(*(prompt(row) for row in rows if row['channel_id']))
+
+    return {'generated': len(rows), 'skipped': skipped, 'failed': failed}
@@ -0,0 +1,201 @@
+"""
+Journal for bulk tournament operations.
+
+``start``, ``end``, ``matchgenround`` and ``fixperms`` record every planned
+step in the operations/operation_steps tables and mark each one done (with
+the ids it created) as they go. Opening a journal for the same kind and
+league while an earlier run is unfinished resumes that run: completed steps
+are skipped and their recorded results reused, so a restart or a Discord
+error part way through doesn't leave half the work to be cleaned up by hand.
+A resume has to be asked for with the params the run was started with;
+anything else would mix two configurations in one league.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional, Set
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.operations')
+
+# Operations being executed by this process; anything else marked running
+# was left behind by a previous process.
+_active: Set[int] = set()
+
+# Params that tell operations of the same kind and league apart, so a failed
+# round 1 matchgen isn't resumed by a round 2 run
+SCOPE = {'matchgenround': ('round_number',)}
+
+
+def scope(kind: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {key: (params or {}).get(key) for key in SCOPE.get(kind, ())}
+
+
+def _comparable(params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # As stored, with unset options (None or '') left out
+    return {key: value for key, value in json.loads(json.dumps(params or {})).items()
+            if value not in (None, '')}
+
+
+class OperationConflict(Exception):
+    """Raised when an unfinished operation stops a new one from starting."""
+
+
+class OperationInProgress(OperationConflict):
+    """Raised when the operation to resume is still running in this process."""
+
+
+class OperationParamsChanged(OperationConflict):
+    """Raised when the operation to resume was started with different params."""
+
+
+class OperationJournal:
+    """Step journal for one operation.
+
+    Journal writes are best effort: a failed write is logged and the
+    operation carries on, it just can't skip that step on a later resume.
+    """
+
+    def __init__(self, db, operation: Dict[str, Any], steps: Iterable[Dict[str, Any]] = (), resumed: bool = False):
+        self.db = db
+        self.operation = operation
+        self.resumed = resumed
+        self._steps: Dict[str, Dict[str, Any]] = {s['step_key']: s for s in steps}
+
+    @property
+    def id(self) -> int:
+        return self.operation['id']
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return json.loads(self.operation.get('params') or '{}')
+
+    @classmethod
+    def open(cls, db, kind: str, league_id: Optional[int] = None,
+             params: Optional[Dict[str, Any]] = None, started_by: Optional[str] = None) -> 'OperationJournal':
+        """Resume the latest unfinished operation of this kind (and scope), or start a new one."""
+        existing = db.operations.get_unfinished(kind, league_id, scope(kind, params))
+        if existing is not None:
+            if existing['id'] in _active:
+                raise OperationInProgress(f'A {kind} operation for this league is already running (#{existing["id"]})')
+            stored, wanted = _comparable(json.loads(existing.get('params') or '{}')), _comparable(params)
+            if stored != wanted:
+                changed = ', '.join(f'{key}: {stored.get(key)!r} -> {wanted.get(key)!r}'
+                                    for key in sorted(stored.keys() | wanted.keys()) if stored.get(key) != wanted.get(key))
+                raise OperationParamsChanged(
+                    f'Unfinished {kind} operation #{existing["id"]} for this league was started with different options '
+                    f'({changed}). Rerun it with the original options, or dismiss it on the Operations page first.')
+            db.operations.set_status(existing['id'], 'running')
+            existing['status'] = 'running'
+            journal = cls(db, existing, db.operation_steps.get_by_operation(existing['id']), resumed=True)
+            logger.info(f'Resuming {kind} operation #{journal.id} ({journal.done_count()} steps already done)')
+        else:
+            operation_id = db.operations.insert({
+                'kind': kind,
+                'league_id': league_id,
+                'params': json.dumps(params or {}),
+                'started_by': started_by,
+            })
+            journal = cls(db, db.operations.get_by_id(operation_id))
+        _active.add(journal.id)
+        return journal
+
+    @classmethod
+    def get(cls, db, operation_id: int) -> Optional['OperationJournal']:
+        """Read-only view of an operation and its steps."""
+        operation = db.operations.get_by_id(operation_id)
+        if operation is None:
+            return None
+        return cls(db, operation, db.operation_steps.get_by_operation(operation_id))
+
+    def plan(self, step_keys: Iterable[str]):
+        """Record the steps this run intends to perform."""
+        new = [key for key in step_keys if key not in self._steps]
+        if not new:
+            return
+        try:
+            self.db.operation_steps.insert_pending(self.id, new)
+        except Exception as e:
+            logger.warning(f'Operation #{self.id}: failed to record planned steps: {e}')
+        for key in new:
+            self._steps[key] = {'step_key': key, 'status': 'pending', 'result': None}
+
+    def is_done(self, key: str) -> bool:
+        step = self._steps.get(key)
+        return step is not None and step['status'] == 'done'
+
+    def result(self, key: str) -> Optional[Dict[str, Any]]:
+        """What a completed step recorded, or None if it hasn't completed."""
+        if not self.is_done(key):
+            return None
+        return json.loads(self._steps[key].get('result') or '{}')
+
+    def done_count(self) -> int:
+        return sum(1 for s in self._steps.values() if s['status'] == 'done')
+
+    def _record(self, key: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        self._steps[key] = {'step_key': key, 'status': status, 'result': result, 'error': error}
+        try:
+            self.db.operation_steps.insert({
+                'operation_id': self.id,
+                'step_key': key,
+                'status': status,
+                'result': result,
+                'error': error,
+            })
+        except Exception as e:
+            logger.warning(f'Operation #{self.id}: failed to record step {key}: {e}')
+
+    def complete(self, key: str, result: Optional[Dict[str, Any]] = None):
+        self._record(key, 'done', json.dumps(result) if result is not None else None)
+
+    def fail(self, key: str, error: str):
+        self._record(key, 'failed', error=str(error)[:2000])
+
+    def _close(self, status: str, error: Optional[str] = None):
+        _active.discard(self.id)
+        self.operation['status'] = status
+        try:
+            self.db.operations.set_status(self.id, status, error)
+        except Exception as e:
+            logger.warning(f'Operation #{self.id}: failed to record status {status}: {e}')
+
+    def finish(self):
+        """Mark the operation completed."""
+        self._close('completed')
+
+    def abort(self, error: str):
+        """Mark the operation failed; the next run of the same kind resumes it."""
+        self._close('failed', str(error)[:2000])
+
+
+def dismiss_league(db, league_id: int, keep: Optional[int] = None) -> int:
+    """Dismiss a league's unfinished operations once the league has been cleaned up.
+
+    Their recorded steps point at objects and rows that no longer exist, so
+    the next start of the league must not resume them. ``keep`` is the end
+    operation doing the cleanup.
+    """
+    try:
+        count = db.operations.dismiss_unfinished(league_id, keep)
+    except Exception as e:
+        logger.warning(f'Failed to dismiss unfinished operations for league {league_id}: {e}')
+        return 0
+    if count:
+        logger.info(f'Dismissed {count} unfinished operation(s) for ended league {league_id}')
+    return count
+
+
+def mark_interrupted(db) -> int:
+    """Flag operations a previous process left running. Call once at startup."""
+    if _active:
+        # Something is running in this process, so this isn't a fresh start
+        return 0
+    try:
+        count = db.operations.mark_interrupted()
+    except Exception as e:
+        logger.warning(f'Failed to mark interrupted operations: {e}')
+        return 0
+    if count:
+        logger.warning(f'{count} operation(s) were interrupted by a restart and can be resumed')
+    return count
@@ -0,0 +1,117 @@
+"""
+Captain role assignment.
+
+``plan_captain_roles`` fetches every team of a league from Citadel once
+(concurrently), resolves captains to members from the guild cache and works
+out which roles each member is missing. ``apply_role_deltas`` then gives
+each member everything they're missing in a single ``add_roles`` call, a
+few members at a time. ``/tournament start``, ``assign_roles``,
+``assign_captain_roles`` and the admin panel share the pair.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from modules.logging_config import get_logger
+from .discord_queue import discord_writes, BULK
+
+logger = get_logger('drawbridge.role_assignment')
+
+# Role edits share the guild's member route bucket
+ROLE_CONCURRENCY = int(os.getenv('ROLE_ASSIGN_CONCURRENCY', '4'))
+FETCH_CONCURRENCY = int(os.getenv('ROLE_ASSIGN_FETCH_CONCURRENCY', '8'))
+
+
+async def fetch_teams(cit, team_ids, concurrency: Optional[int] = None) -> Dict[int, Any]:
+    """Fetch Citadel teams concurrently. Maps each id to its team, or the exception raised."""
+    limit = asyncio.Semaphore(concurrency or FETCH_CONCURRENCY)
+
+    async def fetch(team_id):
+        async with limit:
+            try:
+                return await asyncio.to_thread(cit.getTeam, team_id)
+            except Exception as e:
+                return e
+
+    team_ids = list(dict.fromkeys(team_ids))
+    results = await asyncio.gather(*(fetch(team_id) for team_id in team_ids))
+    return dict(zip(team_ids, results))
+
+
+def _add(names: List[str], name: str):
+    if name not in names:
+        names.append(name)
+
+
+async def plan_captain_roles(guild: discord.Guild, db, cit, league_id: int,
+                             include_division: bool = True) -> Dict[str, Any]:
+    """Work out which team (and division) roles every captain in a league is missing.
+
+    Returns ``{'deltas': {member id: {'member', 'roles', 'labels'}},
+    'not_linked', 'not_in_server', 'missing_role', 'fetch_failed'}``, the
+    last four being lists of names for reporting.
+    """
+    teams = db.teams.get_by_league(league_id)
+    division_roles = {}
+    if include_division:
+        division_roles = {d['id']: guild.get_role(d['role_id']) for d in db.divisions.get_by_league(league_id)}
+    fetched = await fetch_teams(cit, (t['team_id'] for t in teams))
+
+    plan: Dict[str, Any] = {'deltas': {}, 'not_linked': [], 'not_in_server': [], 'missing_role': [], 'fetch_failed': []}
+    for team in teams:
+        cit_team = fetched.get(team['team_id'])
+        if isinstance(cit_team, Exception) or cit_team is None:
+            logger.error(f"Failed to fetch team {team['team_id']}: {cit_team}")
+            plan['fetch_failed'].append(team['team_name'])
+            continue
+        wanted = [guild.get_role(team['role_id'])]
+        if include_division:
+            wanted.append(division_roles.get(team['division']))
+        for user in cit_team.players:
+            if not user.get('is_captain'):
+                continue
+            if not user.get('discord_id'):
+                _add(plan['not_linked'], user['name'])
+                continue
+            member: Optional[discord.Member] = guild.get_member(int(user['discord_id']))
+            if member is None:
+                _add(plan['not_in_server'], user['name'])
+                continue
+            if wanted[0] is None:
+                _add(plan['missing_role'], f"{user['name']} (team {team['team_id']})")
+            delta = plan['deltas'].setdefault(member.id, {'member': member, 'roles': [], 'labels': []})
+            have = {r.id for r in member.roles} | {r.id for r in delta['roles']}
+            for role in wanted:
+                if role is not None and role.id not in have:
+                    delta['roles'].append(role)
+                    delta['labels'].append(f"{user['name']} → {role.name}")
+                    have.add(role.id)
+    plan['deltas'] = {k: v for k, v in plan['deltas'].items() if v['roles']}
+    return plan
+
+
+async def apply_role_deltas(plan: Dict[str, Any], reason: str = 'Drawbridge role assignment',
+                            concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Give every member in a plan their missing roles, one ``add_roles`` call each.
+
+    Returns ``{'assigned': [labels], 'failed': [(member name, error)]}``.
+    """
+    limit = asyncio.Semaphore(concurrency or ROLE_CONCURRENCY)
+    assigned: List[str] = []
+    failed: List[tuple] = []
+
+    async def apply(delta):
+        member = delta['member']
+        try:
+            async with limit, discord_writes.slot('member.roles', member.guild.id, BULK):
+                await member.add_roles(*delta['roles'], reason=reason)
+            assigned.extend(delta['labels'])
+        except discord.HTTPException as e:
+            logger.error(f'Failed to add roles to {member} ({member.id}): {e}')
+            failed.append((str(member), str(e)))
+
+    await asyncio.gather(*(apply(delta) for delta in plan['deltas'].values()))
+    return {'assigned': assigned, 'failed': failed}
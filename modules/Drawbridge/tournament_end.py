@@ -0,0 +1,110 @@
+"""
+Tournament end: teardown of a league's channels, categories and roles.
+
+The ids to delete come straight from the DB rows and are resolved with
+``guild.get_channel``/``guild.get_role``, so planning is linear in the number
+of rows rather than rows x guild objects. Deletes then run with bounded
+concurrency, stage by stage (channels before their categories, roles last),
+and the DB rows go in one transaction once Discord is clean.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from modules.logging_config import get_logger
+from .discord_queue import discord_writes, BULK
+from .tournament_start import ProgressThrottle, PROGRESS_INTERVAL
+
+logger = get_logger('drawbridge.tournament_end')
+
+DELETE_CONCURRENCY = int(os.getenv('TOURNAMENT_END_CONCURRENCY', '4'))
+
+STAGES = ('channels', 'categories', 'roles')
+
+
+def plan_tournament_end(guild: discord.Guild, db, league_id: int) -> Dict[str, Any]:
+    """Resolve everything a league owns in the guild.
+
+    Returns ``{'channels': [...], 'categories': [...], 'roles': [...],
+    'missing': int}`` where ``missing`` counts ids that are already gone.
+    """
+    divisions = db.divisions.get_by_league(league_id)
+    teams = db.teams.get_by_league(league_id)
+    matches = db.matches.get_by_league(league_id)
+
+    channel_ids = {t['team_channel'] for t in teams if t.get('team_channel')}
+    channel_ids |= {m['channel_id'] for m in matches if m.get('channel_id')}
+    category_ids = {d['category_id'] for d in divisions if d.get('category_id')}
+    role_ids = {t['role_id'] for t in teams if t.get('role_id')}
+    role_ids |= {d['role_id'] for d in divisions if d.get('role_id')}
+
+    plan: Dict[str, Any] = {'channels': [], 'categories': [], 'roles': [], 'missing': 0}
+    for stage, ids, lookup in (('channels', channel_ids, guild.get_channel),
+                               ('categories', category_ids, guild.get_channel),
+                               ('roles', role_ids, guild.get_role)):
+        for object_id in ids:
+            obj = lookup(object_id)
+            if obj is None:
+                plan['missing'] += 1
+            else:
+                plan[stage].append(obj)
+    return plan
+
+
+async def execute_end_plan(plan: Dict[str, Any], reason: str = 'Tournament ended',
+                           progress: Optional[Callable] = None,
+                           concurrency: Optional[int] = None,
+                           progress_interval: Optional[float] = None,
+                           journal=None) -> Dict[str, Any]:
+    """Delete everything in an end plan.
+
+    ``progress(stage, done, total, last_name)`` may be sync or async and is
+    throttled per stage. Objects that are already gone are ignored; other
+    failures are collected and returned as ``{'deleted', 'failed': [(name,
+    error)]}`` instead of stopping the teardown. With a journal each delete
+    is recorded; a resumed run re-plans from the DB, and whatever was deleted
+    before is simply no longer in the guild.
+    """
+    limit = asyncio.Semaphore(concurrency or DELETE_CONCURRENCY)
+    interval = PROGRESS_INTERVAL if progress_interval is None else progress_interval
+    deleted = 0
+    failed: List[tuple] = []
+    if journal is not None:
+        journal.plan(f'{stage}:{obj.id}' for stage in STAGES for obj in plan[stage])
+
+    for stage in STAGES:
+        objects = plan[stage]
+        if not objects:
+            continue
+        callback = None
+        if progress is not None:
+            callback = lambda done, total, last, stage=stage: progress(stage, done, total, last)
+        tracker = ProgressThrottle(callback, len(objects), interval)
+
+        async def delete(obj, stage=stage):
+            nonlocal deleted
+            key = f'{stage}:{obj.id}'
+            try:
+                # Channel deletes are per channel, role deletes per guild
+                major = obj.guild.id if stage == 'roles' else obj.id
+                async with limit, discord_writes.slot(f'{stage}.delete', major, BULK):
+                    await obj.delete(reason=reason)
+                deleted += 1
+                if journal is not None:
+                    journal.complete(key)
+            except discord.NotFound:
+                if journal is not None:
+                    journal.complete(key)
+            except Exception as e:
+                logger.error(f'Failed to delete {obj.name} ({obj.id}): {e}')
+                failed.append((obj.name, str(e)))
+                if journal is not None:
+                    journal.fail(key, str(e))
+            await tracker.tick(obj.name)
+
+        await asyncio.gather(*(delete(obj) for obj in objects))
+
+    return {'deleted': deleted, 'failed': failed}
@@ -0,0 +1,331 @@
+"""
+Tournament start: planning and execution.
+
+``plan_tournament_start`` works out every category, role, channel, overwrite
+and message for a league before anything is created. ``execute_start_plan``
+then creates the Discord objects with bounded concurrency, writes the
+division and team rows and reports throttled progress. Both the
+``/tournament start`` command and the admin panel use the same pair.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from modules.logging_config import get_logger
+from .checks import Checks
+from .discord_queue import discord_writes, BULK
+
+logger = get_logger('drawbridge.tournament_start')
+checks = Checks()
+
+# Role and channel creation share guild-wide route buckets, so only a few run
+# at once; messages are rate limited per channel and can go wider.
+GUILD_WRITE_CONCURRENCY = int(os.getenv('TOURNAMENT_START_CONCURRENCY', '4'))
+MESSAGE_CONCURRENCY = int(os.getenv('TOURNAMENT_START_MESSAGE_CONCURRENCY', '10'))
+PROGRESS_INTERVAL = float(os.getenv('TOURNAMENT_START_PROGRESS_INTERVAL', '2'))
+
+
+def _visible() -> discord.PermissionOverwrite:
+    return discord.PermissionOverwrite(view_channel=True, send_messages=True)
+
+
+def _resolve_roles(guild: discord.Guild, *role_names) -> List[discord.Role]:
+    roles = []
+    for role_id in checks._get_role_ids(*role_names):
+        role = guild.get_role(role_id)
+        if role is not None:
+            roles.append(role)
+    return roles
+
+
+def _team_names(name: str, league_shortcode: str) -> Dict[str, str]:
+    """Role, channel and DB names for a roster, trimmed to what Discord accepts."""
+    team_name = f'{name[:47]}...' if len(name) > 50 else name
+    channel_name = f'🛡️{team_name} ({league_shortcode})'
+    if len(channel_name) > 45:
+        channel_name = f'🛡️{team_name[:20]} ({league_shortcode})'
+    return {
+        'team_name': team_name,
+        'role_name': f'{team_name} ({league_shortcode})',
+        'channel_name': channel_name,
+    }
+
+
+def plan_tournament_start(guild: discord.Guild, league_id: int, league, league_shortcode: str,
+                          extra_roles: List[discord.Role], team_message: str) -> Dict[str, Any]:
+    """Compute everything a tournament start will create, without touching Discord.
+
+    Returns ``{'league_id', 'league_name', 'league_shortcode', 'team_message',
+    'team_overwrites', 'divisions': [{'name', 'category_name', 'role_name',
+    'category_overwrites', 'teams': [...]}]}``. Team channel overwrites are
+    ``team_overwrites`` plus the team's own role, which only exists once
+    created.
+    """
+    category_overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False)}
+    for role in _resolve_roles(guild, 'HEAD', 'ADMIN', '!AC', 'TRIAL', 'DEVELOPER', 'APPROVED', '!UNAPPROVED', 'BOT'):
+        category_overwrites[role] = _visible()
+    for role in extra_roles:
+        category_overwrites[role] = _visible()
+
+    team_overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False, send_messages=False)}
+    for role in _resolve_roles(guild, 'HEAD', 'ADMIN', 'TRIAL', 'DEVELOPER', 'BOT'):
+        team_overwrites[role] = _visible()
+    for role in extra_roles:
+        team_overwrites[role] = _visible()
+
+    divisions: Dict[str, Dict[str, Any]] = {}
+    for roster in league.rosters:
+        div = roster['division']
+        if div not in divisions:
+            divisions[div] = {
+                'name': div,
+                'category_name': f'{div} - {league_shortcode}',
+                'role_name': f'{div} - {league_shortcode}',
+                'category_overwrites': category_overwrites,
+                'teams': [],
+            }
+        divisions[div]['teams'].append({
+            'roster_id': roster['id'],
+            'team_id': roster['team_id'],
+            **_team_names(roster['name'], league_shortcode),
+        })
+
+    return {
+        'league_id': league_id,
+        'league_name': league.name,
+        'league_shortcode': league_shortcode,
+        'team_message': team_message,
+        'team_overwrites': team_overwrites,
+        'divisions': list(divisions.values()),
+    }
+
+
+class ProgressThrottle:
+    """Call ``callback(done, total, last)`` at most once per interval, and on the last item.
+
+    The callback may be sync or async; errors from it are logged and ignored.
+    """
+
+    def __init__(self, callback: Optional[Callable], total: int, interval: float):
+        self.callback = callback
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self._last_sent = 0.0
+
+    async def tick(self, last: str):
+        self.done += 1
+        now = time.monotonic()
+        if self.callback is None or (now - self._last_sent < self.interval and self.done < self.total):
+            return
+        self._last_sent = now
+        try:
+            result = self.callback(self.done, self.total, last)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            # A failed progress edit must never abort the operation
+            logger.warning(f'Progress update failed: {e}')
+
+
+def _team_message(plan: Dict[str, Any], functions, division: Dict, team: Dict,
+                  role: discord.Role, channel: discord.TextChannel) -> Dict[str, Any]:
+    substitutions = {
+        '{TEAM_MENTION}': f'<@&{role.id}>',
+        '{TEAM_NAME}': team['team_name'],
+        '{TEAM_ID}': team['team_id'],
+        '{DIVISION}': division['name'],
+        '{LEAGUE_NAME}': plan['league_name'],
+        '{LEAGUE_SHORTCODE}': plan['league_shortcode'],
+        '{CHANNEL_ID}': str(channel.id),
+        '{CHANNEL_LINK}': f'<#{channel.id}>',
+    }
+    message = json.loads(functions.substitute_strings_in_embed(str(plan['team_message']), substitutions))
+    message['embed'] = discord.Embed(**message['embeds'][0])
+    del message['embeds']
+    return message
+
+
+def plan_steps(plan: Dict[str, Any]) -> List[str]:
+    """Journal step keys for a start plan, in execution order."""
+    keys = []
+    for division in plan['divisions']:
+        keys += [f"division:{division['name']}:{part}" for part in ('category', 'role', 'row')]
+    for division in plan['divisions']:
+        for team in division['teams']:
+            keys += [f"team:{team['roster_id']}:{part}" for part in ('role', 'channel', 'message', 'row')]
+    return keys
+
+
+async def _journaled(journal, key: str, lookup: Callable, create: Callable):
+    """Reuse what a completed step created if it still exists, else create and record it."""
+    if journal is not None:
+        recorded = journal.result(key)
+        if recorded:
+            existing = lookup(recorded['id'])
+            if existing is not None:
+                return existing
+    created = await create()
+    if journal is not None:
+        journal.complete(key, {'id': created.id})
+    return created
+
+
+async def execute_start_plan(plan: Dict[str, Any], guild: discord.Guild, db, functions,
+                             progress: Optional[Callable] = None,
+                             concurrency: Optional[int] = None,
+                             message_concurrency: Optional[int] = None,
+                             progress_interval: Optional[float] = None,
+                             journal=None) -> Dict[str, Any]:
+    """Create everything in a start plan.
+
+    Division categories and roles are created first (their rows are needed by
+    the teams), then every team's role, channel and welcome message run
+    concurrently. Team rows are written in one batch at the end. A team that
+    fails is reported and skipped rather than aborting the rest; if its
+    channel could not be made its role is removed again.
+
+    With a journal (see ``operations.OperationJournal``) every step is
+    recorded as it completes, and steps a previous run completed are skipped,
+    reusing the objects they created.
+
+    ``progress(done, total, last_team_name)`` may be sync or async and is
+    called at most once per ``progress_interval`` seconds, plus once at the end.
+    Returns ``{'divisions', 'teams', 'failed': [(team name, error)]}``.
+    """
+    league_id = plan['league_id']
+    guild_writes = asyncio.Semaphore(concurrency or GUILD_WRITE_CONCURRENCY)
+    message_writes = asyncio.Semaphore(message_concurrency or MESSAGE_CONCURRENCY)
+    total = sum(len(d['teams']) for d in plan['divisions'])
+    tracker = ProgressThrottle(progress, total, PROGRESS_INTERVAL if progress_interval is None else progress_interval)
+    if journal is not None:
+        journal.plan(plan_steps(plan))
+
+    async def guarded(route, factory):
+        async with guild_writes, discord_writes.slot(route, guild.id, BULK):
+            return await factory()
+
+    async def create_division(division):
+        key = f"division:{division['name']}"
+        category = await _journaled(
+            journal, f'{key}:category', guild.get_channel,
+            lambda: guarded('channel.create', lambda: guild.create_category(division['category_name'], overwrites=division['category_overwrites'])),
+        )
+        role = await _journaled(
+            journal, f'{key}:role', guild.get_role,
+            lambda: guarded('role.create', lambda: guild.create_role(name=division['role_name'])),
+        )
+        recorded = journal.result(f'{key}:row') if journal is not None else None
+        # The row may have gone with a cleanup since it was recorded
+        if recorded and db.divisions.get_by_id(recorded['id']):
+            return category, recorded['id']
+        division_id = db.divisions.insert({
+            'league_id': league_id,
+            'division_name': division['name'],
+            'role_id': role.id,
+            'category_id': category.id,
+        })
+        if journal is not None:
+            journal.complete(f'{key}:row', {'id': division_id})
+        return category, division_id
+
+    created = await asyncio.gather(*(create_division(d) for d in plan['divisions']))
+
+    rows: List[Dict[str, Any]] = []
+    failed: List[tuple] = []
+
+    async def create_team(division, category, division_id, team):
+        key = f"team:{team['roster_id']}"
+        role = None
+        try:
+            role = await _journaled(
+                journal, f'{key}:role', guild.get_role,
+                lambda: guarded('role.create', lambda: guild.create_role(name=team['role_name'], mentionable=True)),
+            )
+            overwrites = dict(plan['team_overwrites'])
+            overwrites[role] = _visible()
+            channel = await _journaled(
+                journal, f'{key}:channel', guild.get_channel,
+                lambda: guarded('channel.create', lambda: guild.create_text_channel(team['channel_name'], category=category, overwrites=overwrites)),
+            )
+        except Exception as e:
+            logger.error(f"Failed to create role/channel for {team['team_name']}: {e}")
+            failed.append((team['team_name'], str(e)))
+            if journal is not None:
+                journal.fail(f'{key}:channel', str(e))
+            if role is not None:
+                try:
+                    async with discord_writes.slot('role.delete', guild.id, BULK):
+                        await role.delete(reason='Tournament start: team channel could not be created')
+                    if journal is not None:
+                        journal.fail(f'{key}:role', 'removed after channel creation failed')
+                except discord.HTTPException:
+                    pass
+            await tracker.tick(team['team_name'])
+            return
+
+        # Sent to this channel already; a recreated channel needs it again
+        sent = journal is not None and journal.is_done(f'{key}:message') \
+            and journal.result(f'{key}:message').get('channel', channel.id) == channel.id
+        if not sent:
+            try:
+                async with message_writes, discord_writes.slot('message.send', channel.id, BULK):
+                    await channel.send(**_team_message(plan, functions, division, team, role, channel))
+                if journal is not None:
+                    journal.complete(f'{key}:message', {'channel': channel.id})
+            except Exception as e:
+                # The team is usable without its welcome message
+                logger.error(f"Failed to send team message for {team['team_name']}: {e}")
+                failed.append((team['team_name'], f'welcome message: {e}'))
+                if journal is not None:
+                    journal.fail(f'{key}:message', str(e))
+
+        rows.append({
+            'roster_id': team['roster_id'],
+            'team_id': team['team_id'],
+            'league_id': league_id,
+            'role_id': role.id,
+            'team_channel': channel.id,
+            'division': division_id,
+            'team_name': team['team_name'],
+        })
+        await tracker.tick(team['team_name'])
+
+    await asyncio.gather(*(
+        create_team(division, category, division_id, team)
+        for division, (category, division_id) in zip(plan['divisions'], created)
+        for team in division['teams']
+    ))
+
+    # Rows a previous run already wrote, and that are still there, are skipped
+    existing = {t['roster_id'] for t in db.teams.get_by_league(league_id)} if journal is not None else set()
+    pending = [r for r in rows
+               if journal is None or not (journal.is_done(f"team:{r['roster_id']}:row") and r['roster_id'] in existing)]
+    if pending:
+        db.teams.insert_many(pending)
+        if journal is not None:
+            for row in pending:
+                journal.complete(f"team:{row['roster_id']}:row")
+
+    return {'divisions': len(created), 'teams': len(rows), 'failed': failed}
+
+
+def seed_league(db, league_id: int, league_name: str, league_shortcode: str):
+    """Insert or update the league row so names are available without Citadel."""
+    try:
+        if db.leagues.get_by_id(league_id):
+            db.leagues.update(league_id, {'league_name': league_name, 'league_shortcode': league_shortcode})
+        else:
+            db.leagues.insert({
+                'league_id': league_id,
+                'league_name': league_name,
+                'league_shortcode': league_shortcode,
+            })
+    except Exception as e:
+        logger.warning(f'Failed to seed league {league_id}: {e}')
@@ -91,6 +91,23 @@ class BaseRepository(ABC):
             self.db.db_logger.log_error("_execute_query", e)
             raise DatabaseError(f"Query execution failed: {e}") from e
 
+    def _execute_many(self, query: str, params_list: List[Tuple]) -> int:
+        """Execute a modifying query once per parameter tuple in a single transaction."""
+        if not params_list:
+            return 0
+        self.db.db_logger.log_query(query, params_list[0])
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(query, params_list)
+                conn.commit()
+                result = cursor.rowcount or 0
+                self.logger.debug(f"Batch query executed for {len(params_list)} rows, affected rows: {result}")
+                return result
+        except Exception as e:
+            self.db.db_logger.log_error("_execute_many", e)
+            raise DatabaseError(f"Query execution failed: {e}") from e
+
     def _fetch_one(self, query: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         """Execute a query that returns a single result."""
         self.db.db_logger.log_query(query, params)
@@ -19,7 +19,9 @@ from .repositories import (
     AwardVotesRepository, AwardVoteAuditLogRepository,
     AwardResultsRepository, AwardAdminFillOptionsRepository,
     TournamentScheduleSettingsRepository, TeamAvailabilityRepository,
-    MatchSchedulesRepository,
+    MatchSchedulesRepository, MatchResultsRepository,
+    LaunchpadMessagesRepository, OperationsRepository, OperationStepsRepository,
+    CommandSyncRepository,
 )
 
 
@@ -76,6 +78,11 @@ class Database:
         self.tournament_schedule_settings = TournamentScheduleSettingsRepository(self.connection)
         self.team_availability = TeamAvailabilityRepository(self.connection)
         self.match_schedules = MatchSchedulesRepository(self.connection)
+        self.match_results = MatchResultsRepository(self.connection)
+        self.launchpad_messages = LaunchpadMessagesRepository(self.connection)
+        self.operations = OperationsRepository(self.connection)
+        self.operation_steps = OperationStepsRepository(self.connection)
+        self.command_sync = CommandSyncRepository(self.connection)
 
         # Initialize migration manager
         self.migrations = MigrationManager(self.connection)
@@ -169,7 +176,8 @@ class Database:
 
     def cleanup_league(self, league_id: int) -> bool:
         """
-        Clean up all data for a league (matches, teams, divisions).
+        Clean up all data for a league (schedules, results, matches, teams,
+        divisions and the league itself) in a single transaction.
 
         Args:
             league_id: The ID of the league to clean up
@@ -177,13 +185,16 @@ class Database:
         Returns:
             True if successful
         """
+        # Delete in order to respect foreign key constraints, all or nothing
+        repositories = [self.match_schedules, self.match_results, self.matches,
+                        self.teams, self.divisions, self.leagues]
         try:
-            # Delete in order to respect foreign key constraints
-            self.match_schedules.delete_by_league(league_id)
-            self.matches.delete_by_league(league_id)
-            self.teams.delete_by_league(league_id)
-            self.divisions.delete_by_league(league_id)
-            self.leagues.delete(league_id)
+            with self.connection.get_connection() as conn:
+                cursor = conn.cursor()
+                for repository in repositories:
+                    cursor.execute(f"DELETE FROM {repository.table} WHERE league_id = ?", (league_id,))
+                conn.commit()
+            self.teams.mark_changed()
             return True
         except Exception as e:
             self.connection.logger.error(f"Error cleaning up league {league_id}: {e}")
@@ -0,0 +1,6 @@
+CREATE TABLE `command_sync` (
+  `guild_id` bigint(20) NOT NULL,
+  `tree_hash` char(64) NOT NULL COMMENT 'sha256 of the synced application command payloads',
+  `synced_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`guild_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
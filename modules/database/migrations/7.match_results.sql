@@ -0,0 +1,17 @@
+CREATE TABLE `match_results` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `match_id` int(11) NOT NULL,
+  `league_id` int(11) NOT NULL,
+  `log_id` int(11) NOT NULL COMMENT 'logs.tf log id',
+  `map_name` varchar(64) DEFAULT NULL,
+  `home_side` varchar(4) NOT NULL COMMENT 'Red | Blue',
+  `home_score` int(11) NOT NULL DEFAULT 0,
+  `away_score` int(11) NOT NULL DEFAULT 0,
+  `identified_players` int(11) NOT NULL DEFAULT 0 COMMENT 'log players found on either roster',
+  `unidentified_players` int(11) NOT NULL DEFAULT 0 COMMENT 'ringers / unlinked accounts',
+  `detected_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `log_id` (`log_id`),
+  KEY `match_id` (`match_id`),
+  KEY `league_id` (`league_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
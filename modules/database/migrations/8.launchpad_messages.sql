@@ -0,0 +1,8 @@
+CREATE TABLE `launchpad_messages` (
+  `channel_id` bigint(20) NOT NULL,
+  `position` int(11) NOT NULL COMMENT '0-based order of the chunk in the channel',
+  `message_id` bigint(20) NOT NULL,
+  `content_hash` char(64) NOT NULL COMMENT 'sha256 of the chunk content',
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`channel_id`, `position`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
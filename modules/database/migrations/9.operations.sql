@@ -0,0 +1,25 @@
+CREATE TABLE `operations` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `kind` varchar(32) NOT NULL COMMENT 'start | end | matchgenround | fixperms',
+  `league_id` int(11) DEFAULT NULL,
+  `params` text DEFAULT NULL COMMENT 'JSON arguments the operation was started with',
+  `status` varchar(16) NOT NULL DEFAULT 'running' COMMENT 'running | completed | failed | interrupted | dismissed',
+  `started_by` varchar(100) DEFAULT NULL,
+  `error` text DEFAULT NULL,
+  `started_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`id`),
+  KEY `kind_league` (`kind`, `league_id`),
+  KEY `status` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `operation_steps` (
+  `operation_id` int(11) NOT NULL,
+  `step_key` varchar(191) NOT NULL,
+  `status` varchar(16) NOT NULL DEFAULT 'pending' COMMENT 'pending | done | failed',
+  `result` text DEFAULT NULL COMMENT 'JSON, e.g. ids of created Discord objects',
+  `error` text DEFAULT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`operation_id`, `step_key`),
+  KEY `status` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
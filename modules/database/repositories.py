@@ -7,7 +7,8 @@ Individual repository classes for each database table.
 :copyright: (c) 2024-present ozfortress
 """
 
-from typing import Dict, List, Optional, Any
+import json
+from typing import Dict, List, Optional, Any, Tuple
 from .base import BaseRepository
 
 
@@ -157,6 +158,11 @@ class TeamsRepository(BaseRepository):
 
     def __init__(self, db_connection):
         super().__init__(db_connection, 'teams')
+        # Bumped on every write, so caches of team rows know to reload
+        self.generation = 0
+
+    def mark_changed(self):
+        self.generation += 1
 
     def get_by_id(self, roster_id: int) -> Optional[Dict[str, Any]]:
         """Get a team by its roster ID."""
@@ -168,6 +174,14 @@ class TeamsRepository(BaseRepository):
         query = f"SELECT * FROM {self.table} WHERE team_id = ?"
         return self._fetch_one(query, (team_id,))
 
+    def get_by_team_ids(self, team_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get every team row (one per league) for the given team IDs."""
+        if not team_ids:
+            return []
+        placeholders = ','.join('?' * len(team_ids))
+        query = f"SELECT * FROM {self.table} WHERE team_id IN ({placeholders})"
+        return self._fetch_all(query, tuple(team_ids))
+
     def get_by_team_and_league(self, team_id: int, league_id: int) -> Optional[Dict[str, Any]]:
         """Get a team by team ID and league ID (handles multi-league teams)."""
         query = f"SELECT * FROM {self.table} WHERE team_id = ? AND league_id = ?"
@@ -183,6 +197,14 @@ class TeamsRepository(BaseRepository):
         query = f"SELECT * FROM {self.table} WHERE role_id = ?"
         return self._fetch_one(query, (role_id,))
 
+    def get_by_role_ids(self, role_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get the teams with any of the given Discord role IDs."""
+        if not role_ids:
+            return []
+        placeholders = ','.join('?' * len(role_ids))
+        query = f"SELECT * FROM {self.table} WHERE role_id IN ({placeholders})"
+        return self._fetch_all(query, tuple(role_ids))
+
     def get_by_league(self, league_id: int) -> List[Dict[str, Any]]:
         """Get all teams in a league."""
         query = f"SELECT * FROM {self.table} WHERE league_id = ?"
@@ -209,10 +231,32 @@ class TeamsRepository(BaseRepository):
             INSERT INTO {self.table} (roster_id, team_id, league_id, role_id, team_channel, division, team_name)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """
-        return self._execute_query(query, (
+        result = self._execute_query(query, (
             team['roster_id'], team['team_id'], team['league_id'],
             team['role_id'], team['team_channel'], team['division'], team['team_name']
         ))
+        self.mark_changed()
+        return result
+
+    def insert_many(self, teams: List[Dict[str, Any]]) -> int:
+        """Insert several teams in one batch."""
+        required_fields = ['roster_id', 'team_id', 'league_id', 'role_id', 'team_channel', 'division', 'team_name']
+
+        for team in teams:
+            if not all(field in team for field in required_fields):
+                raise ValueError(f"Missing required fields: {required_fields}")
+
+        query = f"""
+            INSERT INTO {self.table} (roster_id, team_id, league_id, role_id, team_channel, division, team_name)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        result = self._execute_many(query, [
+            (team['roster_id'], team['team_id'], team['league_id'],
+             team['role_id'], team['team_channel'], team['division'], team['team_name'])
+            for team in teams
+        ])
+        self.mark_changed()
+        return result
 
     def update(self, roster_id: int, team: Dict[str, Any]) -> bool:
         """Update an existing team."""
@@ -233,18 +277,21 @@ class TeamsRepository(BaseRepository):
             updated_data['division'], updated_data['team_name'],
             roster_id
         ))
+        self.mark_changed()
         return result > 0
 
     def delete(self, roster_id: int) -> bool:
         """Delete a team by its roster ID."""
         query = f"DELETE FROM {self.table} WHERE roster_id = ?"
         result = self._execute_query(query, (roster_id,))
+        self.mark_changed()
         return result > 0
 
     def delete_by_league(self, league_id: int) -> bool:
         """Delete all teams in a league."""
         query = f"DELETE FROM {self.table} WHERE league_id = ?"
         result = self._execute_query(query, (league_id,))
+        self.mark_changed()
         return result > 0
 
     def count_by_league(self, league_id: int) -> int:
@@ -310,6 +357,24 @@ class MatchesRepository(BaseRepository):
             match['team_away'], match['channel_id'], match['league_id']
         ))
 
+    def insert_many(self, matches: List[Dict[str, Any]]) -> int:
+        """Insert several matches in one batch. ``archived`` defaults to 0."""
+        required_fields = ['match_id', 'division', 'team_home', 'team_away', 'channel_id', 'league_id']
+
+        for match in matches:
+            if not all(field in match for field in required_fields):
+                raise ValueError(f"Missing required fields: {required_fields}")
+
+        query = f"""
+            INSERT INTO {self.table} (match_id, division, team_home, team_away, channel_id, archived, league_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._execute_many(query, [
+            (match['match_id'], match['division'], match['team_home'],
+             match['team_away'], match['channel_id'], match.get('archived', 0), match['league_id'])
+            for match in matches
+        ])
+
     def update(self, match_id: int, match: Dict[str, Any]) -> bool:
         """Update an existing match."""
         existing = self.get_by_id(match_id)
@@ -473,6 +538,27 @@ class SyncedUsersRepository(BaseRepository):
             user['citadel_id'], user['discord_id'], user['steam_id']
         ))
 
+    def upsert_many(self, users: List[Dict[str, Any]]) -> int:
+        """Insert or refresh many synced users in one transaction.
+
+        A row matching on any unique key (citadel, Discord or Steam id) is
+        updated in place, so relinked accounts move rather than collide.
+        """
+        required_fields = ['citadel_id', 'discord_id', 'steam_id']
+        for user in users:
+            if not all(field in user for field in required_fields):
+                raise ValueError(f"Missing required fields: {required_fields}")
+
+        query = f"""
+            INSERT INTO {self.table} (citadel_id, discord_id, steam_id, time_created, time_modified)
+            VALUES (?, ?, ?, NOW(), NOW())
+            ON DUPLICATE KEY UPDATE citadel_id = VALUES(citadel_id), discord_id = VALUES(discord_id),
+                steam_id = VALUES(steam_id), time_modified = NOW()
+        """
+        return self._execute_many(query, [
+            (user['citadel_id'], user['discord_id'], user['steam_id']) for user in users
+        ])
+
     def update(self, discord_id: int, user: Dict[str, Any]) -> bool:
         """Update an existing synced user."""
         existing = self.get_by_id(discord_id)
@@ -1352,10 +1438,24 @@ class TeamAvailabilityRepository(BaseRepository):
 
 
 class MatchSchedulesRepository(BaseRepository):
-    """Repository for match_schedules table (per-match propose/confirm workflow)."""
+    """Repository for match_schedules table (per-match propose/confirm workflow).
+
+    ``deadline_listener(match_id, deadline_at)`` is called after every write
+    that sets, moves or clears a pending deadline (``None`` when there is no
+    longer one to enforce), so an in-process timer can follow along.
+    """
 
     def __init__(self, db_connection):
         super().__init__(db_connection, 'match_schedules')
+        self.deadline_listener = None
+
+    def _deadline_changed(self, match_id: int, deadline_at):
+        if self.deadline_listener is None:
+            return
+        try:
+            self.deadline_listener(match_id, deadline_at)
+        except Exception as e:
+            self.logger.warning(f"Deadline listener failed for match {match_id}: {e}")
 
     def get_by_id(self, match_id: int) -> Optional[Dict[str, Any]]:
         return self.get_by_match_id(match_id)
@@ -1373,7 +1473,7 @@ class MatchSchedulesRepository(BaseRepository):
         for f in ('match_id', 'league_id'):
             if f not in data:
                 raise ValueError(f"Missing required field: {f}")
-        return self._execute_query(
+        result = self._execute_query(
             f"""INSERT INTO {self.table}
                 (match_id, league_id, status, deadline_at)
                 VALUES (?, ?, ?, ?)""",
@@ -1382,13 +1482,34 @@ class MatchSchedulesRepository(BaseRepository):
                 data.get('status', 'pending'), data.get('deadline_at'),
             )
         )
+        if data.get('deadline_at') and data.get('status', 'pending') != 'confirmed':
+            self._deadline_changed(data['match_id'], data['deadline_at'])
+        return result
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert several schedule rows in one batch; matches that already have one are left alone."""
+        for data in rows:
+            for f in ('match_id', 'league_id'):
+                if f not in data:
+                    raise ValueError(f"Missing required field: {f}")
+        result = self._execute_many(
+            f"""INSERT IGNORE INTO {self.table}
+                (match_id, league_id, status, deadline_at)
+                VALUES (?, ?, ?, ?)""",
+            [(data['match_id'], data['league_id'], data.get('status', 'pending'), data.get('deadline_at'))
+             for data in rows]
+        )
+        for data in rows:
+            if data.get('deadline_at') and data.get('status', 'pending') != 'confirmed':
+                self._deadline_changed(data['match_id'], data['deadline_at'])
+        return result
 
     def update(self, match_id: int, data: Dict[str, Any]) -> bool:
         existing = self.get_by_match_id(match_id)
         if not existing:
             raise ValueError(f"Match schedule {match_id} not found")
         merged = {**existing, **data}
-        return self._execute_query(
+        result = self._execute_query(
             f"""UPDATE {self.table}
                 SET status = ?, proposed_day = ?, proposed_time = ?, proposed_by_team = ?,
                     proposed_by_user = ?, proposed_at = ?, scheduled_at = ?,
@@ -1402,6 +1523,9 @@ class MatchSchedulesRepository(BaseRepository):
                 match_id,
             )
         ) > 0
+        pending = merged['status'] != 'confirmed' and not merged.get('deadline_flagged')
+        self._deadline_changed(match_id, merged.get('deadline_at') if pending else None)
+        return result
 
     def set_proposal(self, match_id: int, day: int, time: str,
                      team_id: int, user_id: int) -> bool:
@@ -1414,14 +1538,20 @@ class MatchSchedulesRepository(BaseRepository):
             (day, time, team_id, user_id, match_id)
         ) > 0
 
+    def get_confirmed(self) -> List[Dict[str, Any]]:
+        """All schedules with an agreed time."""
+        return self._fetch_all(f"SELECT * FROM {self.table} WHERE status = 'confirmed'")
+
     def set_confirmed(self, match_id: int, scheduled_at_utc) -> bool:
         """Lock in the agreed time (status -> confirmed)."""
-        return self._execute_query(
+        result = self._execute_query(
             f"""UPDATE {self.table}
                 SET status = 'confirmed', scheduled_at = ?
                 WHERE match_id = ?""",
             (scheduled_at_utc, match_id)
         ) > 0
+        self._deadline_changed(match_id, None)
+        return result
 
     def set_message_id(self, match_id: int, message_id) -> bool:
         """Store (or clear, with None) the Discord message id of the scheduling prompt."""
@@ -1432,16 +1562,26 @@ class MatchSchedulesRepository(BaseRepository):
 
     def set_flagged(self, match_id: int) -> bool:
         """Mark that the past-deadline warning has been posted."""
-        return self._execute_query(
+        result = self._execute_query(
             f"UPDATE {self.table} SET deadline_flagged = 1 WHERE match_id = ?",
             (match_id,)
         ) > 0
+        self._deadline_changed(match_id, None)
+        return result
 
-    def get_overdue(self, now_utc) -> List[Dict[str, Any]]:
+    def get_overdue(self, now_utc, match_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """Unconfirmed schedules past their deadline whose match is not archived.
 
-        Returns the schedule row plus the match's channel/team columns.
+        Returns the schedule row plus the match's channel/team columns,
+        optionally only for the given matches.
         """
+        id_filter = ''
+        params: Tuple = (now_utc,)
+        if match_ids is not None:
+            if not match_ids:
+                return []
+            id_filter = f"AND ms.match_id IN ({', '.join('?' for _ in match_ids)})"
+            params += tuple(match_ids)
         return self._fetch_all(
             f"""SELECT ms.*, m.channel_id, m.team_home, m.team_away, m.division
                 FROM {self.table} ms
@@ -1450,15 +1590,331 @@ class MatchSchedulesRepository(BaseRepository):
                   AND ms.deadline_at IS NOT NULL
                   AND ms.deadline_at < ?
                   AND m.archived = 0
+                  {id_filter}
                 ORDER BY ms.deadline_at""",
-            (now_utc,)
+            params
+        )
+
+    def get_pending_deadlines(self) -> List[Dict[str, Any]]:
+        """``match_id`` and ``deadline_at`` of every deadline still to be enforced."""
+        return self._fetch_all(
+            f"""SELECT ms.match_id, ms.deadline_at
+                FROM {self.table} ms
+                JOIN matches m ON ms.match_id = m.match_id
+                WHERE ms.status != 'confirmed'
+                  AND ms.deadline_at IS NOT NULL
+                  AND ms.deadline_flagged = 0
+                  AND m.archived = 0"""
         )
 
     def delete(self, match_id: int) -> bool:
         return self.delete_by_match(match_id)
 
+    def delete_by_match(self, match_id: int) -> bool:
+        result = self._execute_query(f"DELETE FROM {self.table} WHERE match_id = ?", (match_id,)) > 0
+        self._deadline_changed(match_id, None)
+        return result
+
+    def delete_by_league(self, league_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE league_id = ?", (league_id,)) > 0
+
+
+class MatchResultsRepository(BaseRepository):
+    """Repository for match_results table (map results detected from logs.tf)."""
+
+    def __init__(self, db_connection):
+        super().__init__(db_connection, 'match_results')
+
+    def get_by_id(self, result_id: int) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(f"SELECT * FROM {self.table} WHERE id = ?", (result_id,))
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return self._fetch_all(f"SELECT * FROM {self.table}")
+
+    def get_by_match(self, match_id: int) -> List[Dict[str, Any]]:
+        return self._fetch_all(
+            f"SELECT * FROM {self.table} WHERE match_id = ? ORDER BY detected_at",
+            (match_id,)
+        )
+
+    def get_by_log_id(self, log_id: int) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(f"SELECT * FROM {self.table} WHERE log_id = ?", (log_id,))
+
+    def get_by_league(self, league_id: int) -> List[Dict[str, Any]]:
+        return self._fetch_all(
+            f"SELECT * FROM {self.table} WHERE league_id = ? ORDER BY match_id, detected_at",
+            (league_id,)
+        )
+
+    def insert(self, data: Dict[str, Any]) -> Optional[int]:
+        """Record a map result. Re-detecting the same log replaces its row."""
+        for f in ('match_id', 'league_id', 'log_id', 'home_side'):
+            if f not in data:
+                raise ValueError(f"Missing required field: {f}")
+        return self._execute_query(
+            f"""INSERT INTO {self.table}
+                (match_id, league_id, log_id, map_name, home_side, home_score, away_score,
+                 identified_players, unidentified_players)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON DUPLICATE KEY UPDATE
+                    match_id = VALUES(match_id), league_id = VALUES(league_id),
+                    map_name = VALUES(map_name), home_side = VALUES(home_side),
+                    home_score = VALUES(home_score), away_score = VALUES(away_score),
+                    identified_players = VALUES(identified_players),
+                    unidentified_players = VALUES(unidentified_players)""",
+            (
+                data['match_id'], data['league_id'], data['log_id'], data.get('map_name'),
+                data['home_side'], data.get('home_score', 0), data.get('away_score', 0),
+                data.get('identified_players', 0), data.get('unidentified_players', 0),
+            )
+        )
+
+    def update(self, result_id: int, data: Dict[str, Any]) -> bool:
+        existing = self.get_by_id(result_id)
+        if not existing:
+            raise ValueError(f"Match result {result_id} not found")
+        merged = {**existing, **data}
+        return self._execute_query(
+            f"""UPDATE {self.table}
+                SET map_name = ?, home_side = ?, home_score = ?, away_score = ?
+                WHERE id = ?""",
+            (merged.get('map_name'), merged['home_side'], merged['home_score'], merged['away_score'], result_id)
+        ) > 0
+
+    def delete(self, result_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE id = ?", (result_id,)) > 0
+
     def delete_by_match(self, match_id: int) -> bool:
         return self._execute_query(f"DELETE FROM {self.table} WHERE match_id = ?", (match_id,)) > 0
 
     def delete_by_league(self, league_id: int) -> bool:
         return self._execute_query(f"DELETE FROM {self.table} WHERE league_id = ?", (league_id,)) > 0
+
+
+class LaunchpadMessagesRepository(BaseRepository):
+    """Repository for launchpad_messages table (message ids of the launchpad chunks)."""
+
+    def __init__(self, db_connection):
+        super().__init__(db_connection, 'launchpad_messages')
+
+    def get_by_id(self, message_id: int) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(f"SELECT * FROM {self.table} WHERE message_id = ?", (message_id,))
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return self._fetch_all(f"SELECT * FROM {self.table} ORDER BY channel_id, position")
+
+    def get_by_channel(self, channel_id: int) -> List[Dict[str, Any]]:
+        return self._fetch_all(
+            f"SELECT * FROM {self.table} WHERE channel_id = ? ORDER BY position",
+            (channel_id,)
+        )
+
+    def insert(self, data: Dict[str, Any]) -> Optional[int]:
+        """Store the message for a chunk position, replacing whatever was there."""
+        for f in ('channel_id', 'position', 'message_id', 'content_hash'):
+            if f not in data:
+                raise ValueError(f"Missing required field: {f}")
+        return self._execute_query(
+            f"""INSERT INTO {self.table} (channel_id, position, message_id, content_hash)
+                VALUES (?, ?, ?, ?)
+                ON DUPLICATE KEY UPDATE message_id = VALUES(message_id), content_hash = VALUES(content_hash)""",
+            (data['channel_id'], data['position'], data['message_id'], data['content_hash'])
+        )
+
+    def update(self, message_id: int, data: Dict[str, Any]) -> bool:
+        return self._execute_query(
+            f"UPDATE {self.table} SET content_hash = ? WHERE message_id = ?",
+            (data['content_hash'], message_id)
+        ) > 0
+
+    def delete(self, message_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE message_id = ?", (message_id,)) > 0
+
+    def delete_from_position(self, channel_id: int, position: int) -> bool:
+        """Forget every chunk at or after position (surplus after a shrink)."""
+        return self._execute_query(
+            f"DELETE FROM {self.table} WHERE channel_id = ? AND position >= ?",
+            (channel_id, position)
+        ) > 0
+
+    def delete_by_channel(self, channel_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE channel_id = ?", (channel_id,)) > 0
+
+
+class CommandSyncRepository(BaseRepository):
+    """Repository for command_sync table (hash of the last application command tree synced per guild)."""
+
+    def __init__(self, db_connection):
+        super().__init__(db_connection, 'command_sync')
+
+    def get_by_id(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(f"SELECT * FROM {self.table} WHERE guild_id = ?", (guild_id,))
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return self._fetch_all(f"SELECT * FROM {self.table}")
+
+    def get_hash(self, guild_id: int) -> Optional[str]:
+        return self._fetch_scalar(f"SELECT tree_hash FROM {self.table} WHERE guild_id = ?", (guild_id,))
+
+    def insert(self, data: Dict[str, Any]) -> Optional[int]:
+        """Record the hash synced for a guild, replacing the previous one."""
+        for f in ('guild_id', 'tree_hash'):
+            if f not in data:
+                raise ValueError(f"Missing required field: {f}")
+        return self._execute_query(
+            f"""INSERT INTO {self.table} (guild_id, tree_hash) VALUES (?, ?)
+                ON DUPLICATE KEY UPDATE tree_hash = VALUES(tree_hash)""",
+            (data['guild_id'], data['tree_hash'])
+        )
+
+    def update(self, guild_id: int, data: Dict[str, Any]) -> bool:
+        return self._execute_query(
+            f"UPDATE {self.table} SET tree_hash = ? WHERE guild_id = ?",
+            (data['tree_hash'], guild_id)
+        ) > 0
+
+    def delete(self, guild_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE guild_id = ?", (guild_id,)) > 0
+
+
+class OperationsRepository(BaseRepository):
+    """Repository for operations table (journal of bulk tournament operations)."""
+
+    UNFINISHED = ('running', 'failed', 'interrupted')
+
+    def __init__(self, db_connection):
+        super().__init__(db_connection, 'operations')
+
+    def get_by_id(self, operation_id: int) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(f"SELECT * FROM {self.table} WHERE id = ?", (operation_id,))
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return self._fetch_all(f"SELECT * FROM {self.table} ORDER BY id DESC")
+
+    def get_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Latest operations with their step counts."""
+        return self._fetch_all(
+            f"""SELECT o.*,
+                    COUNT(s.step_key) AS total_steps,
+                    COALESCE(SUM(s.status = 'done'), 0) AS done_steps,
+                    COALESCE(SUM(s.status = 'failed'), 0) AS failed_steps
+                FROM {self.table} o
+                LEFT JOIN operation_steps s ON s.operation_id = o.id
+                GROUP BY o.id
+                ORDER BY o.id DESC
+                LIMIT ?""",
+            (limit,)
+        )
+
+    def get_unfinished(self, kind: str, league_id: Optional[int],
+                       scope: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """The latest operation of a kind (for a league) that never completed.
+
+        With ``scope``, only an operation started with those params counts.
+        """
+        placeholders = ', '.join('?' for _ in self.UNFINISHED)
+        rows = self._fetch_all(
+            f"""SELECT * FROM {self.table}
+                WHERE kind = ? AND league_id <=> ? AND status IN ({placeholders})
+                ORDER BY id DESC""",
+            (kind, league_id, *self.UNFINISHED)
+        )
+        for row in rows:
+            params = json.loads(row.get('params') or '{}')
+            if all(params.get(key) == value for key, value in (scope or {}).items()):
+                return row
+        return None
+
+    def dismiss_unfinished(self, league_id: int, keep: Optional[int] = None) -> int:
+        """Dismiss every unfinished operation for a league (except ``keep``)."""
+        placeholders = ', '.join('?' for _ in self.UNFINISHED)
+        return self._execute_query(
+            f"""UPDATE {self.table} SET status = 'dismissed'
+                WHERE league_id = ? AND status IN ({placeholders}) AND NOT id <=> ?""",
+            (league_id, *self.UNFINISHED, keep)
+        )
+
+    def insert(self, data: Dict[str, Any]) -> Optional[int]:
+        if 'kind' not in data:
+            raise ValueError("Missing required field: kind")
+        return self._execute_query(
+            f"INSERT INTO {self.table} (kind, league_id, params, started_by) VALUES (?, ?, ?, ?)",
+            (data['kind'], data.get('league_id'), data.get('params'), data.get('started_by'))
+        )
+
+    def update(self, operation_id: int, data: Dict[str, Any]) -> bool:
+        existing = self.get_by_id(operation_id)
+        if not existing:
+            raise ValueError(f"Operation {operation_id} not found")
+        merged = {**existing, **data}
+        return self._execute_query(
+            f"UPDATE {self.table} SET params = ?, status = ?, error = ? WHERE id = ?",
+            (merged.get('params'), merged['status'], merged.get('error'), operation_id)
+        ) > 0
+
+    def set_status(self, operation_id: int, status: str, error: Optional[str] = None) -> bool:
+        return self._execute_query(
+            f"UPDATE {self.table} SET status = ?, error = ? WHERE id = ?",
+            (status, error, operation_id)
+        ) > 0
+
+    def mark_interrupted(self) -> int:
+        """Flag operations left running by a previous process so they can be resumed."""
+        return self._execute_query(
+            f"UPDATE {self.table} SET status = 'interrupted' WHERE status = 'running'"
+        )
+
+    def delete(self, operation_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE id = ?", (operation_id,)) > 0
+
+
+class OperationStepsRepository(BaseRepository):
+    """Repository for operation_steps table (planned steps of a journalled operation)."""
+
+    def __init__(self, db_connection):
+        super().__init__(db_connection, 'operation_steps')
+
+    def get_by_id(self, key: Tuple[int, str]) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(
+            f"SELECT * FROM {self.table} WHERE operation_id = ? AND step_key = ?", tuple(key)
+        )
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return self._fetch_all(f"SELECT * FROM {self.table}")
+
+    def get_by_operation(self, operation_id: int) -> List[Dict[str, Any]]:
+        return self._fetch_all(
+            f"SELECT * FROM {self.table} WHERE operation_id = ? ORDER BY updated_at, step_key",
+            (operation_id,)
+        )
+
+    def insert(self, data: Dict[str, Any]) -> Optional[int]:
+        for f in ('operation_id', 'step_key'):
+            if f not in data:
+                raise ValueError(f"Missing required field: {f}")
+        return self._execute_query(
+            f"""INSERT INTO {self.table} (operation_id, step_key, status, result, error)
+                VALUES (?, ?, ?, ?, ?)
+                ON DUPLICATE KEY UPDATE status = VALUES(status), result = VALUES(result), error = VALUES(error)""",
+            (data['operation_id'], data['step_key'], data.get('status', 'pending'),
+             data.get('result'), data.get('error'))
+        )
+
+    def insert_pending(self, operation_id: int, step_keys: List[str]) -> int:
+        """Record planned steps, leaving any already journalled untouched."""
+        return self._execute_many(
+            f"INSERT IGNORE INTO {self.table} (operation_id, step_key) VALUES (?, ?)",
+            [(operation_id, key) for key in step_keys]
+        )
+
+    def update(self, key: Tuple[int, str], data: Dict[str, Any]) -> bool:
+        operation_id, step_key = key
+        return self.insert({'operation_id': operation_id, 'step_key': step_key, **data}) > 0
+
+    def delete(self, key: Tuple[int, str]) -> bool:
+        return self._execute_query(
+            f"DELETE FROM {self.table} WHERE operation_id = ? AND step_key = ?", tuple(key)
+        ) > 0
+
+    def delete_by_operation(self, operation_id: int) -> bool:
+        return self._execute_query(f"DELETE FROM {self.table} WHERE operation_id = ?", (operation_id,)) > 0
@@ -0,0 +1,127 @@
+"""
+Import-time profiler for Drawbridge startup.
+
+With IMPORT_PROFILE=1, app.py installs ``ImportProfiler`` before importing
+anything else. It wraps the loader of every module imported from then on and
+records, like ``python -X importtime``, the self and cumulative time each
+module took to execute. Once startup has finished ``log_report`` writes the
+slowest modules and the per-package totals to the log, so slow imports can be
+spotted in a deployed container without changing how it is launched.
+
+This module only uses the standard library so installing it imports nothing
+else; the logger is fetched when the report is written.
+"""
+
+import importlib.abc
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+_profiler: Optional['ImportProfiler'] = None
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Times ``exec_module`` and otherwise behaves as the wrapped loader."""
+
+    def __init__(self, loader, profiler: 'ImportProfiler'):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._exec(self._loader, module)
+
+    def __getattr__(self, name):
+        # get_source, get_resource_reader, is_package, ...
+        return getattr(self._loader, name)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Meta path hook recording ``{module: (self seconds, cumulative seconds, depth)}``."""
+
+    def __init__(self):
+        self.timings: Dict[str, Tuple[float, float, int]] = {}
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _exec(self, loader, module):
+        # Per thread, as the web server is imported off the event loop thread
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += total
+            self.timings[module.__name__] = (total - children, total, len(stack))
+
+    def total(self) -> float:
+        return sum(self_time for self_time, _, _ in self.timings.values())
+
+    def slowest(self, limit: int = 20) -> List[Tuple[str, float, float]]:
+        """``(module, self, cumulative)`` for the modules with the highest cumulative time."""
+        rows = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)
+        return [(name, self_time, cumulative) for name, (self_time, cumulative, _) in rows[:limit]]
+
+    def by_package(self, limit: int = 15) -> List[Tuple[str, float, int]]:
+        """``(top-level package, self time summed over its modules, module count)``."""
+        packages: Dict[str, List] = {}
+        for name, (self_time, _, _) in self.timings.items():
+            entry = packages.setdefault(name.partition('.')[0], [0.0, 0])
+            entry[0] += self_time
+            entry[1] += 1
+        rows = sorted(packages.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, spent, count) for name, (spent, count) in rows[:limit]]
+
+
+def install() -> ImportProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler()
+        sys.meta_path.insert(0, _profiler)
+    return _profiler
+
+
+def install_from_env() -> Optional[ImportProfiler]:
+    """Install the profiler if IMPORT_PROFILE=1."""
+    if os.getenv('IMPORT_PROFILE', '0') == '1':
+        return install()
+    return None
+
+
+def get_profiler() -> Optional[ImportProfiler]:
+    return _profiler
+
+
+def log_report(limit: Optional[int] = None):
+    """Log the import profile, if the profiler is installed."""
+    if _profiler is None:
+        return
+    from modules.logging_config import get_logger
+    logger = get_logger('drawbridge.import_profiler')
+    limit = limit or int(os.getenv('IMPORT_PROFILE_LIMIT', '20'))
+    logger.info(f'Imported {len(_profiler.timings)} modules in {_profiler.total():.3f}s')
+    logger.info('Slowest imports (self / cumulative):')
+    for name, self_time, cumulative in _profiler.slowest(limit):
+        logger.info(f'  {self_time * 1000:8.1f}ms {cumulative * 1000:8.1f}ms  {name}')
+    logger.info('Import time by package:')
+    for name, spent, count in _profiler.by_package(limit):
+        logger.info(f'  {spent * 1000:8.1f}ms  {name} ({count} modules)')
@@ -0,0 +1,878 @@
+"""
+Logs.tf scoreboard rendering for Drawbridge.
+
+The Pillow drawing is CPU bound, so it runs in a worker pool instead of on the
+bot's event loop. ``render_scoreboard`` is a plain module-level function so it
+can be shipped to a process pool; ``ScoreboardRenderer`` wraps the pool behind
+an async API with a bounded queue and a render timeout.
+
+This module deliberately avoids importing discord or the Drawbridge package so
+it stays cheap to import from a worker.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.scoreboard')
+
+# Bump whenever the rendered layout changes so cached images are not reused.
+RENDERER_VERSION = 2
+
+
+class ScoreboardRenderError(Exception):
+    """Raised when a scoreboard could not be rendered."""
+    pass
+
+
+class ScoreboardQueueFull(ScoreboardRenderError):
+    """Raised when too many renders are already waiting for a worker."""
+    pass
+
+
+class ScoreboardRenderTimeout(ScoreboardRenderError):
+    """Raised when a render takes longer than the configured timeout."""
+    pass
+
+
+def get_class_color(class_name: str) -> Tuple[int, int, int]:
+    """Get TF2 class colors"""
+    colors = {
+        'scout': (164, 125, 101),
+        'soldier': (178, 95, 95),
+        'pyro': (175, 118, 95),
+        'demoman': (95, 178, 95),
+        'heavyweapons': (175, 125, 175),
+        'engineer': (178, 163, 95),
+        'medic': (178, 178, 95),
+        'sniper': (124, 178, 157),
+        'spy': (95, 118, 157),
+    }
+    return colors.get(class_name.lower(), (255, 255, 255))
+
+
+def get_team_color(team: str) -> Tuple[int, int, int]:
+    """Get team colors"""
+    colors = {
+        'Red': (201, 79, 57),
+        'Blue': (88, 133, 175),
+    }
+    return colors.get(team, (128, 128, 128))
+
+
+def get_class_sort_order(class_name: str) -> int:
+    """Get class sort order (SCOUT, SOLDIER, PYRO, DEMO, HEAVY, ENGINEER, MEDIC, SNIPER, SPY)"""
+    order = {
+        'scout': 0,
+        'soldier': 1,
+        'pyro': 2,
+        'demoman': 3,
+        'heavyweapons': 4,
+        'engineer': 5,
+        'medic': 6,
+        'sniper': 7,
+        'spy': 8
+    }
+    return order.get(class_name.lower(), 99)
+
+
+# Icon filenames differ from logs.tf class names for the heavy
+CLASS_ICON_FILES = {
+    'scout': 'scout',
+    'soldier': 'soldier',
+    'pyro': 'pyro',
+    'demoman': 'demoman',
+    'heavyweapons': 'heavy',  # Important: heavyweapons -> heavy
+    'engineer': 'engineer',
+    'medic': 'medic',
+    'sniper': 'sniper',
+    'spy': 'spy'
+}
+
+ICON_SIZE = 20
+HEADERS = ['Team', 'Class', 'Name', 'K', 'A', 'D', 'DMG', 'DPM', 'KA/D', 'K/D', 'DT', 'DT/M', 'HP', 'HS', 'AS', 'CAP']
+
+
+def _find_embeds_dir() -> Optional[str]:
+    """Locate the embeds directory, preferring the working directory."""
+    for candidate in (
+        os.path.join(os.getcwd(), "embeds"),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "embeds"),
+    ):
+        if os.path.isdir(candidate):
+            return os.path.normpath(candidate)
+    return None
+
+
+class ScoreboardAtlas:
+    """Fonts, class icons and text metrics used by the scoreboard.
+
+    Everything is loaded from disk once so rendering does no filesystem I/O.
+    Icons are stored pre-scaled and pre-converted to RGBA, with a second
+    half-opacity copy for off-classes.
+    """
+
+    def __init__(self, embeds_dir: Optional[str] = None):
+        self.embeds_dir = embeds_dir or _find_embeds_dir()
+        self.icons: Dict[str, Image.Image] = {}
+        self.faded_icons: Dict[str, Image.Image] = {}
+        self._widths: Dict[Tuple[str, str], int] = {}
+
+        self.fonts = self._load_fonts()
+        self._load_icons()
+
+        # Warm the width cache with the strings every scoreboard draws
+        for text in ('BLU', 'RED'):
+            self.text_width('header', text)
+            self.text_width('small', text)
+        for text in HEADERS:
+            self.text_width('small', text)
+
+    def _load_fonts(self) -> Dict[str, ImageFont.ImageFont]:
+        sizes = {'header': 36, 'player': 14, 'small': 12}
+        try:
+            if not self.embeds_dir:
+                raise FileNotFoundError('embeds directory not found')
+            font_path = os.path.join(self.embeds_dir, "fonts", "Roboto-Bold.ttf")
+            # Read the file once and let each size parse it from memory
+            with open(font_path, 'rb') as f:
+                font_bytes = f.read()
+            return {name: ImageFont.truetype(io.BytesIO(font_bytes), size) for name, size in sizes.items()}
+        except Exception as e:
+            logger.warning(f"Failed to load Roboto fonts: {e}")
+            default = ImageFont.load_default()
+            return {name: default for name in sizes}
+
+    def _load_icons(self):
+        if not self.embeds_dir:
+            logger.warning("No embeds directory found, class icons disabled")
+            return
+        for class_name, icon_filename in CLASS_ICON_FILES.items():
+            icon_path = os.path.join(self.embeds_dir, "icons", f"Leaderboard_class_{icon_filename}.png")
+            try:
+                with Image.open(icon_path) as source:
+                    icon = source.resize((ICON_SIZE, ICON_SIZE), Image.Resampling.LANCZOS).convert('RGBA')
+            except Exception as e:
+                logger.warning(f"Failed to load icon for {class_name}: {e}")
+                continue
+            faded = icon.copy()
+            faded.putalpha(icon.getchannel('A').point(lambda a: int(a * 0.5)))  # 50% opacity
+            self.icons[class_name] = icon
+            self.faded_icons[class_name] = faded
+
+    def font(self, name: str) -> ImageFont.ImageFont:
+        return self.fonts[name]
+
+    def icon(self, class_name: str, primary: bool = True) -> Optional[Image.Image]:
+        icons = self.icons if primary else self.faded_icons
+        return icons.get(class_name.lower())
+
+    def text_width(self, font_name: str, text: str) -> int:
+        """Rendered width of text, memoised per font."""
+        key = (font_name, text)
+        width = self._widths.get(key)
+        if width is None:
+            left, _, right, _ = self.fonts[font_name].getbbox(text)
+            width = right - left
+            self._widths[key] = width
+        return width
+
+
+_atlas: Optional[ScoreboardAtlas] = None
+
+
+def get_atlas() -> ScoreboardAtlas:
+    """Return the process-wide atlas, loading it on first use."""
+    global _atlas
+    if _atlas is None:
+        _atlas = ScoreboardAtlas()
+    return _atlas
+
+
+def draw_scoreboard(log_data: Dict) -> Image.Image:
+    """Draw the scoreboard for logs.tf data.
+
+    Runs inside a worker, so it must only depend on its argument and module
+    level state (the asset atlas).
+    """
+
+    # Image dimensions and styling
+    player_row_height = 35
+    team_header_height = 60  # Increased from 40
+    column_header_height = 25
+
+    # Get all players and combine teams
+    all_players = []
+    for steamid, player_data in log_data['players'].items():
+        player_name = log_data['names'].get(steamid, 'Unknown')
+        primary_class = max(player_data['class_stats'], key=lambda c: c['total_time'])['type']
+
+        all_players.append({
+            'steamid': steamid,
+            'name': player_name,
+            'data': player_data,
+            'primary_class': primary_class,
+            'team': player_data['team']
+        })
+
+    # Sort: Blue first, then Red, then by class order, then by kills
+    def sort_key(player):
+        team_priority = 0 if player['team'] == 'Blue' else 1
+        class_order = get_class_sort_order(player['primary_class'])
+        kills = player['data']['kills']
+        return (team_priority, class_order, -kills)  # -kills for descending
+
+    all_players.sort(key=sort_key)
+
+    total_players = len(all_players)
+
+    # Column headers with auto-sizing
+    headers = HEADERS
+    col_widths = [80, 100, 140, 35, 35, 35, 70, 50, 50, 45, 70, 50, 40, 35, 35, 40]  # Adjusted sizes
+
+    # Calculate total width from content + padding
+    padding = 10
+    width = sum(col_widths) + (padding * 2)
+    height = team_header_height + column_header_height + (total_players * player_row_height)
+
+    col_positions = []
+    x_pos = padding
+    for width_val in col_widths:
+        col_positions.append(x_pos)
+        x_pos += width_val
+
+    # Create image with auto-sized width
+    background_color = 0x2d2d2d
+    img = Image.new('RGB', (width, height), background_color)
+    draw = ImageDraw.Draw(img)
+
+    atlas = get_atlas()
+    header_font_bold = atlas.font('header')
+    player_font = atlas.font('player')
+    small_font = atlas.font('small')
+
+    y_pos = 0
+
+    # Team score header (blue left, red right, scores in center)
+    blue_color = get_team_color('Blue')
+    red_color = get_team_color('Red')
+
+    # Draw team color backgrounds
+    center_x = width // 2
+    draw.rectangle([0, y_pos, center_x, y_pos + team_header_height], fill=blue_color)
+    draw.rectangle([center_x, y_pos, width, y_pos + team_header_height], fill=red_color)
+
+    # Team names at far ends with larger, bold text
+    team_text_y = y_pos + (team_header_height - 36) // 2  # Center vertically for larger font
+    draw.text((padding, team_text_y), "BLU", fill=(255, 255, 255), font=header_font_bold)
+
+    red_text_width = atlas.text_width('header', "RED")
+    draw.text((width - red_text_width - padding, team_text_y), "RED", fill=(255, 255, 255), font=header_font_bold)
+
+    # Scores in center with larger text
+    blue_score = str(log_data['teams']['Blue']['score'])
+    red_score = str(log_data['teams']['Red']['score'])
+
+    # Blue score (right-aligned in blue section)
+    blue_score_width = atlas.text_width('header', blue_score)
+    draw.text((center_x - blue_score_width - 15, team_text_y), blue_score, fill=(255, 255, 255), font=header_font_bold)
+
+    # Red score (left-aligned in red section)
+    draw.text((center_x + 15, team_text_y), red_score, fill=(255, 255, 255), font=header_font_bold)
+
+    y_pos += team_header_height
+
+    # Draw column headers
+    draw.rectangle([0, y_pos, width, y_pos + column_header_height], fill=(80, 80, 80))
+    for header, col_x in zip(headers, col_positions):
+        draw.text((col_x + 5, y_pos + 4), header, fill=(255, 255, 255), font=small_font)  # Adjusted y for larger font
+    y_pos += column_header_height
+
+    # Draw player rows
+    for player in all_players:
+        player_data = player['data']
+        player_name = player['name']
+        team = player['team']
+
+        # Player background (alternating)
+        bg_color = (50, 50, 50) if (y_pos // player_row_height) % 2 == 0 else (45, 45, 45)
+        draw.rectangle([0, y_pos, width, y_pos + player_row_height], fill=bg_color)
+
+        # Team column with team color and centered text
+        team_color = get_team_color(team)
+        draw.rectangle([col_positions[0], y_pos, col_positions[0] + col_widths[0], y_pos + player_row_height], fill=team_color)
+        team_text = "BLU" if team == "Blue" else "RED"
+
+        # Center the team text in the column
+        team_text_width = atlas.text_width('small', team_text)
+        team_text_x = col_positions[0] + (col_widths[0] - team_text_width) // 2
+        draw.text((team_text_x, y_pos + 8), team_text, fill=(255, 255, 255), font=small_font)  # Adjusted y for larger font
+
+        # Class icons column with padding
+        class_x_offset = 5  # Start with some padding
+        class_stats_by_time = sorted(player_data['class_stats'], key=lambda c: c['total_time'], reverse=True)
+
+        for i, class_stat in enumerate(class_stats_by_time):
+            class_name = class_stat['type']
+            # Full opacity for the primary class, 50% for others
+            icon = atlas.icon(class_name, primary=(i == 0))
+
+            if icon:
+                icon_size = ICON_SIZE
+
+                # Paste icon with padding
+                icon_x = col_positions[1] + class_x_offset
+                icon_y = y_pos + (player_row_height - icon_size) // 2
+
+                img.paste(icon, (icon_x, icon_y), icon)
+                class_x_offset += icon_size + 3  # 3px padding between icons
+            else:
+                # Fallback: show class name if icon fails to load
+                class_text = class_name[:4].upper()
+                draw.text((col_positions[1] + class_x_offset, y_pos + 8),
+                         class_text, fill=(255, 255, 255), font=small_font)  # Adjusted y for larger font
+                class_x_offset += 30
+
+        # Calculate additional stats
+        match_minutes = log_data['length'] / 60
+        ka_deaths = (player_data['kills'] + player_data['assists']) / max(player_data['deaths'], 1)
+        k_deaths = player_data['kills'] / max(player_data['deaths'], 1)
+        dpm = round(player_data['dmg'] / match_minutes)  # Added DPM back
+        dt_per_minute = round(player_data.get('dt', 0) / match_minutes)
+
+        # Player data
+        data = [
+            "",  # Team column already drawn
+            "",  # Class column already drawn
+            player_name[:18],  # Slightly shorter to fit better
+            str(player_data['kills']),
+            str(player_data['assists']),
+            str(player_data['deaths']),
+            str(player_data['dmg']),
+            str(dpm),  # DPM added back
+            f"{ka_deaths:.1f}",
+            f"{k_deaths:.1f}",
+            str(player_data.get('dt', 0)),
+            str(dt_per_minute),
+            str(player_data.get('medkits', 0)),
+            str(player_data.get('headshots', 0)),
+            str(player_data.get('as', 0)),
+            str(player_data.get('cpc', 0))
+        ]
+
+        # Draw text data (skip first two columns)
+        for i, (text, col_x) in enumerate(zip(data[2:], col_positions[2:]), 2):
+            text_color = (255, 255, 255) if i == 2 else (220, 220, 220)  # Name in white, others in light gray
+            draw.text((col_x + 5, y_pos + 8), text, fill=text_color, font=player_font)  # Adjusted y for larger font
+
+        y_pos += player_row_height
+
+    return img
+
+
+# ── Encoding ─────────────────────────────────────────────────
+# The scoreboard is flat colours and antialiased text, so a 256 colour palette
+# is visually lossless and usually far smaller than truecolour PNG. Every
+# enabled encoder is tried and the smallest output wins.
+
+def _encode_palette_png(img: Image.Image, options: Dict) -> bytes:
+    quantised = img.quantize(colors=options['palette_colors'], dither=Image.Dither.NONE)
+    buffer = io.BytesIO()
+    quantised.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _encode_png(img: Image.Image, options: Dict) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _encode_webp(img: Image.Image, options: Dict) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format='WEBP', lossless=True, quality=options['webp_effort'], method=options['webp_method'])
+    return buffer.getvalue()
+
+
+ENCODERS = {
+    'palette': (_encode_palette_png, 'png'),
+    'png': (_encode_png, 'png'),
+    'webp': (_encode_webp, 'webp'),
+}
+
+
+def encoding_options_from_env() -> Dict:
+    """Read scoreboard encoding settings.
+
+    SCOREBOARD_ENCODINGS       comma separated encoders to try (default palette,webp)
+    SCOREBOARD_PALETTE_COLORS  palette size for the quantised PNG, 2-256 (default 256)
+    SCOREBOARD_WEBP_METHOD     lossless WebP speed/size trade-off, 0-6 (default 4)
+    SCOREBOARD_WEBP_EFFORT     lossless WebP compression effort, 0-100 (default 80)
+    """
+    encodings = [e.strip().lower() for e in os.getenv('SCOREBOARD_ENCODINGS', 'palette,webp').split(',') if e.strip()]
+    unknown = [e for e in encodings if e not in ENCODERS]
+    if unknown:
+        logger.warning(f"Ignoring unknown scoreboard encodings: {', '.join(unknown)}")
+    return {
+        'encodings': [e for e in encodings if e in ENCODERS] or ['png'],
+        'palette_colors': min(256, max(2, int(os.getenv('SCOREBOARD_PALETTE_COLORS', '256')))),
+        'webp_method': min(6, max(0, int(os.getenv('SCOREBOARD_WEBP_METHOD', '4')))),
+        'webp_effort': min(100, max(0, int(os.getenv('SCOREBOARD_WEBP_EFFORT', '80')))),
+    }
+
+
+def encode_scoreboard(img: Image.Image, options: Optional[Dict] = None) -> Tuple[bytes, str]:
+    """Encode with every enabled encoder and keep the smallest.
+
+    Returns ``(data, extension)``.
+    """
+    options = options or encoding_options_from_env()
+    best: Optional[Tuple[bytes, str]] = None
+    for name in options['encodings']:
+        encoder, extension = ENCODERS[name]
+        try:
+            data = encoder(img, options)
+        except Exception as e:
+            # e.g. Pillow built without WebP support
+            logger.warning(f"Scoreboard {name} encoding failed: {e}")
+            continue
+        if best is None or len(data) < len(best[0]):
+            best = (data, extension)
+    if best is None:
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        best = (buffer.getvalue(), 'png')
+    return best
+
+
+def render_scoreboard(log_data: Dict, encoding: Optional[Dict] = None) -> Tuple[bytes, str]:
+    """Draw and encode a scoreboard. Returns ``(data, extension)``."""
+    return encode_scoreboard(draw_scoreboard(log_data), encoding)
+
+
+class ScoreboardRenderer:
+    """Async front-end for rendering scoreboards in a worker pool.
+
+    Configuration (environment):
+        SCOREBOARD_RENDER_MODE     ``process`` (default) or ``thread``
+        SCOREBOARD_RENDER_WORKERS  number of workers (default 2)
+        SCOREBOARD_RENDER_QUEUE    renders allowed to wait for a worker (default 8)
+        SCOREBOARD_RENDER_TIMEOUT  seconds before a render is abandoned (default 15); an
+                                   abandoned render holds its worker until it finishes
+    """
+
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, timeout: Optional[float] = None):
+        self.mode = (mode or os.getenv('SCOREBOARD_RENDER_MODE', 'process')).lower()
+        self.workers = max(1, workers or int(os.getenv('SCOREBOARD_RENDER_WORKERS', '2')))
+        self.max_queue = max(0, max_queue if max_queue is not None else int(os.getenv('SCOREBOARD_RENDER_QUEUE', '8')))
+        self.timeout = timeout or float(os.getenv('SCOREBOARD_RENDER_TIMEOUT', '15'))
+        self.encoding = encoding_options_from_env()
+
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+
+        self.renders = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_render_ms = 0.0
+        self.avg_render_ms = 0.0
+
+    def _create_executor(self) -> concurrent.futures.Executor:
+        if self.mode == 'process':
+            try:
+                # fork rather than spawn: spawned workers re-run the main
+                # script, and app.py refuses to be imported. Workers only ever
+                # run render_scoreboard, so the inherited bot state is inert.
+                executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('fork')
+                )
+                logger.info(f"Scoreboard renderer using process pool ({self.workers} workers)")
+                return executor
+            except (OSError, NotImplementedError, ValueError) as e:
+                logger.warning(f"Process pool unavailable for scoreboard rendering, falling back to threads: {e}")
+                self.mode = 'thread'
+        logger.info(f"Scoreboard renderer using thread pool ({self.workers} workers)")
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix='scoreboard'
+        )
+
+    def _fall_back_to_threads(self, reason: Exception):
+        logger.error(f"Scoreboard process pool broke, switching to thread pool: {reason}")
+        old = self._executor
+        self.mode = 'thread'
+        self._executor = self._create_executor()
+        if old is not None:
+            old.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """Load the asset atlas and create the worker pool.
+
+        The atlas is loaded before the pool forks so workers inherit it
+        instead of reading the assets again. This blocks while the workers
+        fork, so call it off the event loop (``LogsTFEmbed.warm_up``).
+        """
+        get_atlas()
+        if self._executor is None:
+            self._executor = self._create_executor()
+            if self.mode == 'process':
+                # A fork pool forks its workers on the first submit; do it now
+                # rather than in the middle of the first render
+                self._executor.submit(os.getpid).result()
+
+    @property
+    def queue_depth(self) -> int:
+        """Renders waiting for a free worker."""
+        return self._waiting
+
+    def _update_metrics(self):
+        # Imported lazily so worker processes never pull in discord.
+        from modules.health_monitor import get_health_monitor
+        monitor = get_health_monitor()
+        if not monitor:
+            return
+        monitor.update_metric('scoreboard_queue_depth', self._waiting)
+        monitor.update_metric('scoreboard_renders_in_progress', self._running)
+        monitor.update_metric('scoreboard_render_ms', round(self.last_render_ms, 1))
+        monitor.update_metric('scoreboard_render_avg_ms', round(self.avg_render_ms, 1))
+        monitor.update_metric('scoreboard_renders', self.renders)
+        monitor.update_metric('scoreboard_render_failures', self.failures)
+        monitor.update_metric('scoreboard_render_rejected', self.rejected)
+
+    def _release(self, slots: asyncio.Semaphore):
+        self._running -= 1
+        slots.release()
+        self._update_metrics()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore):
+        # Done callbacks of executor futures run in the pool's threads
+        try:
+            loop.call_soon_threadsafe(self._release, slots)
+        except RuntimeError:
+            pass  # The loop is gone, and the semaphore with it
+
+    async def render(self, log_data: Dict) -> Tuple[bytes, str]:
+        """Render a scoreboard without blocking the event loop.
+
+        Returns the encoded image and its file extension.
+
+        Raises ScoreboardQueueFull if the queue is saturated and
+        ScoreboardRenderTimeout if the worker does not finish in time.
+        """
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self.rejected += 1
+            self._update_metrics()
+            raise ScoreboardQueueFull(f"Scoreboard render queue is full ({self._waiting} waiting)")
+
+        loop = asyncio.get_running_loop()
+        self._waiting += 1
+        self._update_metrics()
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        self._update_metrics()
+        slots = self._slots
+        started = time.perf_counter()
+        future: Optional[concurrent.futures.Future] = None
+        try:
+            executor = self._executor
+            try:
+                future = executor.submit(render_scoreboard, log_data, self.encoding)
+                result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+            except BrokenProcessPool as e:
+                # Several in-flight renders see the same broken pool; only swap it once.
+                if self._executor is executor:
+                    self._fall_back_to_threads(e)
+                future = self._executor.submit(render_scoreboard, log_data, self.encoding)
+                result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # A render that already started can't be cancelled: it keeps its
+            # worker, so it keeps its slot too until it really finishes.
+            self.failures += 1
+            raise ScoreboardRenderTimeout(f"Scoreboard render exceeded {self.timeout}s")
+        except Exception as e:
+            self.failures += 1
+            raise ScoreboardRenderError(f"Scoreboard render failed: {e}") from e
+        finally:
+            if future is None or future.done():
+                self._release(slots)
+            else:
+                future.add_done_callback(lambda _: self._release_threadsafe(loop, slots))
+
+        self.last_render_ms = (time.perf_counter() - started) * 1000
+        self.renders += 1
+        # Exponential moving average so the metric tracks recent load
+        if self.renders == 1:
+            self.avg_render_ms = self.last_render_ms
+        else:
+            self.avg_render_ms = self.avg_render_ms * 0.8 + self.last_render_ms * 0.2
+        self._update_metrics()
+        return result
+
+    def shutdown(self):
+        """Stop the worker pool. Renders still waiting for a worker are cancelled."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+
+def summarise_log(log_data: Dict) -> Dict:
+    """Keep only the parts of a logs.tf response the embed and result detection use.
+
+    Mirrors the logs.tf layout so callers can index it like the full response.
+    """
+    info = log_data.get('info', {})
+    return {
+        'info': {
+            'title': info.get('title'),
+            'map': info.get('map'),
+            'date': info.get('date'),
+            'uploader': {'name': info.get('uploader', {}).get('name')},
+        },
+        'length': log_data.get('length'),
+        'teams': {
+            team: {'score': log_data['teams'][team]['score']}
+            for team in ('Red', 'Blue')
+        },
+        'players': {
+            steamid: {'team': player.get('team')}
+            for steamid, player in log_data.get('players', {}).items()
+        },
+    }
+
+
+class ScoreboardCache:
+    """Cache of encoded scoreboards keyed by ``(log_id, RENDERER_VERSION)``.
+
+    Entries are ``{'image': bytes, 'format': extension, 'log': summary}`` so a repeat post needs
+    neither the logs.tf API nor a render. Memory is an LRU bounded by total
+    bytes; an optional disk directory keeps entries across restarts and is
+    bounded the same way.
+
+    Configuration (environment):
+        SCOREBOARD_CACHE_MAX_BYTES       memory budget (default 32 MiB)
+        SCOREBOARD_CACHE_DIR             disk directory, disabled if unset
+        SCOREBOARD_CACHE_DISK_MAX_BYTES  disk budget (default 256 MiB)
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, disk_dir: Optional[str] = None,
+                 disk_max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('SCOREBOARD_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+        self.disk_dir = disk_dir if disk_dir is not None else (os.getenv('SCOREBOARD_CACHE_DIR') or None)
+        self.disk_max_bytes = disk_max_bytes if disk_max_bytes is not None else int(os.getenv('SCOREBOARD_CACHE_DISK_MAX_BYTES', str(256 * 1024 * 1024)))
+
+        self._memory: 'collections.OrderedDict[Tuple[int, int], Tuple[Dict, int]]' = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._disk: 'collections.OrderedDict[Tuple[int, int], int]' = collections.OrderedDict()
+        self._disk_bytes = 0
+        self._inflight: Dict[Tuple[int, int], asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                self._scan_disk()
+            except OSError as e:
+                logger.warning(f"Scoreboard disk cache disabled, cannot use {self.disk_dir}: {e}")
+                self.disk_dir = None
+
+    @staticmethod
+    def key(log_id: int) -> Tuple[int, int]:
+        return (int(log_id), RENDERER_VERSION)
+
+    @staticmethod
+    def _entry_size(entry: Dict) -> int:
+        return len(entry['image']) + len(json.dumps(entry['log']))
+
+    # ── Memory tier ──────────────────────────────────────────
+
+    def _memory_get(self, key) -> Optional[Dict]:
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        self._memory.move_to_end(key)
+        return item[0]
+
+    def _memory_put(self, key, entry: Dict):
+        size = self._entry_size(entry)
+        if size > self.max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        self._memory[key] = (entry, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+
+    # ── Disk tier ────────────────────────────────────────────
+
+    def _paths(self, key) -> Tuple[str, str]:
+        base = os.path.join(self.disk_dir, f"{key[0]}-v{key[1]}")
+        return base + '.img', base + '.json'
+
+    def _scan_disk(self):
+        """Index existing cache files, oldest first, dropping other renderer versions."""
+        found = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.img'):
+                continue
+            try:
+                log_id, version = name[:-4].split('-v')
+                key = (int(log_id), int(version))
+            except ValueError:
+                continue
+            img_path, meta_path = self._paths(key)
+            if key[1] != RENDERER_VERSION or not os.path.exists(meta_path):
+                self._remove_files(key)
+                continue
+            stat = os.stat(img_path)
+            found.append((stat.st_mtime, key, stat.st_size + os.path.getsize(meta_path)))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _remove_files(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._remove_files(key)
+
+    def _disk_get(self, key) -> Optional[Dict]:
+        if key not in self._disk:
+            return None
+        img_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(img_path, 'rb') as f:
+                image = f.read()
+            os.utime(img_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Dropping unreadable scoreboard cache entry {key}: {e}")
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._remove_files(key)
+            return None
+        self._disk.move_to_end(key)
+        return {'image': image, 'format': meta['format'], 'log': meta['log']}
+
+    def _disk_put(self, key, entry: Dict):
+        img_path, meta_path = self._paths(key)
+        try:
+            # Write to temp names first so a crash never leaves half an entry
+            with open(img_path + '.tmp', 'wb') as f:
+                f.write(entry['image'])
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump({'format': entry['format'], 'log': entry['log']}, f)
+            os.replace(meta_path + '.tmp', meta_path)
+            os.replace(img_path + '.tmp', img_path)
+        except OSError as e:
+            logger.warning(f"Failed to write scoreboard cache entry {key}: {e}")
+            return
+        self._disk_bytes -= self._disk.pop(key, 0)
+        size = len(entry['image']) + os.path.getsize(meta_path)
+        self._disk[key] = size
+        self._disk_bytes += size
+        self._evict_disk()
+
+    # ── Public API ───────────────────────────────────────────
+
+    async def get(self, log_id: int) -> Optional[Dict]:
+        key = self.key(log_id)
+        entry = self._memory_get(key)
+        if entry is None and self.disk_dir:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                self._memory_put(key, entry)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self._update_metrics()
+        return entry
+
+    async def put(self, log_id: int, image: bytes, image_format: str, log_summary: Dict):
+        key = self.key(log_id)
+        entry = {'image': image, 'format': image_format, 'log': log_summary}
+        self._memory_put(key, entry)
+        if self.disk_dir:
+            await asyncio.to_thread(self._disk_put, key, entry)
+        self._update_metrics()
+
+    async def get_or_create(self, log_id: int, factory: Callable[[], Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+        """Return the cached entry, or build it with ``factory``.
+
+        Concurrent calls for the same log share one factory call. Entries
+        without an image (failed renders) are returned but not cached.
+        """
+        entry = await self.get(log_id)
+        if entry is not None:
+            return entry
+        key = self.key(log_id)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await factory()
+            if entry is not None and entry.get('image'):
+                await self.put(log_id, entry['image'], entry['format'], entry['log'])
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unshared failure isn't reported as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _update_metrics(self):
+        from modules.health_monitor import get_health_monitor
+        monitor = get_health_monitor()
+        if not monitor:
+            return
+        monitor.update_metric('scoreboard_cache_hits', self.hits)
+        monitor.update_metric('scoreboard_cache_misses', self.misses)
+        monitor.update_metric('scoreboard_cache_memory_bytes', self._memory_bytes)
+        if self.disk_dir:
+            monitor.update_metric('scoreboard_cache_disk_bytes', self._disk_bytes)
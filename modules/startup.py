@@ -0,0 +1,123 @@
+"""
+Startup dependency graph for Drawbridge.
+
+``on_ready`` registers each startup step with the steps it needs, and
+``StartupGraph.run`` starts every step as soon as its dependencies have
+finished, so independent steps (command sync, launchpad refresh, persistent
+views, the announce message, ...) overlap instead of queueing behind each
+other. Each step's start offset and duration are kept as a timeline, which is
+logged once startup finishes and shown on the admin dashboard.
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from modules.logging_config import get_logger
+
+logger = get_logger('drawbridge.startup')
+
+# Import time of this module; app.py imports it before discord and the database
+PROCESS_STARTED = time.monotonic()
+
+_last_timeline: Optional[Dict[str, Any]] = None
+
+
+class StartupGraph:
+    """Runs named startup steps concurrently, each once its dependencies are done.
+
+    A step whose dependency failed is skipped rather than run against a
+    half-initialised bot, unless that dependency was registered as
+    ``optional``: dependents only wait for optional steps to finish. Steps may
+    be sync or async callables; sync steps run on the event loop.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, Dict[str, Any]] = {}
+
+    def step(self, name: str, func: Callable, after: Iterable[str] = (), optional: bool = False):
+        if name in self._steps:
+            raise ValueError(f'Duplicate startup step: {name}')
+        self._steps[name] = {'func': func, 'after': tuple(after), 'optional': optional}
+
+    def _check(self):
+        for name, step in self._steps.items():
+            for dep in step['after']:
+                if dep not in self._steps:
+                    raise ValueError(f'Startup step {name} depends on unknown step {dep}')
+        # Kahn's algorithm: anything left over is part of a cycle
+        pending = {name: set(step['after']) for name, step in self._steps.items()}
+        while True:
+            free = [name for name, deps in pending.items() if not deps]
+            if not free:
+                break
+            for name in free:
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(free)
+        if pending:
+            raise ValueError(f'Startup steps form a cycle: {", ".join(sorted(pending))}')
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step and return the timeline (also kept for ``get_timeline``)."""
+        global _last_timeline
+        self._check()
+        started = time.monotonic()
+        records: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(name: str):
+            step = self._steps[name]
+            record = records[name] = {'name': name, 'after': list(step['after']),
+                                      'start': None, 'duration': None, 'status': 'pending', 'error': None}
+            await asyncio.gather(*(tasks[dep] for dep in step['after']))
+            failed = [dep for dep in step['after']
+                      if records[dep]['status'] != 'ok' and not self._steps[dep]['optional']]
+            if failed:
+                record['status'] = 'skipped'
+                record['error'] = f'dependency not ready: {", ".join(failed)}'
+                logger.warning(f'Startup step {name} skipped ({record["error"]})')
+                return
+            t0 = time.monotonic()
+            record['start'] = round(t0 - started, 3)
+            try:
+                result = step['func']()
+                if inspect.isawaitable(result):
+                    await result
+                record['status'] = 'ok'
+            except Exception as e:
+                record['status'] = 'failed'
+                record['error'] = str(e)
+                logger.error(f'Startup step {name} failed: {e}', exc_info=True)
+            record['duration'] = round(time.monotonic() - t0, 3)
+
+        # Every task exists before any runs, so dependencies can be awaited by name
+        for name in self._steps:
+            tasks[name] = asyncio.ensure_future(run_step(name))
+        await asyncio.gather(*tasks.values())
+
+        finished = time.monotonic()
+        _last_timeline = {
+            'total': round(finished - started, 3),
+            'since_launch': round(finished - PROCESS_STARTED, 3),
+            'finished_at': time.time(),
+            'steps': sorted(records.values(), key=lambda r: (r['start'] is None, r['start'] or 0)),
+        }
+        log_timeline(_last_timeline)
+        return _last_timeline
+
+
+def log_timeline(timeline: Dict[str, Any]):
+    logger.info(f"Startup finished in {timeline['total']:.2f}s ({timeline['since_launch']:.2f}s since launch)")
+    for r in timeline['steps']:
+        if r['status'] == 'skipped':
+            logger.info(f"  {r['name']:<20} skipped: {r['error']}")
+            continue
+        logger.info(f"  {r['name']:<20} +{r['start']:.2f}s  {r['duration']:.2f}s  {r['status']}"
+                    + (f": {r['error']}" if r['error'] else ''))
+
+
+def get_timeline() -> Optional[Dict[str, Any]]:
+    """The timeline of the last startup, or None while the bot is still starting."""
+    return _last_timeline
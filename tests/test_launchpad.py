@@ -0,0 +1,41 @@
+"""
+Tests for the launchpad message builders.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from modules.Drawbridge.launchpad import chunk_lines
+
+
+class ChunkLinesTest(unittest.TestCase):
+
+    def test_packs_lines_into_few_chunks(self):
+        self.assertEqual(chunk_lines(['a', 'b', 'c'], 2000), ['a\nb\nc'])
+        self.assertEqual(chunk_lines(['a' * 1000, 'b' * 1000], 2000), ['a' * 1000, 'b' * 1000])
+
+    def test_no_blank_chunk_when_boundary_lands_on_blank_line(self):
+        # 1000 + 1 + 999 fills the first message exactly, leaving '' on its own
+        self.assertEqual(chunk_lines(['a' * 1000, 'b' * 999, ''], 2000), ['a' * 1000 + '\n' + 'b' * 999])
+
+    def test_blank_lines_dropped_at_chunk_edges(self):
+        chunks = chunk_lines(['a' * 1500, '', '', 'b' * 1500, '  ', ''], 2000)
+        self.assertEqual(chunks, ['a' * 1500, 'b' * 1500])
+        for chunk in chunks:
+            self.assertTrue(chunk.strip())
+            self.assertEqual(chunk, chunk.strip('\n'))
+
+    def test_blank_lines_inside_a_chunk_are_kept(self):
+        self.assertEqual(chunk_lines(['a', '', 'b'], 2000), ['a\n\nb'])
+
+    def test_only_blank_lines(self):
+        self.assertEqual(chunk_lines(['', ' ', ''], 2000), [])
+
+    def test_long_line_is_cut(self):
+        self.assertEqual(chunk_lines(['x' * 2500], 2000), ['x' * 2000])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,8 @@ import discord
 from quart import Blueprint, render_template, request, jsonify, redirect, make_response
 from modules.logging_config import get_logger
 from modules.Drawbridge.checks import Checks
+from modules.Drawbridge.discord_queue import discord_writes
+from modules.startup import get_timeline
 
 logger = get_logger('drawbridge.web.admin', 'web.log')
 checks = Checks()
@@ -25,30 +27,6 @@ _sync_cog = None
 # Warned users tracking for tournament end
 _warned_users: dict[str, float] = {}
 
-# ── Discord API rate-limit helpers ────────────────────────────
-_DISCORD_OP_DELAY = 0.75  # seconds between Discord API writes
-
-
-async def _discord_safe(coro, retries=3):
-    """Execute a Discord API call with rate-limit awareness.
-    Automatically sleeps ``_DISCORD_OP_DELAY`` after success,
-    and retries on 429 with ``retry_after`` respect.
-    """
-    for attempt in range(retries):
-        try:
-            result = await coro
-            await asyncio.sleep(_DISCORD_OP_DELAY)
-            return result
-        except discord.HTTPException as e:
-            if e.status == 429:
-                retry_after = getattr(e, 'retry_after', 1.0)
-                logger.warning(f'Discord 429 on attempt {attempt + 1}, retrying in {retry_after}s')
-                await asyncio.sleep(retry_after + 0.5)
-                continue
-            raise
-    raise RuntimeError(f'Discord API call failed after {retries} retries (rate limited)')
-
-
 # ── Background task tracking ──────────────────────────────────
 _tasks: dict[str, dict] = {}
 
@@ -96,20 +74,24 @@ def initialize(bot, db, cit, tournament_cog, sync_cog):
     _sync_cog = sync_cog
     template_set_db(db)
 
-    if _db:
-        try:
-            from web.awards_discord import register_views
-            register_views(_bot, _db)
-            logger.info('Awards persistent views registered')
-        except Exception as e:
-            logger.warning(f'Failed to register awards views: {e}')
 
-        try:
-            from web.match_schedule_discord import register_match_schedule_views
-            register_match_schedule_views(_bot, _db)
-            logger.info('Match schedule persistent views registered')
-        except Exception as e:
-            logger.warning(f'Failed to register match schedule views: {e}')
+def register_persistent_views():
+    """Re-register the awards and match schedule views so their buttons survive restarts."""
+    if not _db:
+        return
+    try:
+        from web.awards_discord import register_views
+        register_views(_bot, _db)
+        logger.info('Awards persistent views registered')
+    except Exception as e:
+        logger.warning(f'Failed to register awards views: {e}')
+
+    try:
+        from web.match_schedule_discord import register_match_schedule_views
+        register_match_schedule_views(_bot, _db)
+        logger.info('Match schedule persistent views registered')
+    except Exception as e:
+        logger.warning(f'Failed to register match schedule views: {e}')
 
 
 # ── Session helpers ──────────────────────────────────────────
@@ -360,6 +342,14 @@ async def templates_page():
     return await render_template('admin/templates.html', user=session_user)
 
 
+@admin_bp.route('/operations')
+async def operations_page():
+    session_user = get_session_user()
+    if not session_user or not session_user.get('is_admin'):
+        return redirect('/admin/login')
+    return await render_template('admin/operations.html', user=session_user)
+
+
 # ── API endpoints ────────────────────────────────────────────
 
 @admin_bp.route('/api/info')
@@ -378,7 +368,9 @@ async def api_admin_info():
             'name': guild.name if guild else None,
             'id': guild.id if guild else None,
             'member_count': guild.member_count if guild else 0,
-        }
+        },
+        'startup': get_timeline(),
+        'join_sync': _get_sync_cog().join_queue.stats() if _get_sync_cog() else None,
     }
     if _db:
         try:
@@ -418,13 +410,138 @@ async def api_tournament_launchpad():
         guild = _get_guild()
         if not guild:
             return jsonify({'error': 'Guild not found'}), 500
-        await cog.update_launchpad()
+        await cog.update_launchpad(wait=True)
         return jsonify({'success': True, 'message': 'Launchpad generated and sent to launchpad channel.'})
     except Exception as e:
         logger.error(f'Launchpad error: {e}')
         return _db_error(e)
 
 
+# ── Journalled bulk operations ────────────────────────────────
+
+def _start_journaled_task(kind, league_id, params, runner):
+    """Open (or resume) the operation journal and run ``runner(p, journal)`` as a task.
+
+    Returns the response: 202 with the task and operation ids, or 409 if the
+    same operation is already running or an unfinished one was started with
+    different params.
+    """
+    from modules.Drawbridge.operations import OperationJournal, OperationConflict
+    session_user = get_session_user()
+    try:
+        journal = OperationJournal.open(_db, kind, league_id, params=params,
+                                        started_by=session_user.get('username') if session_user else None)
+    except OperationConflict as e:
+        return jsonify({'error': str(e)}), 409
+
+    async def _run(p):
+        if journal.resumed:
+            p(0, f'Resuming operation #{journal.id} ({journal.done_count()} steps already done)...')
+        try:
+            result = await runner(p, journal)
+        except BaseException as e:
+            journal.abort(str(e) or type(e).__name__)
+            raise
+        if journal.operation['status'] == 'running':
+            journal.finish()
+        result['operation_id'] = journal.id
+        return result
+
+    return jsonify({'task_id': _start_task(_run), 'operation_id': journal.id}), 202
+
+
+async def _run_tournament_start(p, journal, league_id, league_shortcode, role_overrides):
+    from modules.Drawbridge.functions import Functions
+    from modules.Drawbridge.tournament_start import plan_tournament_start, execute_start_plan, seed_league
+    p(0, 'Starting tournament creation...')
+    guild = _get_guild()
+    league = await asyncio.to_thread(_cit.getLeague, league_id)
+    seed_league(_db, league_id, league.name, league_shortcode)
+
+    p(5, 'Planning divisions, teams and channels...')
+    plan = plan_tournament_start(
+        guild, league_id, league, league_shortcode,
+        _get_tournament_cog().get_role_ids_from_overrides(role_overrides), get_template('teams.json'),
+    )
+
+    def progress(done, total, last):
+        p(int(10 + done / total * 65), f'Created team {done}/{total} ({last[:20]})...')
+
+    result = await execute_start_plan(plan, guild, _db, Functions(_db, _cit), progress=progress, journal=journal)
+
+    p(75, 'Assigning roles...')
+    err_msg = await _get_tournament_cog()._assign_roles(league_id)
+    if result['failed']:
+        journal.abort(f'{len(result["failed"])} team(s) failed')
+        err_msg += f'\n## Failed Teams (resume operation #{journal.id} to retry)\n' + '\n'.join(f'- {name}: {error}' for name, error in result['failed'])
+    p(90, 'Updating launchpad...')
+    await _get_tournament_cog().update_launchpad()
+    return {'success': True, 'message': f'Tournament started. Divisions: {result["divisions"]}, Teams: {result["teams"]}.', 'errors': err_msg}
+
+
+async def _run_tournament_end(p, journal, league_id):
+    from modules.Drawbridge.operations import dismiss_league
+    from modules.Drawbridge.tournament_end import plan_tournament_end, execute_end_plan
+    p(0, 'Deleting team channels...')
+    plan = plan_tournament_end(_get_guild(), _db, league_id)
+    # Progress bands per stage, as before
+    bands = {'channels': (0, 40), 'categories': (40, 60), 'roles': (60, 85)}
+
+    def progress(stage, done, total, last):
+        start, end = bands[stage]
+        p(int(start + done / total * (end - start)), f'Deleting {stage}... ({done}/{total})')
+
+    result = await execute_end_plan(plan, reason='Tournament ended (web panel)', progress=progress, journal=journal)
+    if result['failed']:
+        # Keep the DB rows so a resume knows what is left to delete
+        journal.abort(f'{len(result["failed"])} delete(s) failed')
+        return {'success': False,
+                'message': f'Some objects could not be deleted. Resume operation #{journal.id} to retry.',
+                'errors': '\n'.join(f'{name}: {error}' for name, error in result['failed'])}
+    p(85, 'Cleaning up database...')
+    if not _db.cleanup_league(league_id):
+        raise RuntimeError('Discord objects were removed but the database cleanup failed')
+    journal.complete('db:cleanup')
+    dismiss_league(_db, league_id, keep=journal.id)
+    p(95, 'Updating launchpad...')
+    await _get_tournament_cog().update_launchpad()
+    return {'success': True, 'message': 'Tournament ended and all channels/roles archived.'}
+
+
+async def _run_matchgen_round(p, journal, league_id, round_number, role_overrides):
+    from modules.Drawbridge.functions import Functions
+    from modules.Drawbridge.matchgen import select_round_matches, fetch_matches, prepare_matchgen, generate_matches
+    p(0, 'Loading matches...')
+    league = await asyncio.to_thread(_cit.getLeague, league_id)
+    match_ids = select_round_matches(_db, league_id, league, round_number)
+    total = len(match_ids)
+    if total == 0:
+        return {'success': True, 'message': 'No matches to generate (all already generated or completed).', 'generated': 0, 'errors': []}
+
+    p(5, f'Fetching {total} matches...')
+    errors = []
+    matches = []
+    for match_id, match in (await fetch_matches(_cit, match_ids)).items():
+        if isinstance(match, Exception):
+            errors.append(f'Match {match_id}: fetch failed: {match}')
+        else:
+            matches.append(match)
+    guild = _get_guild()
+    context = prepare_matchgen(guild, _db, league_id, role_overrides)
+
+    def progress(done, total, last):
+        p(int(10 + done / total * 85), f'Generated {done}/{total} matches (ID: {last})...')
+
+    cog = _get_tournament_cog()
+    result = await generate_matches(context, matches, guild, cog.bot, _db, Functions(_db, _cit),
+                                    progress=progress, journal=journal)
+    errors += [f'Match {match_id}: {error}' for match_id, error in result['failed']]
+    if errors:
+        journal.abort(f'{len(errors)} match(es) failed')
+    errors += [f'Match {match_id} skipped: {reason}' for match_id, reason in result['skipped']]
+    return {'success': True, 'generated': result['generated'], 'errors': errors}
+
+
 @admin_bp.route('/api/tournament/start', methods=['POST'])
 @require_admin
 async def api_tournament_start():
@@ -437,114 +554,10 @@ async def api_tournament_start():
     if not league_id or not league_shortcode:
         return jsonify({'error': 'league_id and league_shortcode are required'}), 400
 
-    async def _run(p):
-        p(0, 'Starting tournament creation...')
-        guild = _get_guild()
-        league = _cit.getLeague(league_id)
-        rosters = league.rosters
-        divs = []
-        for roster in rosters:
-            if roster['division'] not in divs:
-                divs.append(roster['division'])
-
-        try:
-            existing = _db.leagues.get_by_id(league_id)
-            if existing:
-                _db.leagues.update(league_id, {'league_name': league.name, 'league_shortcode': league_shortcode})
-            else:
-                _db.leagues.insert({
-                    'league_id': league_id,
-                    'league_name': league.name,
-                    'league_shortcode': league_shortcode,
-                })
-        except Exception as e:
-            logger.warning(f'Failed to seed league {league_id}: {e}')
-
-        rawteammessage = get_template('teams.json')
-
-        r = 0
-        d = 0
-        total_divs = len(divs)
-        for div in divs:
-            d += 1
-            p(int(10 + (d / total_divs) * 55), f'Creating division {d}/{total_divs}: {div}...')
-            overrides = {
-                guild.default_role: discord.PermissionOverwrite(view_channel=False)
-            }
-            all_access = checks._get_role_ids('HEAD', 'ADMIN', '!AC', 'TRIAL', 'DEVELOPER', 'APPROVED', '!UNAPPROVED', 'BOT')
-            for role_id in all_access:
-                role_obj = guild.get_role(role_id)
-                if role_obj:
-                    overrides[role_obj] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-            extra_overrides = _get_tournament_cog().get_role_ids_from_overrides(role_overrides)
-            for override in extra_overrides:
-                overrides[override] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-
-            category = await _discord_safe(guild.create_category(f'{div} - {league_shortcode}', overwrites=overrides))
-            role = await _discord_safe(guild.create_role(name=f'{div} - {league_shortcode}'))
-            dbdiv = {
-                'league_id': league_id,
-                'division_name': div,
-                'role_id': role.id,
-                'category_id': category.id,
-            }
-            divid = _db.divisions.insert(dbdiv)
-
-            teams_in_div = [ros for ros in rosters if ros['division'] == div]
-            total_teams = len(teams_in_div)
-            for idx, roster in enumerate(teams_in_div):
-                r += 1
-                p(int(10 + (d - 1) / total_divs * 55 + (idx + 1) / total_teams * (55 / total_divs)),
-                  f'Creating team {r} ({roster["name"][:20]})...')
-                roster_name = roster['name'][:50]
-                role = await _discord_safe(guild.create_role(name=f'{roster_name[:20]} ({league_shortcode})', mentionable=True))
-                overwrites = {
-                    guild.default_role: discord.PermissionOverwrite(view_channel=False, send_messages=False),
-                    role: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-                }
-                for role_id in all_access:
-                    role_obj = guild.get_role(role_id)
-                    if role_obj:
-                        overwrites[role_obj] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                for override in extra_overrides:
-                    overwrites[override] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                channel_name = f'🛡️{roster_name[:20]} ({league_shortcode})'
-                team_channel = await _discord_safe(guild.create_text_channel(channel_name, category=category, overwrites=overwrites))
-                subs = {
-                    '{TEAM_MENTION}': f'<@&{role.id}>',
-                    '{TEAM_NAME}': roster_name,
-                    '{TEAM_ID}': str(roster['team_id']),
-                    '{DIVISION}': div,
-                    '{LEAGUE_NAME}': league.name,
-                    '{LEAGUE_SHORTCODE}': league_shortcode,
-                    '{CHANNEL_ID}': str(team_channel.id),
-                    '{CHANNEL_LINK}': f'<#{team_channel.id}>',
-                }
-                from modules.Drawbridge.functions import Functions
-                funcs = Functions(_db, _cit)
-                team_msg = json.loads(funcs.substitute_strings_in_embed(str(rawteammessage), subs))
-                team_msg['embed'] = discord.Embed(**team_msg['embeds'][0])
-                del team_msg['embeds']
-                await _discord_safe(team_channel.send(**team_msg))
-                _db.teams.insert({
-                    'roster_id': roster['id'],
-                    'team_id': roster['team_id'],
-                    'league_id': league_id,
-                    'role_id': role.id,
-                    'team_channel': team_channel.id,
-                    'division': divid,
-                    'team_name': roster_name,
-                })
-
-        p(75, 'Assigning roles...')
-        from modules.Drawbridge.functions import Functions as Funcs
-        err_msg = await _get_tournament_cog()._assign_roles(league_id)
-        p(90, 'Updating launchpad...')
-        await _get_tournament_cog().update_launchpad()
-        return {'success': True, 'message': f'Tournament started. Divisions: {d}, Teams: {r}.', 'errors': err_msg}
-
-    task_id = _start_task(_run)
-    return jsonify({'task_id': task_id}), 202
+    return _start_journaled_task(
+        'start', league_id, {'league_shortcode': league_shortcode, 'role_overrides': role_overrides},
+        lambda p, journal: _run_tournament_start(p, journal, league_id, league_shortcode, role_overrides),
+    )
 
 
 @admin_bp.route('/api/tournament/assign-roles', methods=['POST'])
@@ -576,43 +589,16 @@ async def api_tournament_assign_captain_roles():
     if not league_id:
         return jsonify({'error': 'league_id is required'}), 400
     try:
-        guild = _get_guild()
-        assigned = []
-        not_in_server = []
-        not_linked = []
-        missing_role = []
-        for team in _db.teams.get_by_league(league_id):
-            team_id = team['team_id']
-            team_role_id = team['role_id']
-            team_role = guild.get_role(team_role_id)
-            cit_team = _cit.getTeam(team_id)
-            if not cit_team:
-                continue
-            for user in cit_team.players:
-                if not user.get('is_captain'):
-                    continue
-                if not user.get('discord_id'):
-                    if user['name'] not in not_linked:
-                        not_linked.append(user['name'])
-                    continue
-                member = guild.get_member(user['discord_id'])
-                if member is None:
-                    if user['name'] not in not_in_server:
-                        not_in_server.append(user['name'])
-                    continue
-                if team_role is None:
-                    if user['name'] not in missing_role:
-                        missing_role.append(f"{user['name']} (team {team_id})")
-                    continue
-                if team_role not in member.roles:
-                    await member.add_roles(team_role, reason='Drawbridge: assign_captain_roles (web panel)')
-                    assigned.append(f"{user['name']} -> {team_role.name}")
+        from modules.Drawbridge.role_assignment import plan_captain_roles, apply_role_deltas
+        plan = await plan_captain_roles(_get_guild(), _db, _cit, league_id, include_division=False)
+        result = await apply_role_deltas(plan, reason='Drawbridge: assign_captain_roles (web panel)')
         return jsonify({
             'success': True,
-            'assigned': assigned,
-            'not_in_server': not_in_server,
-            'not_linked': not_linked,
-            'missing_role': missing_role,
+            'assigned': result['assigned'],
+            'not_in_server': plan['not_in_server'],
+            'not_linked': plan['not_linked'],
+            'missing_role': plan['missing_role'],
+            'failed': [f'{name}: {error}' for name, error in result['failed']],
         })
     except Exception as e:
         logger.error(f'Assign captain roles error: {e}')
@@ -639,60 +625,7 @@ async def api_tournament_end():
         }), 202
     del _warned_users[user_id]
 
-    async def _run(p):
-        p(0, 'Deleting team channels...')
-        guild = _get_guild()
-        divs = _db.divisions.get_by_league(league_id)
-        teams = _db.teams.get_by_league(league_id)
-        league_matches = _db.matches.get_by_league(league_id)
-        match_channels = [m['channel_id'] for m in league_matches if m.get('channel_id')]
-
-        total = len(teams) + len(match_channels) + len(divs) + len(teams) * 2 or 1
-        done = 0
-        for channel in guild.channels:
-            for team in teams:
-                if channel.id == team['team_channel']:
-                    await _discord_safe(channel.delete(reason='Tournament ended (web panel)'))
-                    done += 1
-                    p(int(done / total * 100), 'Deleting channels...')
-                    break
-            for mcid in match_channels:
-                if channel.id == mcid:
-                    await _discord_safe(channel.delete(reason='Tournament ended (web panel)'))
-                    done += 1
-                    p(int(done / total * 100), 'Deleting channels...')
-                    break
-        p(40, 'Deleting categories...')
-        for div in divs:
-            for category in guild.categories:
-                if category.id == div['category_id']:
-                    await _discord_safe(category.delete())
-                    done += 1
-                    p(int(done / total * 100), 'Deleting categories...')
-                    break
-        p(60, 'Deleting roles...')
-        for role in guild.roles:
-            for team in teams:
-                if role.id == team['role_id']:
-                    await _discord_safe(role.delete())
-                    done += 1
-                    break
-            for div in divs:
-                if role.id == div['role_id']:
-                    await _discord_safe(role.delete())
-                    done += 1
-                    break
-        p(85, 'Cleaning up database...')
-        _db.matches.delete_by_league(league_id)
-        _db.teams.delete_by_league(league_id)
-        _db.divisions.delete_by_league(league_id)
-        _db.leagues.delete(league_id)
-        p(95, 'Updating launchpad...')
-        await _get_tournament_cog().update_launchpad()
-        return {'success': True, 'message': 'Tournament ended and all channels/roles archived.'}
-
-    task_id = _start_task(_run)
-    return jsonify({'task_id': task_id}), 202
+    return _start_journaled_task('end', league_id, {}, lambda p, journal: _run_tournament_end(p, journal, league_id))
 
 
 @admin_bp.route('/api/tournament/matchgen', methods=['POST'])
@@ -731,53 +664,121 @@ async def api_tournament_matchgen_round():
     if not league_id:
         return jsonify({'error': 'league_id is required'}), 400
 
-    async def _run(p):
-        p(0, 'Loading matches...')
-        league = _cit.getLeague(league_id)
-        matches = league.matches
-        filtered = []
-        for m in matches:
-            import modules.citadel as citadel_module
-            pm = citadel_module.Citadel.PartialMatch(m)
-            if pm.status == 'confirmed':
-                continue
-            if round_number is not None and pm.round_number != round_number:
-                continue
-            if _db.matches.get_by_id(pm.id) is not None:
-                continue
-            filtered.append(m)
-        total = len(filtered)
-        if total == 0:
-            return {'success': True, 'message': 'No matches to generate (all already generated or completed).', 'generated': 0, 'errors': []}
-        c = 0
-        errors = []
-        for idx, m in enumerate(filtered):
-            import modules.citadel as citadel_module2
-            pm = citadel_module2.Citadel.PartialMatch(m)
-            p(int((idx + 1) / total * 95), f'Generating match {idx + 1}/{total} (ID: {pm.id})...')
-            c += 1
-            try:
-                full = _cit.getMatch(pm.id)
-                await _get_tournament_cog()._generate_match(full, role_overrides)
-            except discord.HTTPException as e:
-                if e.status == 429:
-                    retry_after = getattr(e, 'retry_after', 2.0)
-                    p(int((idx + 1) / total * 95), f'Rate limited, waiting {retry_after}s before match {pm.id}...')
-                    await asyncio.sleep(retry_after + 1.0)
-                    try:
-                        full = _cit.getMatch(pm.id)
-                        await _get_tournament_cog()._generate_match(full, role_overrides)
-                    except Exception as e2:
-                        errors.append(f'Match {pm.id} (retry): {e2}')
-                else:
-                    errors.append(f'Match {pm.id}: {e}')
-            except Exception as e:
-                errors.append(f'Match {pm.id}: {e}')
-            await asyncio.sleep(_DISCORD_OP_DELAY)
-        return {'success': True, 'generated': c, 'errors': errors}
+    return _start_journaled_task(
+        'matchgenround', league_id, {'round_number': round_number, 'role_overrides': role_overrides},
+        lambda p, journal: _run_matchgen_round(p, journal, league_id, round_number, role_overrides),
+    )
 
-    task_id = _start_task(_run)
-    return jsonify({'task_id': task_id}), 202
+
+# ── Operations journal ────────────────────────────────────────
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _serialize_operation(o: dict) -> dict:
+    return {
+        'id': o['id'],
+        'kind': o['kind'],
+        'league_id': o.get('league_id'),
+        'params': json.loads(o.get('params') or '{}'),
+        'status': o['status'],
+        'started_by': o.get('started_by'),
+        'error': o.get('error'),
+        'total_steps': int(o.get('total_steps') or 0),
+        'done_steps': int(o.get('done_steps') or 0),
+        'failed_steps': int(o.get('failed_steps') or 0),
+        'started_at': _iso(o.get('started_at')),
+        'updated_at': _iso(o.get('updated_at')),
+        # fixperms needs the interaction, so it is resumed by rerunning the command
+        'resumable': o['status'] in ('failed', 'interrupted') and o['kind'] in _RESUMERS,
+    }
+
+
+_RESUMERS = {
+    'start': lambda league_id, params: _start_journaled_task(
+        'start', league_id, params,
+        lambda p, journal: _run_tournament_start(p, journal, league_id, params.get('league_shortcode'), params.get('role_overrides'))),
+    'end': lambda league_id, params: _start_journaled_task(
+        'end', league_id, params, lambda p, journal: _run_tournament_end(p, journal, league_id)),
+    'matchgenround': lambda league_id, params: _start_journaled_task(
+        'matchgenround', league_id, params,
+        lambda p, journal: _run_matchgen_round(p, journal, league_id, params.get('round_number'), params.get('role_overrides'))),
+    'bulk_sync': lambda league_id, params: _start_journaled_task('bulk_sync', None, params, _run_bulk_sync),
+}
+
+
+@admin_bp.route('/api/operations')
+@require_admin
+async def api_operations():
+    try:
+        limit = min(int(request.args.get('limit', 50)), 200)
+        return jsonify({'operations': [_serialize_operation(o) for o in _db.operations.get_recent(limit)]})
+    except Exception as e:
+        return _db_error(e)
+
+
+@admin_bp.route('/api/operations/<int:operation_id>')
+@require_admin
+async def api_operation_detail(operation_id: int):
+    try:
+        operation = _db.operations.get_by_id(operation_id)
+        if not operation:
+            return jsonify({'error': 'Operation not found'}), 404
+        steps = _db.operation_steps.get_by_operation(operation_id)
+        return jsonify({
+            'operation': _serialize_operation({
+                **operation,
+                'total_steps': len(steps),
+                'done_steps': sum(1 for st in steps if st['status'] == 'done'),
+                'failed_steps': sum(1 for st in steps if st['status'] == 'failed'),
+            }),
+            'steps': [{
+                'key': st['step_key'],
+                'status': st['status'],
+                'error': st.get('error'),
+                'updated_at': _iso(st.get('updated_at')),
+            } for st in steps if st['status'] != 'done'],
+        })
+    except Exception as e:
+        return _db_error(e)
+
+
+@admin_bp.route('/api/operations/<int:operation_id>/resume', methods=['POST'])
+@require_admin
+async def api_operation_resume(operation_id: int):
+    from modules.Drawbridge.operations import scope
+    if not _check_bot_ready() or not _get_tournament_cog():
+        return jsonify({'error': 'Bot or tournament cog not ready'}), 503
+    try:
+        operation = _db.operations.get_by_id(operation_id)
+        if not operation:
+            return jsonify({'error': 'Operation not found'}), 404
+        if operation['status'] not in ('failed', 'interrupted') or operation['kind'] not in _RESUMERS:
+            return jsonify({'error': f"A {operation['status']} {operation['kind']} operation cannot be resumed here"}), 400
+        params = json.loads(operation.get('params') or '{}')
+        latest = _db.operations.get_unfinished(operation['kind'], operation['league_id'], scope(operation['kind'], params))
+        if not latest or latest['id'] != operation_id:
+            return jsonify({'error': 'A newer operation of this kind exists for this league; resume that one instead'}), 409
+    except Exception as e:
+        return _db_error(e)
+    return _RESUMERS[operation['kind']](operation['league_id'], params)
+
+
+@admin_bp.route('/api/operations/<int:operation_id>/dismiss', methods=['POST'])
+@require_admin
+async def api_operation_dismiss(operation_id: int):
+    """Stop offering an unfinished operation for resume (its steps are kept)."""
+    try:
+        operation = _db.operations.get_by_id(operation_id)
+        if not operation:
+            return jsonify({'error': 'Operation not found'}), 404
+        if operation['status'] not in ('failed', 'interrupted'):
+            return jsonify({'error': f"A {operation['status']} operation cannot be dismissed"}), 400
+        _db.operations.set_status(operation_id, 'dismissed', operation.get('error'))
+        return jsonify({'success': True})
+    except Exception as e:
+        return _db_error(e)
 
 
 @admin_bp.route('/api/tournament/force-matchgen', methods=['POST'])
@@ -824,13 +825,14 @@ async def api_tournament_matchend():
         guild = _get_guild()
         channel = guild.get_channel(match['channel_id'])
         if channel:
-            await channel.send('Match has ended. This channel will now be archived.')
+            await discord_writes.run(lambda: channel.send('Match has ended. This channel will now be archived.'),
+                                     'message.send', channel.id)
             overwrites = channel.overwrites
             for role, perm in overwrites.items():
                 if role.id != guild.default_role.id:
                     overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=False)
-            await channel.edit(overwrites=overwrites)
-        _db.matches.archive_match(match_id)
+            await discord_writes.run(lambda: channel.edit(overwrites=overwrites), 'channel.edit', channel.id)
+        _db.matches.archive(match_id)
         await _get_tournament_cog().update_launchpad()
         return jsonify({'success': True, 'message': 'Match ended and archived.'})
     except Exception as e:
@@ -838,6 +840,66 @@ async def api_tournament_matchend():
         return _db_error(e)
 
 
+def _get_logstf_cog():
+    return _get_cog('LogsTFEmbed')
+
+
+def _serialize_result(r: dict) -> dict:
+    return {
+        'log_id': r['log_id'],
+        'log_url': f"https://logs.tf/{r['log_id']}",
+        'map': r.get('map_name'),
+        'home_side': r['home_side'],
+        'home_score': r['home_score'],
+        'away_score': r['away_score'],
+        'identified_players': r.get('identified_players', 0),
+        'unidentified_players': r.get('unidentified_players', 0),
+        'detected_at': r['detected_at'].isoformat() if hasattr(r.get('detected_at'), 'isoformat') else r.get('detected_at'),
+    }
+
+
+@admin_bp.route('/api/tournament/match/<int:match_id>/results')
+@require_admin
+async def api_tournament_match_results(match_id: int):
+    if not _db:
+        return jsonify({'error': 'Not ready'}), 503
+    try:
+        rows = _db.match_results.get_by_match(match_id)
+        return jsonify({'match_id': match_id, 'results': [_serialize_result(r) for r in rows]})
+    except Exception as e:
+        return _db_error(e)
+
+
+@admin_bp.route('/api/tournament/match/<int:match_id>/results', methods=['POST'])
+@require_admin
+async def api_tournament_match_detect_result(match_id: int):
+    """Detect (or re-detect) a match result from a logs.tf log id."""
+    if not _check_bot_ready():
+        return jsonify({'error': 'Bot not ready'}), 503
+    cog = _get_logstf_cog()
+    if not cog:
+        return jsonify({'error': 'Logs.tf cog not loaded'}), 503
+    data = await request.get_json() or {}
+    try:
+        log_id = int(str(data.get('log_id', '')).rstrip('/').split('/')[-1].split('#')[0])
+    except ValueError:
+        return jsonify({'error': 'log_id must be a logs.tf id or URL'}), 400
+    try:
+        match = _db.matches.get_by_id(match_id)
+        if not match:
+            return jsonify({'error': 'Match not found'}), 404
+        log_data = await cog.fetchLog(log_id)
+        if not log_data:
+            return jsonify({'error': f'Could not fetch logs.tf/{log_id}'}), 404
+        result = await cog.results.detect(match, log_id, log_data)
+        if not result:
+            return jsonify({'error': 'Could not match the log players to either roster'}), 422
+        return jsonify({'success': True, 'message': cog.results.describe(result).replace('**', '')})
+    except Exception as e:
+        logger.error(f'Result detection error for match {match_id}: {e}')
+        return _db_error(e)
+
+
 @admin_bp.route('/api/tournament/random-demo-check', methods=['POST'])
 @require_admin
 async def api_tournament_random_demo_check():
@@ -849,72 +911,50 @@ async def api_tournament_random_demo_check():
     spes_user = data.get('target_user', 0)
     if not league_id:
         return jsonify({'error': 'league_id is required'}), 400
+    count = min(max(int(data.get('count') or 1), 1), 25)
     try:
-        import random
-        import modules.citadel as citadel_module
-        league = _cit.getLeague(league_id)
+        from modules.Drawbridge.demo_check import DemoCheckError, announce_demo_check
+        from modules.Drawbridge.functions import Functions
+        league = await asyncio.to_thread(_cit.getLeague, league_id)
         if not league:
             return jsonify({'error': 'League not found'}), 404
         if not _db.divisions.get_by_league(league_id):
             return jsonify({'error': 'League not being monitored'}), 400
-        player_chosen = None
-        match_chosen = None
-        db_team = None
-        if spes_user == 0:
-            matches = [_cit.getMatch(m['id']) for m in league.matches]
-            filtered = [m for m in matches if (round_no == 0 or m.round_number == round_no) and m.forfeit_by != 'no_forfeit' and m.away_team is not None]
-            if not filtered:
-                return jsonify({'error': 'No matches found for this round'}), 404
-            random.shuffle(filtered)
-            part = filtered[random.randint(0, len(filtered) - 1)]
-            match_chosen = _cit.getMatch(part['id'])
-            chosen_team = match_chosen.home_team if random.randint(0, 1) == 0 else match_chosen.away_team
-            pot_players = chosen_team['players']
-            pl_id = pot_players[random.randint(0, len(pot_players) - 1)]
-            player_chosen = _cit.getUser(pl_id['id'])
-            db_team = _db.teams.get_by_team_id(chosen_team['team_id'])
-            if not db_team:
-                return jsonify({'error': f'Team {chosen_team["team_id"]} not found in database'}), 404
-        else:
-            player_chosen = _cit.getUser(spes_user)
-            if not player_chosen:
-                return jsonify({'error': 'Player not found'}), 404
-            for roster in player_chosen.rosters:
-                db_team = _db.teams.get_by_team_id(roster['team_id'])
-                if db_team and db_team['league_id'] == league_id:
-                    break
-            if not db_team:
-                return jsonify({'error': 'Player not found on a roster in this league'}), 404
-            pl_roster = _cit.getRoster(db_team['roster_id'])
-            all_matches = pl_roster.matches if hasattr(pl_roster, 'matches') else []
-            if not all_matches:
-                return jsonify({'error': 'No matches found for this player'}), 404
-            part = all_matches[random.randint(0, len(all_matches) - 1)]
-            match_chosen = _cit.getMatch(part['id'])
-        round_str = str(match_chosen.round_number)
-        raw_msg = get_template('democheck.json')
-        from modules.Drawbridge.functions import Functions as Funcs
-        funcs = Funcs(_db, _cit)
-        demo_msg = json.loads(funcs.substitute_strings_in_embed(str(raw_msg), {
-            '{CHANNEL_ID}': f'<@&{db_team["role_id"]}>',
-            '{TEAM_NAME}': db_team['team_name'],
-            '{ROUND_NO}': round_str,
-            '{TARGET_NAME}': player_chosen.name,
-            '{TARGET_ID}': str(player_chosen.id),
-            '{MATCH_ID}': str(match_chosen.id),
-        }))
-        demo_msg['embed'] = discord.Embed(**demo_msg['embeds'][0])
-        del demo_msg['embeds']
-        team_channel = _bot.get_channel(db_team['team_channel'])
-        if not team_channel:
-            return jsonify({'error': 'Team channel not found'}), 404
-        await team_channel.send(**demo_msg)
+        sampler = _get_tournament_cog().demo_checks
+        announced = []
+        try:
+            if spes_user:
+                picks = [await sampler.pick_for_player(league_id, spes_user)]
+            elif count > 1:
+                picks = await sampler.pick_many(league_id, league, count, round_no)
+            else:
+                picks = [await sampler.pick(league_id, league, round_no)]
+            funcs = Functions(_db, _cit)
+            for picked in picks:
+                await announce_demo_check(_bot, funcs, picked)
+                announced.append({
+                    'player': picked['player']['name'],
+                    'team': picked['team']['team_name'],
+                    'match_id': picked['match'].id,
+                })
+            error = None
+        except DemoCheckError as e:
+            if not announced:
+                return jsonify({'error': str(e)}), 404
+            # The earlier picks were already posted, so report those too
+            error = str(e)
+        names = ', '.join(f"{c['player']} ({c['team']})" for c in announced)
+        message = f'Random demo check announced for {names}.'
+        if error:
+            message += f' Stopped after {len(announced)} of {len(picks)}: {error}'
         return jsonify({
             'success': True,
-            'message': f'Random demo check announced for {player_chosen.name}.',
-            'player': player_chosen.name,
-            'team': db_team['team_name'],
-            'match_id': match_chosen.id,
+            'message': message,
+            'error': error,
+            'player': announced[0]['player'],
+            'team': announced[0]['team'],
+            'match_id': announced[0]['match_id'],
+            'checks': announced,
         })
     except Exception as e:
         logger.error(f'Demo check error: {e}', exc_info=True)
@@ -971,6 +1011,38 @@ async def api_sync_force():
         return _db_error(e)
 
 
+async def _run_bulk_sync(p, journal):
+    from modules.Drawbridge.bulk_sync import run_bulk_sync
+    p(0, 'Syncing guild members with Citadel...')
+
+    def progress(done, total, last):
+        p(int(done / total * 95), f'Checked {done}/{total} members ({last[:20]})...')
+
+    result = await run_bulk_sync(_get_guild(), _db, _cit, progress=progress, journal=journal)
+    message = (f"Bulk sync: checked {result['checked']} members, {result['linked']} linked "
+               f"({result['upserted']} saved), {result['not_linked']} not linked, "
+               f"{result['roles_assigned']} captain role(s) given.")
+    errors = [f'{name}: {error}' for name, error in result['failed']]
+    if errors:
+        # Every batch was checkpointed, so a resume would skip them; a new run retries them
+        message += f' {len(errors)} failed; run the sync again to retry them.'
+    try:
+        await _get_sync_cog()._channel_log(message)
+    except Exception as e:
+        logger.warning(f'Could not post the bulk sync summary: {e}')
+    return {'success': not errors, 'message': message, 'errors': errors}
+
+
+@admin_bp.route('/api/sync/bulk', methods=['POST'])
+@require_admin
+async def api_sync_bulk():
+    if not _check_bot_ready() or not _get_sync_cog():
+        return jsonify({'error': 'Bot or sync cog not ready'}), 503
+    if not _get_guild():
+        return jsonify({'error': 'Guild not found'}), 404
+    return _start_journaled_task('bulk_sync', None, {}, _run_bulk_sync)
+
+
 # Leagues list (Citadel + DB status)
 
 @admin_bp.route('/api/leagues')
@@ -1079,6 +1151,9 @@ async def api_tournament_detail(league_id: int):
             return jsonify({'error': 'League not found in Citadel'}), 404
         db_league = _db.leagues.get_by_id(league_id)
         divisions = _db.divisions.get_by_league(league_id)
+        results_by_match = {}
+        for r in _db.match_results.get_by_league(league_id):
+            results_by_match.setdefault(r['match_id'], []).append(_serialize_result(r))
         div_list = []
         for d in divisions:
             teams = _db.teams.get_by_division(d['id'])
@@ -1095,6 +1170,7 @@ async def api_tournament_detail(league_id: int):
                     'away_team_id': m.get('team_away'),
                     'channel_id': m['channel_id'],
                     'archived': m['archived'],
+                    'results': results_by_match.get(m['match_id'], []),
                 })
             team_list = [{'roster_id': t['roster_id'], 'team_id': t['team_id'], 'name': t['team_name'], 'channel_id': t['team_channel'], 'role_id': t['role_id']} for t in teams]
             div_list.append({
@@ -638,12 +638,12 @@ def register_views(bot, db):
     for event in events:
         if event['status'] in ('nominations', 'voting'):
             teams = db.teams.get_by_league(event['league_id'])
+            cats = db.award_event_categories.get_by_event(event['id']) if event['status'] == 'voting' else []
             for team in teams:
                 if event['status'] == 'nominations':
                     bot.add_view(AwardsNominationsView(event['id'], team['team_id']))
                 elif event['status'] == 'voting':
                     bot.add_view(AwardsVotesView(event['id'], team['team_id']))
-                    cats = db.award_event_categories.get_by_event(event['id'])
                     for cat in cats:
                         bot.add_view(VoteCategoryView(
                             event['id'], team['team_id'],
@@ -6,7 +6,9 @@ Use this if you just want log viewing without user resolution
 
 import asyncio
 import os
+import re
 import sys
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -93,11 +95,22 @@ async def handle_preflight():
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
         return response
 
+# Role mentions in logged messages: <@&ROLE_ID>
+ROLE_MENTION = re.compile(r'<@&(\d+)>')
+# Team rows are reloaded after any team write through the shared database, or
+# after this many seconds (for writes made by another process)
+TEAM_CACHE_TTL = float(os.getenv('WEB_TEAM_CACHE_TTL', '300'))
+
 class SimpleLogViewer:
     def __init__(self, shared_db=None):
         self.db = shared_db  # Use shared database if provided
         self.citadel = None
         self._match_cache = {}
+        # team_id -> team row, role_id -> team row (None when there is no such team)
+        self._teams_by_id = {}
+        self._teams_by_role = {}
+        self._teams_generation = None
+        self._teams_loaded_at = 0.0
         
     async def init_db(self):
         """Initialize database connection"""
@@ -165,6 +178,37 @@ class SimpleLogViewer:
             self._match_cache[match_id] = fallback
             return fallback
 
+    def _check_team_cache(self):
+        generation = getattr(self.db.teams, 'generation', None)
+        if generation != self._teams_generation or time.monotonic() - self._teams_loaded_at > TEAM_CACHE_TTL:
+            self._teams_by_id = {}
+            self._teams_by_role = {}
+            self._teams_generation = generation
+            self._teams_loaded_at = time.monotonic()
+
+    def resolve_teams(self, team_ids):
+        """Team rows for the given team ids, loading any not cached in one query."""
+        self._check_team_cache()
+        missing = {int(t) for t in team_ids if t} - self._teams_by_id.keys()
+        if missing:
+            for team in self.db.teams.get_by_team_ids(sorted(missing)):
+                # One row per league; keep the first, as get_by_team_id would
+                self._teams_by_id.setdefault(team['team_id'], team)
+            for team_id in missing:
+                self._teams_by_id.setdefault(team_id, None)
+        return {int(t): self._teams_by_id[int(t)] for t in team_ids if t}
+
+    def resolve_roles(self, role_ids):
+        """Team rows for the given role ids, loading any not cached in one query."""
+        self._check_team_cache()
+        missing = {int(r) for r in role_ids} - self._teams_by_role.keys()
+        if missing:
+            for team in self.db.teams.get_by_role_ids(sorted(missing)):
+                self._teams_by_role.setdefault(team['role_id'], team)
+            for role_id in missing:
+                self._teams_by_role.setdefault(role_id, None)
+        return {int(r): self._teams_by_role[int(r)] for r in role_ids}
+
 log_viewer = SimpleLogViewer()
 
 def set_shared_database(db):
@@ -310,14 +354,22 @@ async def get_logs():
         if match_id:
             match_info = log_viewer.db.matches.get_by_id(int(match_id))
             if match_info:
-                home_team = log_viewer.db.teams.get_by_team_id(match_info.get('team_home')) if match_info.get('team_home') else None
-                away_team = log_viewer.db.teams.get_by_team_id(match_info.get('team_away')) if match_info.get('team_away') else None
+                match_teams = log_viewer.resolve_teams([match_info.get('team_home'), match_info.get('team_away')])
+                home_team = match_teams.get(match_info.get('team_home'))
+                away_team = match_teams.get(match_info.get('team_away'))
                 
                 match_context = {
                     'home_team_role_id': home_team.get('role_id') if home_team else None,
                     'away_team_role_id': away_team.get('role_id') if away_team else None
                 }
 
+        # Resolve every team and role mentioned on the page up front
+        teams = log_viewer.resolve_teams([log.get('team_id') for log in logs_data])
+        role_teams = log_viewer.resolve_roles({
+            role_id for log in logs_data
+            for role_id in ROLE_MENTION.findall(log.get('message_content') or '')
+        })
+
         # Format logs for web display
         logs = []
         for log in logs_data:
@@ -325,12 +377,12 @@ async def get_logs():
             team_info = None
             team_name = None
             if log.get('team_id'):
-                team_info = log_viewer.db.teams.get_by_team_id(log.get('team_id'))
+                team_info = teams.get(int(log.get('team_id')))
                 team_name = team_info.get('team_name') if team_info else f"Team {log.get('team_id')}"
             
             # Process message content to resolve role pings
             message_content = log.get('message_content', '')
-            processed_message = await process_message_content(message_content, log_viewer.db)
+            processed_message = replace_role_mentions(message_content, role_teams)
             
             # Determine user role for highlighting - we'll need to get user roles from Discord or database
             # For now, we'll use basic role identification
@@ -374,43 +426,23 @@ async def get_logs():
         logger.error(f"Error getting logs: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
-async def process_message_content(message_content: str, db) -> str:
-    """Process message content to resolve role pings and mentions"""
-    if not message_content or not db:
+def replace_role_mentions(message_content: str, role_teams: dict) -> str:
+    """Replace role pings with the team they belong to, given ``{role_id: team row or None}``"""
+    if not message_content:
         return message_content
-    
-    import re
-    
-    # Copy the message to modify
-    processed = message_content
-    
-    # Pattern for role mentions: <@&ROLE_ID>
-    role_pattern = r'<@&(\d+)>'
-    role_matches = re.findall(role_pattern, processed)
-    
-    for role_id in role_matches:
-        try:
-            # Try to find team with this role_id
-            team_query = "SELECT * FROM teams WHERE role_id = ?"
-            team_data = db.teams._fetch_one(team_query, (int(role_id),))
-            
-            if team_data:
-                team_name = team_data.get('team_name', f'Team {team_data.get("team_id")}')
-                # Replace role ping with team name
-                processed = processed.replace(f'<@&{role_id}>', f'@{team_name}')
-            else:
-                # If no team found, just show as role mention
-                processed = processed.replace(f'<@&{role_id}>', f'@Role({role_id})')
-                
-        except Exception as e:
-            logger.warning(f"Error resolving role {role_id}: {e}")
-            # Keep original if resolution fails
-            continue
-    
-    # Pattern for user mentions: <@USER_ID> (already handled by existing logic in template)
-    # We'll let the frontend handle user mentions if needed
-    
-    return processed
+
+    def team_name(match):
+        role_id = int(match.group(1))
+        team_data = role_teams.get(role_id)
+        if team_data:
+            return '@' + (team_data.get('team_name') or f"Team {team_data.get('team_id')}")
+        if role_id in role_teams:
+            # No team has this role, just show it as a role mention
+            return f'@Role({role_id})'
+        # Not resolved; keep the original
+        return match.group(0)
+
+    return ROLE_MENTION.sub(team_name, message_content)
 
 @app.route('/api/matches')
 @require_auth